@@ -0,0 +1,121 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import FrozenSet, List, Set, Tuple
+
+import numpy as np
+
+from models.ragas_models import NormalizedRagasResult
+from settings import ATTRIBUTION_SHINGLE_SIZE, ATTRIBUTION_MIN_CONTAINMENT, ATTRIBUTION_SENTENCE_CACHE_SIZE
+from utils.text_utils import scan_tokens, token_hash
+
+# Sentence ends: latin terminators followed by whitespace, CJK terminators, line breaks
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+|(?<=[。！？；])|[\r\n]+")
+
+_BASE = 1_000_003
+_MOD = (1 << 61) - 1
+
+
+@dataclass
+class AttributionReport:
+    """
+    Sentence-level answer attribution, aligned with contexts in record order.
+    """
+
+    context_sentence_count: np.ndarray
+    attributed_sentence_count: np.ndarray
+
+    # Share of the context's tokens that sit in attributed sentences
+    attributed_token_share: np.ndarray
+
+    @classmethod
+    def concat(cls, parts: List["AttributionReport"]) -> "AttributionReport":
+        """Reports of consecutive record batches as one."""
+        return cls(
+            context_sentence_count=np.concatenate([p.context_sentence_count for p in parts]),
+            attributed_sentence_count=np.concatenate([p.attributed_sentence_count for p in parts]),
+            attributed_token_share=np.concatenate([p.attributed_token_share for p in parts]),
+        )
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s for s in (p.strip() for p in _SENTENCE_SPLIT.split(text)) if s]
+
+
+def _rolling_shingles(tokens: tuple) -> FrozenSet[int]:
+    """
+    Rabin-Karp hashes of every n-token window, one multiply-add per token.
+    Sentences shorter than n yield a single shingle over all their tokens.
+    """
+    n = min(ATTRIBUTION_SHINGLE_SIZE, len(tokens))
+    if n == 0:
+        return frozenset()
+
+    drop = pow(_BASE, n - 1, _MOD)
+    hashes = [token_hash(t) for t in tokens]
+
+    h = 0
+    for x in hashes[:n]:
+        h = (h * _BASE + x) % _MOD
+    shingles = {h}
+
+    for out, x in zip(hashes, hashes[n:]):
+        h = ((h - out * drop) * _BASE + x) % _MOD
+        shingles.add(h)
+
+    return frozenset(shingles)
+
+
+def attribute_answers(normalized: NormalizedRagasResult) -> AttributionReport:
+    """
+    Match context sentences to the answer with rolling-hash n-gram
+    shingles. A sentence is attributed when at least
+    ATTRIBUTION_MIN_CONTAINMENT of its shingles occur in the answer.
+    Each sentence is hashed once, so the cost is linear per ticket.
+    """
+
+    sentence_counts = []
+    attributed_counts = []
+    token_shares = []
+
+    # Overlapping windows and duplicate chunks repeat sentences across the
+    # job; an LRU keeps the common ones without growing with the job
+    @lru_cache(maxsize=ATTRIBUTION_SENTENCE_CACHE_SIZE)
+    def shingle_sentence(sentence: str) -> Tuple[FrozenSet[int], int]:
+        scanned = scan_tokens(sentence)
+        return _rolling_shingles(scanned.tokens), scanned.token_count
+
+    for record in normalized.records:
+        answer_shingles: Set[int] = set()
+        for sentence in split_sentences(record.rag_answer):
+            answer_shingles |= shingle_sentence(sentence)[0]
+
+        for ctx in record.contexts:
+            sentences = split_sentences(ctx.context_text)
+            attributed = 0
+            attributed_tokens = 0
+            total_tokens = 0
+
+            for sentence in sentences:
+                shingles, token_count = shingle_sentence(sentence)
+                total_tokens += token_count
+
+                if not shingles or not answer_shingles:
+                    continue
+
+                matched = len(shingles & answer_shingles)
+                if matched / len(shingles) >= ATTRIBUTION_MIN_CONTAINMENT:
+                    attributed += 1
+                    attributed_tokens += token_count
+
+            sentence_counts.append(len(sentences))
+            attributed_counts.append(attributed)
+            token_shares.append(
+                round(attributed_tokens / total_tokens, 4) if total_tokens else 0.0
+            )
+
+    return AttributionReport(
+        context_sentence_count=np.asarray(sentence_counts, dtype=np.int64),
+        attributed_sentence_count=np.asarray(attributed_counts, dtype=np.int64),
+        attributed_token_share=np.asarray(token_shares, dtype=np.float64),
+    )
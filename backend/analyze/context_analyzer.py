@@ -1,92 +1,115 @@
-from typing import List, Dict
-from models.ragas_models import NormalizedRagasResult
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+import numpy as np
+from models.ragas_models import NormalizedRagasResult, RagasRecord
+from models.threshold_models import ClassificationThresholds
+from evaluate.resolution_classifier import metric_arrays
+from analyze.keyword_coverage import KeywordCoverage
+from analyze.relevance_scorer import RelevanceScores
+from analyze.duplicate_detector import DuplicateReport
+from analyze.answer_attribution import AttributionReport
+from analyze.coverage_curves import CoverageCurves
 from utils.text_utils import count_tokens
 
+USEFUL_REASON = "Supports question or ground truth keywords"
+NOT_USEFUL_REASON = "Low keyword coverage; high token waste risk"
 
-def _safe_pct(numerator: int, denominator: int) -> float:
-    if denominator == 0:
-        return 0.0
-    return round(numerator / denominator, 4)
 
-
-def analyze_contexts(
-    normalized: NormalizedRagasResult,
-    keyword_analysis: Dict[str, Dict]
-) -> List[Dict]:
+def context_flags(
+    gt_weighted_pct: np.ndarray,
+    question_pct: np.ndarray,
+    answer_pct: np.ndarray,
+    faithfulness: np.ndarray,
+    context_recall: np.ndarray,
+    context_precision: np.ndarray,
+    thresholds: ClassificationThresholds
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Analyze context usefulness with keyword coverage percentages
-    and token cost awareness.
+    Vectorized usefulness flags. Every argument is aligned to contexts in
+    record order (per-question metrics gathered by context_ticket).
+    Returns (entity_match, is_useful, drop_recommendation).
     """
+    th = thresholds
+
+    # Weighted by IDF so rare domain entities count more than
+    # common words, and independent of ground-truth length
+    entity_match = gt_weighted_pct >= th.entity_match_min_weighted_coverage
+
+    is_useful = (
+        entity_match
+        | (question_pct > th.useful_min_question_coverage_pct)
+        | ((answer_pct > 0) & (faithfulness >= th.useful_min_faithfulness))
+        | (context_recall < th.useful_max_context_recall)
+    )
+
+    drop_recommendation = ~is_useful & (context_precision < th.drop_max_context_precision)
+
+    return entity_match, is_useful, drop_recommendation
+
+
+def iter_context_rows(
+    records: Iterable[RagasRecord],
+    metrics: Dict[str, np.ndarray],
+    coverage: KeywordCoverage,
+    relevance: RelevanceScores,
+    duplicates: DuplicateReport,
+    attribution: AttributionReport,
+    curves: CoverageCurves,
+    thresholds: Optional[ClassificationThresholds] = None
+) -> Iterator[Dict]:
+    """
+    Analyze context usefulness with keyword coverage percentages
+    and token cost awareness, yielding one Context BI row per context
+    in record order (chunked jobs spill them as they come, reading the
+    records back from disk). ``metrics`` are the job's metric_arrays.
 
-    context_bi_rows = []
+    Overlaps come from the sparse coverage engine; keyword lists are
+    decoded from it at export time, so rows only carry counts and flags.
+    """
 
-    for record in normalized.records:
+    # --- Coverage percentages (all contexts at once) ---
+    question_keyword_coverage_pct = coverage.coverage_pct(
+        coverage.overlapping_question, coverage.question
+    )
+    ground_truth_keyword_coverage_pct = coverage.coverage_pct(
+        coverage.overlapping_ground_truth, coverage.ground_truth
+    )
+    rag_answer_keyword_coverage_pct = coverage.coverage_pct(
+        coverage.overlapping_answer, coverage.answer
+    )
+
+    gt_weighted_pct = relevance.ground_truth_weighted_coverage_pct
+
+    # --- RAGAS-aligned usefulness (all contexts at once) ---
+    per_context = coverage.context_ticket
+    entity_match, is_useful, drop_recommendation = context_flags(
+        gt_weighted_pct,
+        question_keyword_coverage_pct,
+        rag_answer_keyword_coverage_pct,
+        metrics["faithfulness"][per_context],
+        metrics["context_recall"][per_context],
+        metrics["context_precision"][per_context],
+        thresholds or ClassificationThresholds()
+    )
+
+    i = 0
+
+    for record in records:
         ticket_id = record.ticket_id
-        metrics = record.metrics
-
-        q_keywords = set(keyword_analysis[ticket_id]["question_keywords"])
-        gt_keywords = set(keyword_analysis[ticket_id]["ground_truth_keywords"])
-        ans_keywords = set(keyword_analysis[ticket_id]["rag_answer_keywords"])
 
         for ctx in record.contexts:
             ctx_text = ctx.context_text
-            ctx_text_lower = ctx_text.lower()
 
             # --- Size metrics ---
             context_char_count = len(ctx_text)
             context_token_count = count_tokens(ctx_text)
 
-            # --- Keyword detection ---
-            context_keywords = {
-                k for k in (q_keywords | gt_keywords | ans_keywords)
-                if k in ctx_text_lower
-            }
+            q_pct = float(question_keyword_coverage_pct[i])
+            gt_pct = float(ground_truth_keyword_coverage_pct[i])
+            ans_pct = float(rag_answer_keyword_coverage_pct[i])
 
-            overlapping_question_keywords = q_keywords & context_keywords
-            overlapping_ground_truth_keywords = gt_keywords & context_keywords
-            overlapping_answer_keywords = ans_keywords & context_keywords
-
-            missing_question_keywords = q_keywords - context_keywords
-            missing_ground_truth_keywords = gt_keywords - context_keywords
-
-            # --- Coverage percentages ---
-            question_keyword_coverage_pct = _safe_pct(
-                len(overlapping_question_keywords),
-                len(q_keywords)
-            )
-
-            ground_truth_keyword_coverage_pct = _safe_pct(
-                len(overlapping_ground_truth_keywords),
-                len(gt_keywords)
-            )
-
-            rag_answer_keyword_coverage_pct = _safe_pct(
-                len(overlapping_answer_keywords),
-                len(ans_keywords)
-            )
-
-            # --- RAGAS-aligned usefulness ---
-            entity_match = len(overlapping_ground_truth_keywords) > 15
-
-            is_useful = (
-                entity_match
-                or question_keyword_coverage_pct > 15
-                or (rag_answer_keyword_coverage_pct > 0 and metrics.faithfulness >= 0.7)
-                or metrics.context_recall < 0.6
-            )
-
-            drop_recommendation = (
-                not is_useful
-                and metrics.context_precision < 0.5
-            )
-
-            reason = (
-                "Supports question or ground truth keywords"
-                if is_useful
-                else "Low keyword coverage; high token waste risk"
-            )
-
-            context_bi_rows.append({
+            useful = bool(is_useful[i])
+
+            yield {
                 "ticket_id": ticket_id,
                 "context_id": ctx.context_id,
                 "context_text": ctx_text,
@@ -95,31 +118,41 @@ def analyze_contexts(
                 "context_char_count": context_char_count,
                 "context_token_count": context_token_count,
 
-                # 🔑 Keyword lists
-                "context_keywords": sorted(context_keywords),
-                "question_keywords": sorted(q_keywords),
-                "ground_truth_keywords": sorted(gt_keywords),
-                "rag_answer_keywords": sorted(ans_keywords),
-
-                # 🔍 Overlap lists
-                "overlapping_question_keywords": sorted(overlapping_question_keywords),
-                "overlapping_ground_truth_keywords": sorted(overlapping_ground_truth_keywords),
-                "overlapping_answer_keywords": sorted(overlapping_answer_keywords),
+                # ♻️ Near-duplicate retrieval
+                "duplicate_cluster_id": duplicates.cluster_ids[i],
+                "redundant_token_count": int(duplicates.redundant_token_counts[i]),
 
                 # 📈 Coverage metrics (NEW)
-                "question_keyword_coverage_pct": question_keyword_coverage_pct,
-                "ground_truth_keyword_coverage_pct": ground_truth_keyword_coverage_pct,
-                "rag_answer_keyword_coverage_pct": rag_answer_keyword_coverage_pct,
-
-                # ❌ Missing keywords
-                "missing_question_keywords": sorted(missing_question_keywords),
-                "missing_ground_truth_keywords": sorted(missing_ground_truth_keywords),
+                "question_keyword_coverage_pct": q_pct,
+                "ground_truth_keyword_coverage_pct": gt_pct,
+                "rag_answer_keyword_coverage_pct": ans_pct,
+
+                # 🎯 BM25 relevance (hashed job-level index)
+                "question_bm25": float(relevance.question_bm25[i]),
+                "ground_truth_bm25": float(relevance.ground_truth_bm25[i]),
+                "rag_answer_bm25": float(relevance.rag_answer_bm25[i]),
+                "ground_truth_weighted_coverage_pct": float(gt_weighted_pct[i]),
+
+                # 🧾 Sentence-level answer attribution
+                "context_sentence_count": int(attribution.context_sentence_count[i]),
+                "attributed_sentence_count": int(attribution.attributed_sentence_count[i]),
+                "attributed_token_share": float(attribution.attributed_token_share[i]),
+
+                # 📉 Top-k cutoff (cumulative over contexts 1..i of the ticket)
+                "cumulative_question_coverage_pct": float(curves.cumulative_question_coverage_pct[i]),
+                "cumulative_ground_truth_coverage_pct": float(curves.cumulative_ground_truth_coverage_pct[i]),
+                "cumulative_token_count": int(curves.cumulative_token_count[i]),
 
                 # 📊 Flags
-                "entity_match": entity_match,
-                "is_context_useful": is_useful,
-                "usefulness_reason": reason,
-                "drop_recommendation": drop_recommendation
-            })
+                "entity_match": bool(entity_match[i]),
+                "is_context_useful": useful,
+                "usefulness_reason": USEFUL_REASON if useful else NOT_USEFUL_REASON,
+                "drop_recommendation": bool(drop_recommendation[i])
+            }
+
+            i += 1
+
 
-    return context_bi_rows
+def analyze_contexts(normalized: NormalizedRagasResult, *args, **kwargs) -> List[Dict]:
+    """All rows of iter_context_rows for a job held in memory, as a list."""
+    return list(iter_context_rows(normalized.records, metric_arrays(normalized), *args, **kwargs))
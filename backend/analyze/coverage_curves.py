@@ -0,0 +1,189 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from models.ragas_models import NormalizedRagasResult
+from analyze.keyword_coverage import KeywordCoverage
+from settings import TOPK_TARGET_COVERAGE
+from utils.text_utils import count_tokens
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CoverageCurves:
+    """
+    Cumulative coverage as contexts 1..N are added in retrieval order.
+    Per-context arrays are aligned with contexts in record order; ``table``
+    is the job-wide coverage-vs-k / tokens-vs-k curve.
+    """
+
+    cumulative_question_coverage_pct: np.ndarray
+    cumulative_ground_truth_coverage_pct: np.ndarray
+    cumulative_token_count: np.ndarray
+
+    table: List[Dict]
+    recommended_k: Optional[int]
+
+
+def _segment_cumsum(values: np.ndarray, ticket_start: np.ndarray) -> np.ndarray:
+    """
+    Cumulative sum restarting at every ticket's first context.
+    """
+    total = np.cumsum(values)
+    offset = np.repeat(total[ticket_start] - values[ticket_start], np.diff(np.append(ticket_start, len(values))))
+    return total - offset
+
+
+def _new_keywords_per_context(
+    overlap: sparse.csr_matrix,
+    context_ticket: np.ndarray
+) -> np.ndarray:
+    """
+    Count, per context, the ticket keywords it is the first to cover.
+    A prefix union grows exactly by these, so cumulative coverage is a
+    running sum instead of repeated set unions.
+    """
+    coo = overlap.tocoo()
+    # CSR order is row-major, so the first occurrence of a key is its earliest context
+    keys = context_ticket[coo.row] * overlap.shape[1] + coo.col
+    _, first = np.unique(keys, return_index=True)
+    return np.bincount(coo.row[first], minlength=overlap.shape[0])
+
+
+def _pct(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.round(
+        np.divide(
+            numerator,
+            denominator,
+            out=np.zeros(len(numerator), dtype=np.float64),
+            where=denominator > 0
+        ),
+        4
+    )
+
+
+def _mean_at_k(
+    values: np.ndarray,
+    position: np.ndarray,
+    last: np.ndarray,
+    context_counts: np.ndarray,
+    max_k: int
+) -> np.ndarray:
+    """
+    Job-wide mean of a per-ticket curve at k = 1..max_k. Tickets with fewer
+    than k contexts contribute their final value.
+    """
+    ticket_count = len(context_counts)
+    at_k = np.bincount(position, weights=values, minlength=max_k)[:max_k]
+
+    final_values = np.zeros(ticket_count)
+    has_contexts = context_counts > 0
+    final_values[has_contexts] = values[last[has_contexts]]
+
+    finished = np.bincount(context_counts, weights=final_values, minlength=max_k + 1)
+    # finished_before[k-1] = sum of final values for tickets with n < k
+    finished_before = np.cumsum(finished)[:max_k]
+
+    return (at_k + finished_before) / max(ticket_count, 1)
+
+
+def context_counts(normalized: NormalizedRagasResult) -> np.ndarray:
+    return np.asarray([len(r.contexts) for r in normalized.records], dtype=np.int64)
+
+
+def context_token_counts(normalized: NormalizedRagasResult) -> np.ndarray:
+    return np.fromiter(
+        (count_tokens(c.context_text) for r in normalized.records for c in r.contexts),
+        dtype=np.int64
+    )
+
+
+def compute_coverage_curves(
+    normalized: NormalizedRagasResult,
+    coverage: KeywordCoverage
+) -> CoverageCurves:
+    """
+    Compute per-ticket cumulative keyword coverage and tokens for top-k
+    cutoffs, aggregate them job-wide and recommend the smallest k that
+    reaches TOPK_TARGET_COVERAGE of the coverage of all contexts.
+    """
+    return curves_from_counts(coverage, context_counts(normalized), context_token_counts(normalized))
+
+
+def curves_from_counts(
+    coverage: KeywordCoverage,
+    context_counts: np.ndarray,
+    tokens: np.ndarray
+) -> CoverageCurves:
+    """
+    compute_coverage_curves from the contexts per ticket and tokens per
+    context, which chunked jobs collect batch by batch.
+    """
+
+    context_ticket = coverage.context_ticket
+    ticket_start = np.concatenate(([0], np.cumsum(context_counts)[:-1])).astype(np.int64)
+    non_empty_start = ticket_start[context_counts > 0]
+
+    if coverage.context_count == 0:
+        empty = np.zeros(0)
+        return CoverageCurves(empty, empty, empty.astype(np.int64), [], None)
+
+    q_total = coverage.counts(coverage.question)[context_ticket]
+    gt_total = coverage.counts(coverage.ground_truth)[context_ticket]
+
+    q_cum = _segment_cumsum(
+        _new_keywords_per_context(coverage.overlapping_question, context_ticket), non_empty_start
+    )
+    gt_cum = _segment_cumsum(
+        _new_keywords_per_context(coverage.overlapping_ground_truth, context_ticket), non_empty_start
+    )
+    token_cum = _segment_cumsum(tokens, non_empty_start)
+
+    q_pct = _pct(q_cum, q_total)
+    gt_pct = _pct(gt_cum, gt_total)
+
+    # --- Job-wide curve ---
+    position = np.arange(coverage.context_count) - ticket_start[context_ticket]
+    last = ticket_start + context_counts - 1
+    max_k = int(context_counts.max())
+
+    mean_q = _mean_at_k(q_pct, position, last, context_counts, max_k)
+    mean_gt = _mean_at_k(gt_pct, position, last, context_counts, max_k)
+    mean_tokens = _mean_at_k(token_cum.astype(np.float64), position, last, context_counts, max_k)
+    reaching = np.cumsum(np.bincount(context_counts, minlength=max_k + 1)[::-1])[::-1][1:max_k + 1]
+
+    share_of_max = mean_gt / mean_gt[-1] if mean_gt[-1] > 0 else np.ones(max_k)
+    reached = np.flatnonzero(share_of_max >= TOPK_TARGET_COVERAGE)
+    recommended_k = int(reached[0]) + 1 if len(reached) else max_k
+
+    table = [
+        {
+            "k": k + 1,
+            "tickets_with_k_contexts": int(reaching[k]),
+            "mean_question_coverage_pct": round(float(mean_q[k]), 4),
+            "mean_ground_truth_coverage_pct": round(float(mean_gt[k]), 4),
+            "ground_truth_coverage_share_of_max": round(float(share_of_max[k]), 4),
+            "mean_cumulative_tokens": round(float(mean_tokens[k]), 2),
+            "is_recommended_k": k + 1 == recommended_k,
+        }
+        for k in range(max_k)
+    ]
+
+    logger.info(
+        "Recommended top-k = %d (%.0f%% of all-context ground-truth coverage, %.0f tokens/ticket)",
+        recommended_k,
+        TOPK_TARGET_COVERAGE * 100,
+        mean_tokens[recommended_k - 1]
+    )
+
+    return CoverageCurves(
+        cumulative_question_coverage_pct=q_pct,
+        cumulative_ground_truth_coverage_pct=gt_pct,
+        cumulative_token_count=token_cum,
+        table=table,
+        recommended_k=recommended_k,
+    )
@@ -0,0 +1,107 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+from evaluate.resolution_classifier import METRIC_NAMES
+from analyze.token_savings import SavingsInputs
+from utils.stats import unit_histograms
+from settings import METRIC_HISTOGRAM_BINS
+
+# Per-context keyword coverage shown on the dashboard overview
+COVERAGE_KINDS = ["question", "ground_truth", "rag_answer"]
+
+QUANTILES = {"min": 0, "p25": 25, "median": 50, "p75": 75, "max": 100}
+
+
+def _round(value) -> Optional[float]:
+    return None if value is None or np.isnan(value) else round(float(value), 4)
+
+
+def _ratio(overlap: np.ndarray, total: np.ndarray) -> np.ndarray:
+    # Same rounding as KeywordCoverage.coverage_pct
+    pct = np.divide(overlap, total, out=np.zeros(len(total), dtype=np.float64), where=total > 0)
+    return np.round(pct, 4)
+
+
+def _quantiles(values: np.ndarray) -> Dict[str, Optional[float]]:
+    if len(values) == 0:
+        return {name: None for name in QUANTILES}
+    points = np.percentile(values, list(QUANTILES.values()))
+    return {name: _round(v) for name, v in zip(QUANTILES, points)}
+
+
+def build_dashboard_summary(
+    classification_inputs: Dict[str, np.ndarray],
+    savings_inputs: SavingsInputs,
+    categories: np.ndarray,
+    is_context_useful: np.ndarray
+) -> Dict:
+    """
+    Everything the dashboard overview shows, precomputed from the stored
+    job arrays: KPI means, category counts, per-ticket coverage means and
+    coverage distributions split by context usefulness. Coverage values
+    are fractions in [0, 1], like the BI tables.
+    """
+
+    context_ticket = savings_inputs.context_ticket.astype(np.int64)
+    ticket_count = savings_inputs.ticket_count
+    useful = np.asarray(is_context_useful, dtype=bool)
+
+    coverage = np.column_stack([
+        _ratio(
+            classification_inputs["question_overlap"],
+            classification_inputs["question_total"][context_ticket]
+        ),
+        savings_inputs.ground_truth_coverage_pct.astype(np.float64),
+        _ratio(
+            classification_inputs["answer_overlap"],
+            classification_inputs["answer_total"][context_ticket]
+        ),
+    ]) if len(context_ticket) else np.zeros((0, len(COVERAGE_KINDS)))
+
+    metrics = np.column_stack([classification_inputs[name] for name in METRIC_NAMES])
+    labels, counts = np.unique(categories, return_counts=True)
+
+    summary = {
+        "ticket_count": ticket_count,
+        "context_count": len(context_ticket),
+        "useful_context_count": int(useful.sum()),
+        "context_token_count": int(savings_inputs.token_count.sum()),
+        "kpis": {
+            name: _round(metrics[:, j].mean()) if ticket_count else None
+            for j, name in enumerate(METRIC_NAMES)
+        },
+        "categories": {label: int(c) for label, c in zip(labels.tolist(), counts.tolist())},
+        "coverage": {},
+        "histogram_edges": np.linspace(0, 1, METRIC_HISTOGRAM_BINS + 1).round(4).tolist(),
+        "ticket_coverage": {},
+    }
+
+    # --- Distributions, split by usefulness ---
+    useful_hist = unit_histograms(coverage[useful], METRIC_HISTOGRAM_BINS)
+    not_useful_hist = unit_histograms(coverage[~useful], METRIC_HISTOGRAM_BINS)
+    for j, kind in enumerate(COVERAGE_KINDS):
+        column = coverage[:, j]
+        summary["coverage"][kind] = {
+            "mean": _round(column.mean()) if len(column) else None,
+            "quantiles": {
+                "all": _quantiles(column),
+                "useful": _quantiles(column[useful]),
+                "not_useful": _quantiles(column[~useful]),
+            },
+            "histogram": {
+                "useful": useful_hist[j].tolist(),
+                "not_useful": not_useful_hist[j].tolist(),
+            },
+        }
+
+    # --- Per-ticket means (tickets with at least one context) ---
+    per_ticket = np.bincount(context_ticket, minlength=ticket_count)
+    has_contexts = per_ticket > 0
+    summary["ticket_coverage"]["ticket_id"] = savings_inputs.ticket_ids[has_contexts].tolist()
+    for j, kind in enumerate(COVERAGE_KINDS):
+        sums = np.bincount(context_ticket, weights=coverage[:, j], minlength=ticket_count)
+        means = sums[has_contexts] / per_ticket[has_contexts]
+        summary["ticket_coverage"][kind] = np.round(means, 4).tolist()
+
+    return summary
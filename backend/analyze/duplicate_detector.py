@@ -0,0 +1,208 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from models.ragas_models import NormalizedRagasResult
+from settings import (
+    MINHASH_NUM_PERM,
+    MINHASH_BANDS,
+    MINHASH_SHINGLE_SIZE,
+    DUPLICATE_JACCARD_THRESHOLD
+)
+from utils.text_utils import tokenize, token_hash
+
+_SIGNATURE_CHUNK = 2048
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+@dataclass
+class DuplicateReport:
+    """
+    Near-duplicate clusters per context, aligned with contexts in record order.
+    """
+
+    # "cluster_<n>" for contexts with at least one near-duplicate in the job
+    cluster_ids: List[Optional[str]]
+
+    # Tokens repeated within the same ticket: a context counts as redundant
+    # when an earlier context of the same ticket is in its cluster
+    redundant_token_counts: np.ndarray
+
+
+def _shingles(tokens: tuple) -> np.ndarray:
+    h = np.fromiter(map(token_hash, tokens), dtype=np.uint64, count=len(tokens))
+    k = MINHASH_SHINGLE_SIZE
+    if len(h) < k:
+        return np.unique(h)
+
+    # Polynomial combination of k consecutive token hashes (wraps mod 2^64)
+    shingle = np.zeros(len(h) - k + 1, dtype=np.uint64)
+    for j in range(k):
+        shingle = shingle * np.uint64(1000003) + h[j:len(h) - k + 1 + j]
+    return np.unique(shingle)
+
+
+def _signature_chunks(lengths: np.ndarray, chunk_bytes: Optional[int]) -> List[tuple]:
+    """
+    (start, stop) context ranges hashed together: _SIGNATURE_CHUNK
+    contexts, or with ``chunk_bytes`` as many as keep the shingles x
+    permutations temporary within it (at least one context each).
+    """
+    n = len(lengths)
+    if chunk_bytes is None:
+        return [(start, min(start + _SIGNATURE_CHUNK, n)) for start in range(0, n, _SIGNATURE_CHUNK)]
+
+    per_shingle = MINHASH_NUM_PERM * np.dtype(np.uint64).itemsize
+    ends = np.cumsum(lengths) * per_shingle
+    chunks = []
+    start = 0
+    while start < n:
+        limit = (ends[start - 1] if start else 0) + chunk_bytes
+        stop = max(start + 1, int(np.searchsorted(ends, limit, side="right")))
+        chunks.append((start, stop))
+        start = stop
+    return chunks
+
+
+def _minhash(shingle_sets: List[np.ndarray], chunk_bytes: Optional[int] = None) -> np.ndarray:
+    """
+    MinHash signatures (contexts x permutations) using multiply-shift
+    hashing, computed for a chunk of contexts at a time.
+    """
+    rng = np.random.default_rng(1)
+    a = rng.integers(1, 2 ** 63, size=MINHASH_NUM_PERM, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=MINHASH_NUM_PERM, dtype=np.uint64)
+
+    signatures = np.full((len(shingle_sets), MINHASH_NUM_PERM), _MAX_HASH, dtype=np.uint64)
+
+    all_lengths = np.fromiter((len(s) for s in shingle_sets), dtype=np.int64, count=len(shingle_sets))
+    for start, stop in _signature_chunks(all_lengths, chunk_bytes):
+        chunk = shingle_sets[start:stop]
+        lengths = all_lengths[start:stop]
+        non_empty = np.flatnonzero(lengths)
+        if len(non_empty) == 0:
+            continue
+
+        values = np.concatenate([chunk[i] for i in non_empty])
+        offsets = np.concatenate(([0], np.cumsum(lengths[non_empty])[:-1]))
+
+        with np.errstate(over="ignore"):
+            # In place, so the chunk allocates one shingles x permutations array
+            hashed = values[:, None] * a
+            hashed += b
+            hashed >>= np.uint64(32)
+        signatures[start + non_empty] = np.minimum.reduceat(hashed, offsets, axis=0)
+
+    return signatures
+
+
+def _candidate_edges(signatures: np.ndarray, candidates: np.ndarray):
+    """
+    LSH banding: contexts sharing a band bucket are compared with the
+    bucket's first member only, which keeps the work linear per band.
+    """
+    rows = MINHASH_NUM_PERM // MINHASH_BANDS
+    sources, targets = [], []
+
+    for band in range(MINHASH_BANDS):
+        block = np.ascontiguousarray(
+            signatures[candidates, band * rows:(band + 1) * rows]
+        )
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+        leader = candidates[first[inverse]]
+        mask = leader != candidates
+        if not mask.any():
+            continue
+
+        src, dst = leader[mask], candidates[mask]
+        similarity = (signatures[src] == signatures[dst]).mean(axis=1)
+        keep = similarity >= DUPLICATE_JACCARD_THRESHOLD
+        sources.append(src[keep])
+        targets.append(dst[keep])
+
+    if not sources:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    return np.concatenate(sources), np.concatenate(targets)
+
+
+def context_signatures(normalized: NormalizedRagasResult, chunk_bytes: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    MinHash signatures of a batch of records' contexts, whether each has
+    any shingles and its token count: everything cluster_duplicates reads
+    per context. ``chunk_bytes`` caps the hashing temporary (chunked mode).
+    """
+
+    shingle_sets = []
+    token_counts = []
+
+    for record in normalized.records:
+        for ctx in record.contexts:
+            tokens = tokenize(ctx.context_text)
+            shingle_sets.append(_shingles(tokens.tokens))
+            token_counts.append(tokens.token_count)
+
+    return {
+        "signatures": _minhash(shingle_sets, chunk_bytes),
+        "has_shingles": np.fromiter((len(s) > 0 for s in shingle_sets), dtype=bool, count=len(shingle_sets)),
+        "token_counts": np.asarray(token_counts, dtype=np.int64),
+    }
+
+
+def detect_duplicates(normalized: NormalizedRagasResult, chunk_bytes: Optional[int] = None) -> DuplicateReport:
+    """
+    Find near-duplicate contexts within each ticket and across the job
+    with MinHash signatures and locality-sensitive hashing. ``chunk_bytes``
+    caps the hashing temporary (chunked mode).
+    """
+    context_ticket = np.fromiter(
+        (t for t, r in enumerate(normalized.records) for _ in r.contexts),
+        dtype=np.int64
+    )
+    return cluster_duplicates(context_ticket=context_ticket, **context_signatures(normalized, chunk_bytes))
+
+
+def cluster_duplicates(
+    signatures: np.ndarray,
+    has_shingles: np.ndarray,
+    token_counts: np.ndarray,
+    context_ticket: np.ndarray
+) -> DuplicateReport:
+    """
+    Cluster contexts of the whole job from their context_signatures
+    (joined across batches; ``signatures`` may be memory-mapped).
+    """
+
+    n = len(signatures)
+    candidates = np.flatnonzero(has_shingles)
+    src, dst = _candidate_edges(signatures, candidates)
+
+    graph = sparse.coo_matrix((np.ones(len(src), dtype=bool), (src, dst)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+
+    sizes = np.bincount(labels, minlength=n) if n else np.array([], dtype=np.int64)
+    duplicated = sizes[labels] > 1 if n else np.array([], dtype=bool)
+
+    # Number clusters by first appearance so ids are stable for a given input
+    cluster_ids: List[Optional[str]] = [None] * n
+    numbering: Dict[int, int] = {}
+    for i in np.flatnonzero(duplicated):
+        label = labels[i]
+        if label not in numbering:
+            numbering[label] = len(numbering) + 1
+        cluster_ids[i] = f"cluster_{numbering[label]}"
+
+    # First context of a cluster within a ticket is kept, later ones are waste
+    pair_key = context_ticket * max(n, 1) + labels
+    _, first_in_ticket = np.unique(pair_key, return_index=True)
+    redundant = duplicated.copy()
+    redundant[first_in_ticket] = False
+
+    return DuplicateReport(
+        cluster_ids=cluster_ids,
+        redundant_token_counts=np.where(redundant, token_counts, 0),
+    )
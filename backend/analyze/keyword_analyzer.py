@@ -1,18 +1,6 @@
-import re
-from typing import Dict, List, Set
+from typing import Dict
 from models.ragas_models import NormalizedRagasResult
-
-
-STOPWORDS = {
-    "the", "is", "are", "a", "an", "and", "or", "to", "of", "in",
-    "for", "on", "by", "with", "before", "after", "be", "can",
-    "may", "will", "shall", "that", "this"
-}
-
-
-def _tokenize(text: str) -> Set[str]:
-    words = re.findall(r"[a-zA-Z0-9_]+", text.lower())
-    return {w for w in words if w not in STOPWORDS and len(w) > 2}
+from utils.text_utils import tokenize
 
 
 def extract_keywords(normalized: NormalizedRagasResult) -> Dict[str, Dict]:
@@ -23,13 +11,13 @@ def extract_keywords(normalized: NormalizedRagasResult) -> Dict[str, Dict]:
     keyword_results = {}
 
     for record in normalized.records:
-        q_kw = _tokenize(record.question)
-        gt_kw = _tokenize(record.ground_truth)
-        ans_kw = _tokenize(record.rag_answer)
+        q_kw = tokenize(record.question).keywords
+        gt_kw = tokenize(record.ground_truth).keywords
+        ans_kw = tokenize(record.rag_answer).keywords
 
         context_kw = set()
         for ctx in record.contexts:
-            context_kw |= _tokenize(ctx.context_text)
+            context_kw |= tokenize(ctx.context_text).keywords
 
         keyword_results[record.ticket_id] = {
             "question_keywords": sorted(q_kw),
@@ -0,0 +1,255 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+import numpy as np
+from scipy import sparse
+
+from models.ragas_models import NormalizedRagasResult
+from utils.text_utils import tokenize
+
+
+@dataclass
+class KeywordCoverage:
+    """
+    Job-wide keyword coverage held as sparse boolean matrices.
+
+    Keyword ids index into ``terms`` (sorted), so decoding a CSR row
+    yields an already-sorted keyword list. Ticket matrices have one row
+    per record, context matrices one row per context in record order.
+    """
+
+    terms: np.ndarray
+    context_ticket: np.ndarray
+
+    question: sparse.csr_matrix
+    ground_truth: sparse.csr_matrix
+    answer: sparse.csr_matrix
+    ticket_context: sparse.csr_matrix
+
+    context: sparse.csr_matrix
+    overlapping_question: sparse.csr_matrix
+    overlapping_ground_truth: sparse.csr_matrix
+    overlapping_answer: sparse.csr_matrix
+    missing_question: sparse.csr_matrix
+    missing_ground_truth: sparse.csr_matrix
+
+    @property
+    def ticket_count(self) -> int:
+        return self.question.shape[0]
+
+    @property
+    def context_count(self) -> int:
+        return self.context.shape[0]
+
+    def counts(self, matrix: sparse.csr_matrix) -> np.ndarray:
+        return np.diff(matrix.indptr)
+
+    def coverage_pct(
+        self,
+        overlap: sparse.csr_matrix,
+        keywords: sparse.csr_matrix
+    ) -> np.ndarray:
+        """
+        Share of ticket keywords found per context, rounded like _safe_pct.
+        ``keywords`` is a ticket matrix; it is gathered per context here.
+        """
+        totals = self.counts(keywords)[self.context_ticket]
+        pct = np.divide(
+            self.counts(overlap),
+            totals,
+            out=np.zeros(len(totals), dtype=np.float64),
+            where=totals > 0
+        )
+        return np.round(pct, 4)
+
+    def decode(self, matrix: sparse.csr_matrix) -> List[List[str]]:
+        """
+        Decode every row of a keyword matrix into a sorted keyword list.
+        Only called by the exporter.
+        """
+        if matrix.shape[0] == 0:
+            return []
+        words = self.terms[matrix.indices]
+        return [chunk.tolist() for chunk in np.split(words, matrix.indptr[1:-1])]
+
+    def context_keyword_columns(self, rows: slice = slice(None)) -> Dict[str, List[List[str]]]:
+        """
+        Decoded keyword list columns for the contexts in ``rows``; the
+        exporter decodes one batch at a time.
+        """
+        tickets = self.context_ticket[rows]
+        return {
+            "context_keywords": self.decode(self.context[rows]),
+            "question_keywords": self.decode(self.question[tickets]),
+            "ground_truth_keywords": self.decode(self.ground_truth[tickets]),
+            "rag_answer_keywords": self.decode(self.answer[tickets]),
+            "overlapping_question_keywords": self.decode(self.overlapping_question[rows]),
+            "overlapping_ground_truth_keywords": self.decode(self.overlapping_ground_truth[rows]),
+            "overlapping_answer_keywords": self.decode(self.overlapping_answer[rows]),
+            "missing_question_keywords": self.decode(self.missing_question[rows]),
+            "missing_ground_truth_keywords": self.decode(self.missing_ground_truth[rows]),
+        }
+
+    def missing_answer(self, rows: slice = slice(None)) -> sparse.csr_matrix:
+        return _difference(self.ground_truth[rows], self.answer[rows])
+
+    def missing_context(self, rows: slice = slice(None)) -> sparse.csr_matrix:
+        return _difference(self.ground_truth[rows], self.ticket_context[rows])
+
+    def ticket_keyword_columns(self, rows: slice = slice(None)) -> Dict[str, List[List[str]]]:
+        return {
+            "question_keywords": self.decode(self.question[rows]),
+            "ground_truth_keywords": self.decode(self.ground_truth[rows]),
+            "rag_answer_keywords": self.decode(self.answer[rows]),
+            "missing_answer_keywords": self.decode(self.missing_answer(rows)),
+            "missing_context_keywords": self.decode(self.missing_context(rows)),
+        }
+
+
+def _to_csr(
+    rows: Iterable[Iterable[str]],
+    vocab: Dict[str, int],
+    row_count: int
+) -> sparse.csr_matrix:
+    """
+    Encode keyword collections as a boolean CSR matrix over ``vocab``.
+    Keywords outside the vocabulary are ignored.
+    """
+    indptr = np.zeros(row_count + 1, dtype=np.int64)
+    indices: List[int] = []
+
+    for i, keywords in enumerate(rows):
+        ids = sorted({vocab[k] for k in keywords if k in vocab})
+        indices.extend(ids)
+        indptr[i + 1] = len(indices)
+
+    return sparse.csr_matrix(
+        (
+            np.ones(len(indices), dtype=bool),
+            np.asarray(indices, dtype=np.int32),
+            indptr
+        ),
+        shape=(row_count, len(vocab))
+    )
+
+
+def _intersect(a: sparse.csr_matrix, b: sparse.csr_matrix) -> sparse.csr_matrix:
+    m = a.multiply(b).tocsr()
+    m.sort_indices()
+    return m
+
+
+def _difference(a: sparse.csr_matrix, b: sparse.csr_matrix) -> sparse.csr_matrix:
+    # a & ~b, on booleans "a > b" is exactly set difference
+    m = (a > _intersect(a, b)).tocsr()
+    m.sort_indices()
+    return m
+
+
+def build_keyword_coverage(
+    normalized: NormalizedRagasResult,
+    keyword_analysis: Dict[str, Dict]
+) -> KeywordCoverage:
+    """
+    Build the job vocabulary and sparse keyword matrices, then compute
+    overlaps for every (ticket, context) pair with sparse operations.
+    """
+
+    records = normalized.records
+    ticket_count = len(records)
+
+    q_lists = [keyword_analysis[r.ticket_id]["question_keywords"] for r in records]
+    gt_lists = [keyword_analysis[r.ticket_id]["ground_truth_keywords"] for r in records]
+    ans_lists = [keyword_analysis[r.ticket_id]["rag_answer_keywords"] for r in records]
+
+    # Only ticket keywords can ever overlap, so they define the vocabulary
+    terms = sorted({k for lists in (q_lists, gt_lists, ans_lists) for kw in lists for k in kw})
+    vocab = {term: i for i, term in enumerate(terms)}
+
+    context_ticket = np.fromiter(
+        (t for t, r in enumerate(records) for _ in r.contexts),
+        dtype=np.int64
+    )
+    context_count = len(context_ticket)
+
+    question = _to_csr(q_lists, vocab, ticket_count)
+    ground_truth = _to_csr(gt_lists, vocab, ticket_count)
+    answer = _to_csr(ans_lists, vocab, ticket_count)
+
+    context_tokens = _to_csr(
+        (tokenize(ctx.context_text).keywords for r in records for ctx in r.contexts),
+        vocab,
+        context_count
+    )
+
+    ticket_keywords = (question + ground_truth + answer).tocsr()
+    context = _intersect(context_tokens, ticket_keywords[context_ticket])
+
+    q_per_context = question[context_ticket]
+    gt_per_context = ground_truth[context_ticket]
+
+    overlapping_question = _intersect(q_per_context, context)
+    overlapping_ground_truth = _intersect(gt_per_context, context)
+
+    # Ticket x context incidence, used to union context keywords per ticket
+    incidence = sparse.csr_matrix(
+        (
+            np.ones(context_count, dtype=bool),
+            (context_ticket, np.arange(context_count))
+        ),
+        shape=(ticket_count, context_count)
+    )
+    ticket_context = (incidence @ context).tocsr()
+    ticket_context.sort_indices()
+
+    return KeywordCoverage(
+        terms=np.asarray(terms, dtype=object),
+        context_ticket=context_ticket,
+        question=question,
+        ground_truth=ground_truth,
+        answer=answer,
+        ticket_context=ticket_context,
+        context=context,
+        overlapping_question=overlapping_question,
+        overlapping_ground_truth=overlapping_ground_truth,
+        overlapping_answer=_intersect(answer[context_ticket], context),
+        missing_question=_difference(q_per_context, overlapping_question),
+        missing_ground_truth=_difference(gt_per_context, overlapping_ground_truth),
+    )
+
+
+def merge_keyword_coverage(parts: List[KeywordCoverage]) -> KeywordCoverage:
+    """
+    Join the coverage of consecutive record batches into the job's, as if
+    built in one go: keyword ids are remapped to the merged (sorted)
+    vocabulary, which keeps every row's ids sorted, and rows are stacked.
+    """
+    terms = sorted({term for part in parts for term in part.terms})
+    vocab = {term: i for i, term in enumerate(terms)}
+
+    def stacked(name: str) -> sparse.csr_matrix:
+        blocks = []
+        for part in parts:
+            matrix = getattr(part, name)
+            remap = np.fromiter((vocab[t] for t in part.terms), dtype=np.int32, count=len(part.terms))
+            blocks.append(sparse.csr_matrix(
+                (matrix.data, remap[matrix.indices], matrix.indptr),
+                shape=(matrix.shape[0], len(terms))
+            ))
+        return sparse.vstack(blocks, format="csr")
+
+    offsets = np.cumsum([0] + [part.ticket_count for part in parts[:-1]])
+    return KeywordCoverage(
+        terms=np.asarray(terms, dtype=object),
+        context_ticket=np.concatenate(
+            [part.context_ticket + offset for part, offset in zip(parts, offsets)]
+        ).astype(np.int64),
+        **{
+            name: stacked(name)
+            for name in (
+                "question", "ground_truth", "answer", "ticket_context", "context",
+                "overlapping_question", "overlapping_ground_truth", "overlapping_answer",
+                "missing_question", "missing_ground_truth",
+            )
+        }
+    )
@@ -0,0 +1,167 @@
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from analyze.keyword_coverage import KeywordCoverage
+from export.array_store import load_arrays
+from settings import KEYWORD_INDEX_CACHE_SIZE
+
+# Roles whose postings are tickets (record positions)
+TICKET_ROLES = [
+    "question",
+    "ground_truth",
+    "rag_answer",
+    "missing_answer",
+    "missing_context",
+]
+
+# Roles whose postings are contexts (context positions)
+CONTEXT_ROLES = [
+    "context",
+    "overlapping_question",
+    "overlapping_ground_truth",
+    "overlapping_answer",
+    "missing_question",
+    "missing_ground_truth",
+]
+
+ROLES = TICKET_ROLES + CONTEXT_ROLES
+
+
+def _role_matrices(coverage: KeywordCoverage) -> Dict[str, sparse.csr_matrix]:
+    return {
+        "question": coverage.question,
+        "ground_truth": coverage.ground_truth,
+        "rag_answer": coverage.answer,
+        "missing_answer": coverage.missing_answer(),
+        "missing_context": coverage.missing_context(),
+        "context": coverage.context,
+        "overlapping_question": coverage.overlapping_question,
+        "overlapping_ground_truth": coverage.overlapping_ground_truth,
+        "overlapping_answer": coverage.overlapping_answer,
+        "missing_question": coverage.missing_question,
+        "missing_ground_truth": coverage.missing_ground_truth,
+    }
+
+
+def _delta_encode(indptr: np.ndarray, postings: np.ndarray) -> np.ndarray:
+    """
+    Gaps between consecutive postings of a keyword; the first posting of
+    each keyword stays absolute so any one list decodes with a cumsum.
+    """
+    deltas = postings.astype(np.uint32)
+    if len(deltas):
+        deltas[1:] -= postings[:-1].astype(np.uint32)
+        starts = indptr[:-1][np.diff(indptr) > 0]
+        deltas[starts] = postings[starts]
+    return deltas
+
+
+def build_keyword_index(
+    coverage: KeywordCoverage,
+    ticket_ids: List[str],
+    context_ids: List[str]
+) -> Dict[str, np.ndarray]:
+    """
+    Invert every keyword matrix (keyword -> sorted ticket or context
+    positions) and return the columns to store with the job. Postings are
+    delta-encoded so the compressed store stays small.
+    """
+    arrays = {
+        "terms": np.asarray(coverage.terms, dtype=str),
+        "ticket_ids": np.asarray(ticket_ids, dtype=str),
+        "context_ids": np.asarray(context_ids, dtype=str),
+        "context_ticket": coverage.context_ticket.astype(np.uint32),
+    }
+
+    for role, matrix in _role_matrices(coverage).items():
+        inverted = matrix.tocsc()
+        inverted.sort_indices()
+        arrays[f"{role}_indptr"] = inverted.indptr.astype(np.int64)
+        arrays[f"{role}_postings"] = _delta_encode(inverted.indptr, inverted.indices)
+
+    return arrays
+
+
+class KeywordIndex:
+    """
+    Read side of the stored index. Lookups binary-search the sorted term
+    array and decode only the requested posting lists.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.terms = arrays["terms"]
+        self.ticket_ids = arrays["ticket_ids"]
+        self.context_ids = arrays["context_ids"]
+        self.context_ticket = arrays["context_ticket"]
+
+    def term_id(self, keyword: str) -> Optional[int]:
+        i = int(np.searchsorted(self.terms, keyword))
+        if i < len(self.terms) and self.terms[i] == keyword:
+            return i
+        return None
+
+    def postings(self, role: str, term_id: int) -> np.ndarray:
+        indptr = self.arrays[f"{role}_indptr"]
+        deltas = self.arrays[f"{role}_postings"][indptr[term_id]:indptr[term_id + 1]]
+        return np.cumsum(deltas, dtype=np.int64)
+
+    def document_frequency(self, role: str) -> np.ndarray:
+        return np.diff(self.arrays[f"{role}_indptr"])
+
+    def lookup(
+        self,
+        keyword: str,
+        roles: List[str],
+        offset: int = 0,
+        limit: int = 100
+    ) -> Dict[str, Dict]:
+        term_id = self.term_id(keyword)
+        result = {}
+
+        for role in roles:
+            if term_id is None:
+                result[role] = {"count": 0, "postings": []}
+                continue
+
+            positions = self.postings(role, term_id)
+            page = positions[offset:offset + limit]
+
+            if role in TICKET_ROLES:
+                postings = [{"ticket_id": t} for t in self.ticket_ids[page].tolist()]
+            else:
+                postings = [
+                    {"ticket_id": t, "context_id": c}
+                    for t, c in zip(
+                        self.ticket_ids[self.context_ticket[page]].tolist(),
+                        self.context_ids[page].tolist()
+                    )
+                ]
+
+            result[role] = {"count": len(positions), "postings": postings}
+
+        return result
+
+    def top_keywords(self, role: str, limit: int = 20) -> List[Dict]:
+        """
+        Keywords with the most postings in ``role``, most frequent first.
+        """
+        df = self.document_frequency(role)
+        limit = min(limit, int((df > 0).sum()))
+        if limit == 0:
+            return []
+
+        top = np.argpartition(-df, limit - 1)[:limit]
+        top = top[np.lexsort((self.terms[top], -df[top]))]
+        return [
+            {"keyword": k, "count": int(c)}
+            for k, c in zip(self.terms[top].tolist(), df[top].tolist())
+        ]
+
+
+@lru_cache(maxsize=KEYWORD_INDEX_CACHE_SIZE)
+def load_keyword_index(job_id: str) -> KeywordIndex:
+    return KeywordIndex(load_arrays(job_id, "keyword_index"))
@@ -1,8 +1,13 @@
 import boto3
-import json
-from typing import List, Dict
-from settings import AWS_REGION, BEDROCK_MODEL_ID
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+from jobs.job_cancellation import CancellationToken
+from settings import AWS_REGION, BEDROCK_MODEL_ID, LLM_MAX_CONCURRENCY
+from utils import json_codec
 from utils.logger import get_logger
+from utils.rows import column, set_columns
 
 logger = get_logger(__name__)
 
@@ -11,6 +16,52 @@ bedrock = boto3.client(
     region_name=AWS_REGION
 )
 
+# Row fields sent to the LLM when ranking each table
+TICKET_RANK_FIELDS = [
+    "ticket_id",
+    "context_entity_recall",
+    "context_precision",
+    "context_recall",
+    "answer_correctness",
+    "answer_similarity",
+    "answer_relevancy",
+    "faithfulness",
+    "resolution_category",
+    "needs_manual_review",
+    "context_count",
+    "useful_context_count",
+    "dropped_context_count",
+]
+CONTEXT_RANK_FIELDS = [
+    "ticket_id",
+    "context_id",
+    "context_char_count",
+    "context_token_count",
+    "question_keyword_coverage_pct",
+    "ground_truth_keyword_coverage_pct",
+    "rag_answer_keyword_coverage_pct",
+    "entity_match",
+    "is_context_useful",
+    "usefulness_reason",
+    "drop_recommendation",
+]
+
+# Rank of rows the LLM response left out
+UNRANKED = 999
+
+# Budget of concurrent Bedrock calls, shared by every job in the process
+_llm_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+
+def use_llm_slots(slots):
+    """
+    Draw Bedrock calls from ``slots`` (e.g. a multiprocessing semaphore
+    shared by several worker processes) instead of this process's budget.
+    """
+    global _llm_slots
+    _llm_slots = slots
+
+
 def build_ticket_rank_prompt(ticket_payload: list) -> str:
     return f"""
 You are a RAG quality auditor.
@@ -48,7 +99,7 @@ Rules:
 }}
 
 Ticket data:
-{json.dumps(ticket_payload, indent=2)}
+{json_codec.dumps_str(ticket_payload, indent=True)}
 """
 
 def build_context_rank_prompt(context_payload: list) -> str:
@@ -84,25 +135,26 @@ Ranking signals:
 }}
 
 Context data:
-{json.dumps(context_payload, indent=2)}
+{json_codec.dumps_str(context_payload, indent=True)}
 """
 
 
 def rank_single_context(context_payload: dict) -> dict:
     prompt = build_context_rank_prompt(context_payload)
 
-    response = bedrock.invoke_model(
-        modelId=BEDROCK_MODEL_ID,
-        body=json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "system": "Respond ONLY with valid JSON.",
-            "messages": [{"role": "user", "content": prompt}],
-            "max_tokens": 200,
-            "temperature": 0.0
-        })
-    )
+    with _llm_slots:
+        response = bedrock.invoke_model(
+            modelId=BEDROCK_MODEL_ID,
+            body=json_codec.dumps({
+                "anthropic_version": "bedrock-2023-05-31",
+                "system": "Respond ONLY with valid JSON.",
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": 200,
+                "temperature": 0.0
+            })
+        )
 
-    return json.loads(response["body"].read())
+    return json_codec.loads(response["body"].read())
 
 
 def invoke_claude(prompt: str) -> dict:
@@ -122,12 +174,14 @@ def invoke_claude(prompt: str) -> dict:
         "temperature": 0.0
     }
 
-    response = bedrock.invoke_model(
-        modelId=BEDROCK_MODEL_ID,
-        body=json.dumps(body).encode("utf-8")
-    )
+    with _llm_slots:
+        response = bedrock.invoke_model(
+            modelId=BEDROCK_MODEL_ID,
+            body=json_codec.dumps(body)
+        )
 
-    raw = json.loads(response["body"].read().decode("utf-8"))
+    # Parsed from the body bytes as they are, without decoding to str first
+    raw = json_codec.loads(response["body"].read())
 
     try:
         # 🔑 Extract Claude text output
@@ -141,7 +195,7 @@ def invoke_claude(prompt: str) -> dict:
         if raw.get("stop_reason") == "max_tokens":
             logger.warning("Claude response truncated due to max_tokens")
 
-        return json.loads(text_output)
+        return json_codec.loads(text_output)
 
     except Exception as e:
         logger.error("Failed to parse Claude response: %s", raw)
@@ -151,89 +205,93 @@ def invoke_claude(prompt: str) -> dict:
         }
 
 
-def rank_ragas_bi(ragas_bi_rows: List[Dict]) -> List[Dict]:
+@contextmanager
+def _invoker(cancel: Optional[CancellationToken]):
+    """
+    invoke_claude, or with a ``cancel`` token a version that runs the call
+    on a worker thread and abandons it (JobCancelled) once cancelled.
+    """
+    if cancel is None:
+        yield invoke_claude
+        return
+
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-rank")
+    try:
+        yield lambda prompt: cancel.wait_for(pool.submit(invoke_claude, prompt))
+    finally:
+        # Never wait on an abandoned in-flight call
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def rank_ragas_bi(
+    ragas_bi_rows: List[Dict],
+    cancel: Optional[CancellationToken] = None
+) -> List[Dict]:
     # Build payload for ALL tickets
-    payload = [
-        {
-            "ticket_id": r["ticket_id"],
-            "context_entity_recall": r["context_entity_recall"],
-            "context_precision": r["context_precision"],
-            "context_recall": r["context_recall"],
-            "answer_correctness": r["answer_correctness"],
-            "answer_similarity": r["answer_similarity"],
-            "answer_relevancy": r["answer_relevancy"],
-            "faithfulness": r["faithfulness"],
-            "resolution_category": r["resolution_category"],
-            "needs_manual_review": r["needs_manual_review"],
-            "context_count": r["context_count"],
-            "useful_context_count": r["useful_context_count"],
-            "dropped_context_count": r["dropped_context_count"],
-        }
-        for r in ragas_bi_rows
-    ]
+    payload = [{field: r[field] for field in TICKET_RANK_FIELDS} for r in ragas_bi_rows]
 
     prompt = build_ticket_rank_prompt(payload)
-    response = invoke_claude(prompt)
+    with _invoker(cancel) as invoke:
+        response = invoke(prompt)
 
     ranked = {
         r["ticket_id"]: r
         for r in response.get("ranked_tickets", [])
     }
 
-    for row in ragas_bi_rows:
-        info = ranked.get(row["ticket_id"])
-        row["rank"] = info["rank"] if info else 999
-        row["rank_reason"] = info["reason"] if info else "Not ranked by LLM"
+    # Spilled tables (chunked mode) rewrite their batches
+    rank_infos = [ranked.get(ticket_id) for ticket_id in column(ragas_bi_rows, "ticket_id")]
+    set_columns(ragas_bi_rows, {
+        "rank": [info["rank"] if info else UNRANKED for info in rank_infos],
+        "rank_reason": [info["reason"] if info else "Not ranked by LLM" for info in rank_infos],
+    })
 
     return ragas_bi_rows
 
 
-def rank_context_bi(context_bi: list) -> list:
+def rank_context_bi(
+    context_bi: list,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[CancellationToken] = None
+) -> list:
     """
     Rank contexts in batches to avoid token limit truncation.
     Processes contexts in chunks of 50 to stay within token limits.
+    ``progress(done, total)`` is called after each batch; once ``cancel``
+    is set the in-flight batch is abandoned and the rest are dropped.
     """
     BATCH_SIZE = 50
     ranking_map = {}
+    batch_count = -(-len(context_bi) // BATCH_SIZE)
 
     # Process in batches
-    for i in range(0, len(context_bi), BATCH_SIZE):
-        batch = context_bi[i:i + BATCH_SIZE]
-        
-        payload = [
-            {
-                "ticket_id": r["ticket_id"],
-                "context_id": r["context_id"],
-                "context_char_count": r["context_char_count"],
-                "context_token_count": r["context_token_count"],
-                "question_keyword_coverage_pct": r["question_keyword_coverage_pct"],
-                "ground_truth_keyword_coverage_pct": r["ground_truth_keyword_coverage_pct"],
-                "rag_answer_keyword_coverage_pct": r["rag_answer_keyword_coverage_pct"],
-                "entity_match": r["entity_match"],
-                "is_context_useful": r["is_context_useful"],
-                "usefulness_reason": r["usefulness_reason"],
-                "drop_recommendation": r["drop_recommendation"],
-            }
-            for r in batch
-        ]
+    with _invoker(cancel) as invoke:
+        for i in range(0, len(context_bi), BATCH_SIZE):
+            batch = context_bi[i:i + BATCH_SIZE]
 
-        prompt = build_context_rank_prompt(payload)
-        response = invoke_claude(prompt)
+            payload = [{field: r[field] for field in CONTEXT_RANK_FIELDS} for r in batch]
 
-        # 🔒 Defensive parsing
-        ranked_contexts = response.get("ranked_contexts", [])
+            prompt = build_context_rank_prompt(payload)
+            response = invoke(prompt)
 
-        for r in ranked_contexts:
-            if "ticket_id" in r and "context_id" in r:
-                ranking_map[(r["ticket_id"], r["context_id"])] = r
+            # 🔒 Defensive parsing
+            ranked_contexts = response.get("ranked_contexts", [])
 
-    # Apply rankings to all contexts
-    for row in context_bi:
-        key = (row["ticket_id"], row["context_id"])
-        rank_info = ranking_map.get(key)
+            for r in ranked_contexts:
+                if "ticket_id" in r and "context_id" in r:
+                    ranking_map[(r["ticket_id"], r["context_id"])] = r
+
+            if progress:
+                progress(i // BATCH_SIZE + 1, batch_count)
 
-        row["rank"] = rank_info["rank"] if rank_info else 999
-        row["rank_reason"] = rank_info["reason"] if rank_info else "Not ranked by LLM"
+    # Apply rankings to all contexts
+    rank_infos = [
+        ranking_map.get(key) for key in zip(column(context_bi, "ticket_id"), column(context_bi, "context_id"))
+    ]
+    set_columns(context_bi, {
+        "rank": [info["rank"] if info else UNRANKED for info in rank_infos],
+        "rank_reason": [info["reason"] if info else "Not ranked by LLM" for info in rank_infos],
+    })
 
     return context_bi
 
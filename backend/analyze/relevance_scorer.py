@@ -0,0 +1,262 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from models.ragas_models import NormalizedRagasResult, RagasRecord
+from settings import (
+    RELEVANCE_HASH_FEATURES,
+    RELEVANCE_BATCH_SIZE,
+    BM25_K1,
+    BM25_B
+)
+from utils.text_utils import token_hash, tokenize
+from utils.timing import StageTimer
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class RelevanceScores:
+    """
+    Per-context relevance, aligned with contexts in record order.
+    """
+
+    question_bm25: np.ndarray
+    ground_truth_bm25: np.ndarray
+    rag_answer_bm25: np.ndarray
+
+    # IDF-weighted share of ground-truth terms present in the context
+    ground_truth_weighted_coverage_pct: np.ndarray
+
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def _hashed_matrix(
+    docs: Iterable[Iterable[str]],
+    n_features: int,
+    row_count: int,
+    binary: bool
+) -> sparse.csr_matrix:
+    # Feature ids come from the shared token hash (memoized, stable across
+    # restarts), so they line up with every other hashed token id
+    indptr = np.zeros(row_count + 1, dtype=np.int64)
+    hashes: List[int] = []
+
+    for i, tokens in enumerate(docs):
+        hashes.extend(map(token_hash, tokens))
+        indptr[i + 1] = len(hashes)
+
+    indices = (np.asarray(hashes, dtype=np.int64) % n_features).astype(np.int32)
+    m = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.float32), indices, indptr),
+        shape=(row_count, n_features)
+    )
+    # Duplicate ids (repeated tokens or hash collisions) become term counts
+    m.sum_duplicates()
+    if binary:
+        m.data[:] = 1.0
+    return m
+
+
+def _row_sums(m: sparse.csr_matrix) -> np.ndarray:
+    return np.asarray(m.sum(axis=1), dtype=np.float64).ravel()
+
+
+_QUERY_FIELDS = ("question", "ground_truth", "rag_answer")
+
+
+def _hash_records(records: List[RagasRecord], timer: StageTimer) -> Tuple[np.ndarray, sparse.csr_matrix, Dict]:
+    """
+    Hashed term counts per context and keyword sets per question, ground
+    truth and answer, with each context's record position.
+    """
+    with timer.stage("hash_contexts"):
+        context_ticket = np.fromiter(
+            (t for t, r in enumerate(records) for _ in r.contexts),
+            dtype=np.int64
+        )
+        n_docs = len(context_ticket)
+        tf = _hashed_matrix(
+            (tokenize(c.context_text).tokens for r in records for c in r.contexts),
+            RELEVANCE_HASH_FEATURES,
+            n_docs,
+            binary=False
+        )
+
+    with timer.stage("hash_queries"):
+        queries = {
+            name: _hashed_matrix(
+                (tokenize(getattr(r, name)).keywords for r in records),
+                RELEVANCE_HASH_FEATURES,
+                len(records),
+                binary=True
+            )
+            for name in _QUERY_FIELDS
+        }
+
+    return context_ticket, tf, queries
+
+
+def _idf(df: np.ndarray, n_docs: int) -> np.ndarray:
+    return np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+
+def _bm25(
+    tf: sparse.csr_matrix,
+    queries: Dict[str, sparse.csr_matrix],
+    context_ticket: np.ndarray,
+    idf: np.ndarray,
+    avg_len: float,
+    timer: StageTimer
+) -> Dict[str, np.ndarray]:
+    """
+    Unrounded BM25 scores per query field and the IDF-weighted ground
+    truth coverage ("weighted_coverage") of the contexts in ``tf``.
+    Every context is scored on its own, so a job can be scored in parts.
+    """
+    n_docs = tf.shape[0]
+
+    with timer.stage("bm25_weights"):
+        doc_len = _row_sums(tf)
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / (avg_len or 1.0))
+
+        weights = tf.copy()
+        row_norm = np.repeat(length_norm, np.diff(tf.indptr)).astype(np.float32)
+        weights.data = (
+            idf[weights.indices]
+            * weights.data * (BM25_K1 + 1)
+            / (weights.data + row_norm)
+        )
+
+        present = tf.copy()
+        present.data[:] = 1.0
+
+    scores = {name: np.zeros(n_docs) for name in queries}
+    gt_covered = np.zeros(n_docs)
+    gt_total = np.zeros(n_docs)
+
+    with timer.stage("score_batches"):
+        gt_idf = queries["ground_truth"].multiply(idf).tocsr()
+
+        for start in range(0, n_docs, RELEVANCE_BATCH_SIZE):
+            rows = slice(start, start + RELEVANCE_BATCH_SIZE)
+            tickets = context_ticket[rows]
+            batch_weights = weights[rows]
+
+            for name, query in queries.items():
+                scores[name][rows] = _row_sums(batch_weights.multiply(query[tickets]))
+
+            batch_gt_idf = gt_idf[tickets]
+            gt_covered[rows] = _row_sums(present[rows].multiply(batch_gt_idf))
+            gt_total[rows] = _row_sums(batch_gt_idf)
+
+    scores["weighted_coverage"] = np.divide(
+        gt_covered,
+        gt_total,
+        out=np.zeros(n_docs),
+        where=gt_total > 0
+    )
+    return scores
+
+
+def _relevance_scores(scores: Dict[str, np.ndarray], timer: StageTimer) -> RelevanceScores:
+    n_docs = len(scores["weighted_coverage"])
+    total = sum(timer.timings.values())
+    logger.info(
+        "relevance | scored %d contexts in %.3fs (%.0f contexts/s)",
+        n_docs, total, n_docs / total if total else 0.0
+    )
+
+    return RelevanceScores(
+        question_bm25=np.round(scores["question"], 4),
+        ground_truth_bm25=np.round(scores["ground_truth"], 4),
+        rag_answer_bm25=np.round(scores["rag_answer"], 4),
+        ground_truth_weighted_coverage_pct=np.round(scores["weighted_coverage"], 4),
+        timings=timer.timings,
+    )
+
+
+def score_relevance(normalized: NormalizedRagasResult) -> RelevanceScores:
+    """
+    Score every context against its question, ground truth and answer
+    with BM25 over a job-level hashed index (CPU only, no models).
+    """
+
+    timer = StageTimer("relevance")
+    context_ticket, tf, queries = _hash_records(normalized.records, timer)
+    n_docs = len(context_ticket)
+
+    with timer.stage("inverted_index"):
+        # Document frequency per feature over the whole job
+        df = np.bincount(tf.indices, minlength=RELEVANCE_HASH_FEATURES)
+        idf = _idf(df, n_docs)
+
+    avg_len = _row_sums(tf).mean() if n_docs else 0.0
+    return _relevance_scores(_bm25(tf, queries, context_ticket, idf, avg_len, timer), timer)
+
+
+def _csr_columns(prefix: str, m: sparse.csr_matrix) -> Dict[str, np.ndarray]:
+    return {f"{prefix}_data": m.data, f"{prefix}_indices": m.indices, f"{prefix}_indptr": m.indptr}
+
+
+def _csr_from_columns(prefix: str, arrays: Dict[str, np.ndarray]) -> sparse.csr_matrix:
+    indptr = arrays[f"{prefix}_indptr"]
+    return sparse.csr_matrix(
+        (arrays[f"{prefix}_data"], arrays[f"{prefix}_indices"], indptr),
+        shape=(len(indptr) - 1, RELEVANCE_HASH_FEATURES)
+    )
+
+
+def hash_relevance(normalized: NormalizedRagasResult) -> Dict[str, np.ndarray]:
+    """
+    The hashed index of one batch of records as flat columns, for
+    score_relevance_batches (chunked mode spills them between the two).
+    """
+    context_ticket, tf, queries = _hash_records(normalized.records, StageTimer("relevance"))
+    arrays = {"context_ticket": context_ticket, **_csr_columns("tf", tf)}
+    for name, query in queries.items():
+        arrays.update(_csr_columns(name, query))
+    return arrays
+
+
+def score_relevance_batches(batches: Iterable[Dict[str, np.ndarray]]) -> RelevanceScores:
+    """
+    score_relevance over hash_relevance batches, read twice: once for the
+    job-level document frequencies and lengths, once to score each batch.
+    Scores match scoring the whole job at once.
+    """
+
+    timer = StageTimer("relevance")
+
+    with timer.stage("inverted_index"):
+        df = np.zeros(RELEVANCE_HASH_FEATURES, dtype=np.int64)
+        doc_lens = []
+        for arrays in batches:
+            tf = _csr_from_columns("tf", arrays)
+            df += np.bincount(tf.indices, minlength=RELEVANCE_HASH_FEATURES)
+            doc_lens.append(_row_sums(tf))
+        doc_len = np.concatenate(doc_lens) if doc_lens else np.zeros(0)
+        n_docs = len(doc_len)
+        idf = _idf(df, n_docs)
+        avg_len = doc_len.mean() if n_docs else 0.0
+        del doc_lens, doc_len
+
+    parts = [
+        _bm25(
+            _csr_from_columns("tf", arrays),
+            {name: _csr_from_columns(name, arrays) for name in _QUERY_FIELDS},
+            arrays["context_ticket"],
+            idf,
+            avg_len,
+            timer
+        )
+        for arrays in batches
+    ]
+    scores = {
+        name: np.concatenate([part[name] for part in parts]) if parts else np.zeros(0)
+        for name in (*_QUERY_FIELDS, "weighted_coverage")
+    }
+    return _relevance_scores(scores, timer)
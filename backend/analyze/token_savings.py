@@ -0,0 +1,187 @@
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from analyze.keyword_coverage import KeywordCoverage
+from models.api_models import TokenSavingsPolicy
+from settings import PROMPT_COST_PER_1K_TOKENS
+from utils.rows import column
+
+
+DEFAULT_POLICIES = [
+    TokenSavingsPolicy(kind="drop_flagged"),
+    TokenSavingsPolicy(kind="min_ground_truth_coverage", value=0.1),
+    TokenSavingsPolicy(kind="min_ground_truth_coverage", value=0.2),
+    TokenSavingsPolicy(kind="min_ground_truth_coverage", value=0.3),
+    TokenSavingsPolicy(kind="max_tokens_per_ticket", value=500),
+    TokenSavingsPolicy(kind="max_tokens_per_ticket", value=1000),
+    TokenSavingsPolicy(kind="max_tokens_per_ticket", value=2000),
+    TokenSavingsPolicy(kind="top_k_by_relevance", value=1),
+    TokenSavingsPolicy(kind="top_k_by_relevance", value=3),
+    TokenSavingsPolicy(kind="top_k_by_relevance", value=5),
+]
+
+
+@dataclass
+class SavingsInputs:
+    """
+    Columns of context_bi needed to simulate drop policies, in context order,
+    plus ground-truth keyword hits grouped by (ticket, keyword).
+    """
+
+    ticket_ids: np.ndarray
+    context_ticket: np.ndarray
+    token_count: np.ndarray
+    drop_recommendation: np.ndarray
+    ground_truth_coverage_pct: np.ndarray
+    relevance: np.ndarray
+
+    # Ground-truth keyword hits sorted by (ticket, keyword): the context of
+    # each hit, the start of each key's run and the ticket owning each key
+    hit_context: np.ndarray
+    key_start: np.ndarray
+    key_ticket: np.ndarray
+    ground_truth_total: np.ndarray
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "SavingsInputs":
+        return cls(**{k: arrays[k] for k in cls.__dataclass_fields__})
+
+    @property
+    def ticket_count(self) -> int:
+        return len(self.ticket_ids)
+
+
+def build_savings_inputs(
+    coverage: KeywordCoverage,
+    contexts: List[Dict],
+    ticket_ids: List[str]
+) -> SavingsInputs:
+    coo = coverage.overlapping_ground_truth.tocoo()
+    keys = coverage.context_ticket[coo.row] * coverage.overlapping_ground_truth.shape[1] + coo.col
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    key_start = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) if len(keys) else np.zeros(0, dtype=np.int64)
+
+    return SavingsInputs(
+        ticket_ids=np.asarray(ticket_ids, dtype=str),
+        context_ticket=coverage.context_ticket,
+        token_count=np.asarray(column(contexts, "context_token_count"), dtype=np.int64),
+        drop_recommendation=np.asarray(column(contexts, "drop_recommendation"), dtype=bool),
+        ground_truth_coverage_pct=np.asarray(column(contexts, "ground_truth_keyword_coverage_pct"), dtype=np.float64),
+        relevance=np.asarray(column(contexts, "ground_truth_bm25"), dtype=np.float64),
+        hit_context=coo.row[order].astype(np.int64),
+        key_start=key_start.astype(np.int64),
+        key_ticket=coverage.context_ticket[coo.row[order][key_start]] if len(keys) else np.zeros(0, dtype=np.int64),
+        ground_truth_total=coverage.counts(coverage.ground_truth),
+    )
+
+
+def _keep_mask(inputs: SavingsInputs, policy: TokenSavingsPolicy) -> np.ndarray:
+    n = len(inputs.context_ticket)
+
+    if policy.kind == "drop_flagged":
+        return ~inputs.drop_recommendation
+
+    if policy.value is None:
+        raise ValueError(f"Policy '{policy.kind}' requires a value")
+
+    if policy.kind == "min_ground_truth_coverage":
+        return inputs.ground_truth_coverage_pct >= policy.value
+
+    # Position of each context within its ticket (contexts are contiguous per ticket)
+    starts = np.flatnonzero(np.r_[True, inputs.context_ticket[1:] != inputs.context_ticket[:-1]]) if n else np.zeros(0, dtype=np.int64)
+    run_lengths = np.diff(np.append(starts, n))
+
+    if policy.kind == "max_tokens_per_ticket":
+        total = np.cumsum(inputs.token_count)
+        before = np.repeat(total[starts] - inputs.token_count[starts], run_lengths)
+        return (total - before) <= policy.value
+
+    if policy.kind == "top_k_by_relevance":
+        order = np.lexsort((-inputs.relevance, inputs.context_ticket))
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n) - np.repeat(starts, run_lengths)
+        return rank < policy.value
+
+    raise ValueError(f"Unknown policy '{policy.kind}'")
+
+
+def _covered_per_ticket(inputs: SavingsInputs, keep: np.ndarray) -> np.ndarray:
+    if len(inputs.key_start) == 0:
+        return np.zeros(inputs.ticket_count)
+    covered = np.logical_or.reduceat(keep[inputs.hit_context], inputs.key_start)
+    return np.bincount(inputs.key_ticket, weights=covered, minlength=inputs.ticket_count)
+
+
+def _coverage(covered: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    return np.divide(covered, totals, out=np.zeros(len(totals)), where=totals > 0)
+
+
+def simulate_policies(
+    inputs: SavingsInputs,
+    policies: List[TokenSavingsPolicy],
+    include_tickets: bool = True
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Evaluate context drop policies and return (job-wide summary rows,
+    per-ticket rows). Each policy is a handful of vectorized passes over
+    the context columns, so dozens of policies stay cheap on large jobs.
+    """
+
+    t = inputs.ticket_count
+    tokens_total = np.bincount(inputs.context_ticket, weights=inputs.token_count, minlength=t)
+    all_kept = np.ones(len(inputs.context_ticket), dtype=bool)
+    coverage_before = _coverage(_covered_per_ticket(inputs, all_kept), inputs.ground_truth_total)
+
+    summary, per_ticket = [], []
+
+    for policy in policies:
+        keep = _keep_mask(inputs, policy)
+
+        tokens_kept = np.bincount(inputs.context_ticket, weights=inputs.token_count * keep, minlength=t)
+        tokens_saved = tokens_total - tokens_kept
+        cost_saved = tokens_saved / 1000 * PROMPT_COST_PER_1K_TOKENS
+
+        coverage_after = _coverage(_covered_per_ticket(inputs, keep), inputs.ground_truth_total)
+        coverage_lost = coverage_before - coverage_after
+
+        job_tokens = float(tokens_total.sum())
+        summary.append({
+            "policy": policy.label,
+            "contexts_dropped": int((~keep).sum()),
+            "tokens_total": int(job_tokens),
+            "tokens_saved": int(tokens_saved.sum()),
+            "tokens_saved_pct": round(float(tokens_saved.sum()) / job_tokens, 4) if job_tokens else 0.0,
+            "estimated_cost_saved": round(float(cost_saved.sum()), 4),
+            "mean_ground_truth_coverage_before": round(float(coverage_before.mean()), 4) if t else 0.0,
+            "mean_ground_truth_coverage_after": round(float(coverage_after.mean()), 4) if t else 0.0,
+            "mean_ground_truth_coverage_lost": round(float(coverage_lost.mean()), 4) if t else 0.0,
+            "tickets_losing_coverage": int((coverage_lost > 1e-9).sum()),
+        })
+
+        if not include_tickets:
+            continue
+
+        per_ticket.extend(
+            {
+                "policy": policy.label,
+                "ticket_id": ticket_id,
+                "tokens_total": int(total),
+                "tokens_saved": int(saved),
+                "estimated_cost_saved": round(float(cost), 6),
+                "ground_truth_coverage_before": round(float(before), 4),
+                "ground_truth_coverage_after": round(float(after), 4),
+                "ground_truth_coverage_lost": round(float(lost), 4),
+            }
+            for ticket_id, total, saved, cost, before, after, lost in zip(
+                inputs.ticket_ids.tolist(), tokens_total, tokens_saved, cost_saved,
+                coverage_before, coverage_after, coverage_lost
+            )
+        )
+
+    return summary, per_ticket
@@ -1,28 +1,564 @@
-from fastapi import APIRouter, UploadFile, File
-from jobs.job_manager import create_job, complete_job, fail_job, get_job
-from pipeline import run_pipeline
+import mmap
+import os
+import time
+from typing import Callable, List, Optional
+import pandas as pd
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from functools import partial
+from jobs.job_manager import (
+    create_job, complete_job, fail_job, get_job, discard_job, start_job, cancel_job, mark_cancelling
+)
+from jobs.job_cancellation import (
+    CancellationToken, JobCancelled, cancellation_token, release_token, request_cancellation
+)
+from jobs.job_scheduler import JobRejected, scheduler
+from pipeline import run_pipeline, run_reclassification
+from ingest.ragas_loader import declared_size
 from api.dependencies import get_valid_job
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.datastructures import UploadFile
+from jobs.job_progress import (
+    JOB_QUEUED, TERMINAL_EVENTS, events_after, finished, forget, publish, wait_for_events
+)
+from models.api_models import (
+    TokenSavingsRequest, KeywordRole, SearchKind, ExportFormat,
+    TableQueryRequest, AggregateRequest, HistogramRequest
+)
+from export.columnar import FORMAT_MEDIA_TYPES, output_key, read_rows
+from export.table_query import TableQuery
+from export.downloads import ENCODINGS, etag_matches, file_etag, negotiate_encoding
+from settings import (
+    ROWS_PAGE_MAX, JOB_EVENTS_KEEPALIVE_SECONDS, JOB_PROGRESS_WAIT_MAX_SECONDS, UPLOAD_MMAP_MIN_BYTES
+)
+from export.search_index import search
+from analyze.keyword_index import ROLES, load_keyword_index
+from analyze.token_savings import SavingsInputs, simulate_policies
+from export.array_store import array_path, load_arrays
+from models.threshold_models import ClassificationThresholds
+from evaluate.job_comparison import compare_jobs
+from export.exporter import comparison_path, export_comparison, remove_job_files
+from utils import json_codec
 
 router = APIRouter()
 
-@router.post("/jobs")
-async def upload_ragas(file: UploadFile = File(...)):
-    job = create_job()
+def _run_job(job_id: str, cancel: CancellationToken, work: Callable[[], dict], raw_bytes=None) -> bool:
+    # Runs ``work`` (returning the job's outputs) when the scheduler picks
+    # the job; ``raw_bytes`` is the upload it reads, if any
     try:
-        outputs = run_pipeline(job.job_id, await file.read())
-        complete_job(job.job_id, outputs)
+        cancel.raise_if_cancelled()
+        start_job(job_id)
+        outputs = work()
+        complete_job(job_id, outputs)
+        return True
+    except JobCancelled:
+        remove_job_files(job_id)
+        cancel_job(job_id)
     except Exception as e:
-        fail_job(job.job_id, str(e))
-    return {"job_id": job.job_id, "status": job.status}
+        fail_job(job_id, str(e))
+    finally:
+        release_token(job_id)
+        _close_upload(raw_bytes)
+    return False
+
+def _rejected(e: JobRejected) -> HTTPException:
+    if e.retry_after is None:
+        return HTTPException(413, e.reason)
+    return HTTPException(
+        429,
+        {"reason": e.reason, "queue_position": e.queue_position, "retry_after": e.retry_after},
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+async def _read_upload(file: UploadFile):
+    """
+    The upload's content. Large uploads, which Starlette has already
+    spooled to a temporary file, are memory-mapped rather than read into
+    memory; the mapping stays valid after the request closes the file.
+    """
+    if (file.size or 0) < UPLOAD_MMAP_MIN_BYTES:
+        return await file.read()
+    file.file.flush()
+    return mmap.mmap(file.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _close_upload(raw_bytes):
+    # Unmaps a memory-mapped upload (and drops its file descriptor) now
+    # rather than whenever it is garbage collected
+    if isinstance(raw_bytes, mmap.mmap):
+        raw_bytes.close()
+
+def _limited_receive(receive, limit: int):
+    # Bodies sent without a Content-Length are cut off once they pass
+    # ``limit`` instead of being spooled in full
+    received = 0
+
+    async def limited():
+        nonlocal received
+        message = await receive()
+        received += len(message.get("body", b""))
+        if received > limit:
+            raise HTTPException(413, f"Upload exceeds the {limit} byte limit")
+        return message
+
+    return limited
+
+# The form is parsed by the handler itself, so describe it for the docs
+_UPLOAD_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+
+@router.post("/jobs", openapi_extra=_UPLOAD_SCHEMA)
+async def upload_ragas(request: Request):
+    """
+    Queue a RAGAS result upload (multipart field ``file``). The declared
+    Content-Length is checked against admission before the body is read;
+    FastAPI would parse an UploadFile parameter first, so the form is
+    parsed here, after the check.
+    """
+    try:
+        scheduler.check(int(request.headers.get("content-length") or 0))
+    except JobRejected as e:
+        raise _rejected(e)
+
+    body = Request(request.scope, _limited_receive(request.receive, scheduler.max_inflight_bytes))
+    form = await body.form()
+    try:
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(422, "Missing upload field 'file'")
+        raw_bytes = await _read_upload(file)
+    finally:
+        await form.close()
+
+    job = create_job(status="queued")
+    # Created before the job can start, so a DELETE racing its dispatch
+    # always finds a token to set
+    cancel = cancellation_token(job.job_id)
+    # Published first so it precedes the pipeline's own events
+    publish(job.job_id, JOB_QUEUED)
+    try:
+        # Runs when the scheduler picks it; follow it on /events or /progress
+        position = scheduler.submit(
+            job.job_id,
+            declared_size(raw_bytes),
+            partial(
+                _run_job, job.job_id, cancel, partial(run_pipeline, job.job_id, raw_bytes, cancel), raw_bytes
+            )
+        )
+    except JobRejected as e:
+        release_token(job.job_id)
+        discard_job(job.job_id)
+        forget(job.job_id)
+        _close_upload(raw_bytes)
+        raise _rejected(e)
+
+    return {"job_id": job.job_id, "status": job.status, "queue_position": position}
 
 @router.get("/jobs/{job_id}")
 def job_status(job_id: str):
     job = get_job(job_id)
-    return job
+    if job is None:
+        return job
+    return job.model_copy(update={"queue_position": scheduler.position(job_id)})
+
+@router.delete("/jobs/{job_id}")
+def delete_job(job_id: str):
+    """
+    Cancel a queued or running job. A queued job is dropped at once; a
+    running one stops at its next stage or ranking batch, abandoning the
+    in-flight LLM call, and its partial outputs are deleted.
+    """
+    job = get_valid_job(job_id)
+    if not mark_cancelling(job_id):
+        raise HTTPException(409, f"Job {job_id} has already {job.status}")
+
+    request_cancellation(job_id)
+    dropped = scheduler.cancel(job_id)
+    if dropped:
+        # Never started: run it now, and with its token set it only
+        # cleans up (outputs, token, upload) and records the cancellation
+        dropped()
+
+    # It may have finished before the token reached it
+    if job.status in ("completed", "failed"):
+        raise HTTPException(409, f"Job {job_id} has already {job.status}")
+    return {"job_id": job_id, "status": job.status}
+
+@router.get("/queue/stats")
+def queue_stats():
+    """
+    Running / queued jobs, in-flight input bytes against the limits, and
+    queue-wait and run-time percentiles of recent jobs.
+    """
+    return scheduler.stats()
+
+def _sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['kind']}\ndata: {json_codec.dumps_str(event)}\n\n"
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(
+    job_id: str,
+    after: int = Query(0, ge=0),
+    last_event_id: Optional[int] = Header(None)
+):
+    """
+    Server-sent events of a job's progress: stage started/completed,
+    batch progress with ETA, then job_completed or job_failed, after
+    which the stream ends. Reconnects resume from Last-Event-ID.
+    """
+    get_valid_job(job_id)
+    start = last_event_id if last_event_id is not None else after
+
+    async def stream():
+        last = start
+        yield "retry: 2000\n\n"
+        while True:
+            events = await wait_for_events(job_id, last, JOB_EVENTS_KEEPALIVE_SECONDS)
+            if not events:
+                if finished(job_id):
+                    # Resumed after the terminal event: nothing more to send
+                    return
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                yield _sse(event)
+            last = events[-1]["id"]
+            if events[-1]["kind"] in TERMINAL_EVENTS:
+                return
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/jobs/{job_id}/progress")
+async def job_progress(
+    job_id: str,
+    after: int = Query(0, ge=0),
+    wait: float = Query(0, ge=0)
+):
+    """
+    Long-poll fallback for /events: the job's events with id > ``after``,
+    waiting up to ``wait`` seconds for the first one.
+    """
+    job = get_valid_job(job_id)
+    if wait:
+        events = await wait_for_events(job_id, after, min(wait, JOB_PROGRESS_WAIT_MAX_SECONDS))
+    else:
+        events = events_after(job_id, after)
+    return {
+        "job_id": job_id,
+        "status": job.status,
+        "events": events,
+        "last_event_id": events[-1]["id"] if events else after,
+    }
+
+def _accepted_format(accept: str) -> str:
+    # First listed media type we can serve; anything else gets CSV
+    for media_type in accept.split(","):
+        media_type = media_type.split(";")[0].strip()
+        for fmt, served in FORMAT_MEDIA_TYPES.items():
+            if media_type == served:
+                return fmt
+    return "csv"
+
+def _file_response(
+    request: Request,
+    path: str,
+    filename: str,
+    media_type: Optional[str] = None
+):
+    """
+    Serve an output file with a strong ETag (304 on If-None-Match), its
+    pre-compressed gzip/zstd copy when accepted, and byte ranges.
+    """
+    encoding = negotiate_encoding(path, request.headers.get("accept-encoding", ""))
+    served = path + ENCODINGS[encoding] if encoding else path
+    headers = {
+        "ETag": file_etag(served),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    # FileResponse answers Range / If-Range against the ETag set here
+    return FileResponse(served, filename=filename, media_type=media_type, headers=headers)
+
+def _output_path(job, output_type: str, fmt: str) -> str:
+    path = (job.outputs or {}).get(output_key(output_type, fmt))
+    if not path:
+        raise HTTPException(404, f"No {fmt} output '{output_type}' for this job")
+    return path
 
 @router.get("/jobs/{job_id}/download/{output_type}")
-def download(job_id: str, output_type: str):
+def download(
+    job_id: str,
+    output_type: str,
+    request: Request,
+    format: Optional[ExportFormat] = None
+):
+    job = get_valid_job(job_id)
+    fmt = format or _accepted_format(request.headers.get("accept", ""))
+    path = _output_path(job, output_type, fmt)
+    extension = os.path.splitext(path)[1]
+    return _file_response(
+        request,
+        path,
+        filename=f"{output_type}{extension}",
+        media_type=FORMAT_MEDIA_TYPES.get(extension[1:])
+    )
+
+@router.get("/jobs/{job_id}/summary")
+def dashboard_summary(job_id: str, request: Request):
+    """
+    Precomputed dashboard overview (KPIs, coverage distributions,
+    per-ticket coverage means), cacheable like any download.
+    """
+    job = get_valid_job(job_id)
+    path = (job.outputs or {}).get("dashboard_summary")
+    if not path:
+        raise HTTPException(404, "No dashboard summary stored for this job")
+    return _file_response(request, path, filename="dashboard_summary.json", media_type="application/json")
+
+@router.get("/jobs/{job_id}/rows/{output_type}")
+def output_rows(
+    job_id: str,
+    output_type: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=ROWS_PAGE_MAX),
+    columns: Optional[List[str]] = Query(None)
+):
+    """
+    One page of a tabular output as JSON, read from its Parquet copy
+    (only the row groups and columns the page needs) when there is one.
+    """
     job = get_valid_job(job_id)
-    path = job.outputs.get(output_type)
-    return FileResponse(path, filename=f"{output_type}.csv")
+    outputs = job.outputs or {}
+
+    if output_key(output_type, "parquet") in outputs:
+        path = outputs[output_key(output_type, "parquet")]
+        available = read_rows(path, 0, 0)[1].column_names
+        _check_columns(columns, available)
+        total, page = read_rows(path, offset, limit, columns)
+        rows = page.to_pylist()
+    else:
+        path = _output_path(job, output_type, "csv")
+        if not path.endswith(".csv"):
+            raise HTTPException(400, f"Output '{output_type}' is not a table")
+        df = pd.read_csv(path)
+        _check_columns(columns, list(df.columns))
+        total = len(df)
+        page = df.iloc[offset:offset + limit]
+        rows = json_codec.loads(page[columns or list(df.columns)].to_json(orient="records"))
+
+    return {
+        "job_id": job_id,
+        "output_type": output_type,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "rows": rows,
+    }
+
+def _check_columns(columns: Optional[List[str]], available: List[str]):
+    unknown = sorted(set(columns or []) - set(available))
+    if unknown:
+        raise HTTPException(400, f"Unknown columns: {', '.join(unknown)}")
+
+@router.post("/jobs/{job_id}/token-savings")
+def token_savings(job_id: str, request: TokenSavingsRequest):
+    get_valid_job(job_id)
+    try:
+        inputs = SavingsInputs.from_arrays(load_arrays(job_id, "savings_inputs"))
+    except FileNotFoundError:
+        raise HTTPException(404, "No token-savings inputs stored for this job")
+
+    try:
+        summary, per_ticket = simulate_policies(
+            inputs, request.policies, include_tickets=request.include_tickets
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    return {"job_id": job_id, "policies": summary, "tickets": per_ticket}
+
+def _completed_job(job_id: str):
+    job = get_valid_job(job_id)
+    if job.status != "completed":
+        raise HTTPException(409, f"Job {job_id} has not completed")
+    return job
+
+def _reclassify(job_id: str, parent_job_id: str, parent_outputs: dict, thresholds, cancel) -> dict:
+    return run_reclassification(job_id, parent_job_id, parent_outputs, thresholds, cancel)[0]
+
+@router.post("/jobs/{job_id}/reclassify")
+def reclassify_job(job_id: str, thresholds: ClassificationThresholds):
+    """
+    Queue a what-if run of a finished job under new thresholds. Like an
+    upload it goes through the scheduler and reports progress on
+    /events; the new categories and counts are in its dashboard summary.
+    """
+    parent = _completed_job(job_id)
+    if not os.path.exists(array_path(job_id, "classification_inputs")):
+        raise HTTPException(404, "No classification inputs stored for this job")
+
+    # Both BI tables are rewritten, so they are the job's input size
+    size = sum(os.path.getsize(parent.outputs[name]) for name in ("ragas_bi", "context_bi"))
+
+    job = create_job(parent_job_id=job_id, status="queued")
+    cancel = cancellation_token(job.job_id)
+    publish(job.job_id, JOB_QUEUED)
+    try:
+        position = scheduler.submit(
+            job.job_id,
+            size,
+            partial(
+                _run_job, job.job_id, cancel,
+                partial(_reclassify, job.job_id, job_id, parent.outputs, thresholds, cancel)
+            )
+        )
+    except JobRejected as e:
+        release_token(job.job_id)
+        discard_job(job.job_id)
+        forget(job.job_id)
+        raise _rejected(e)
+
+    return {
+        "job_id": job.job_id,
+        "parent_job_id": job_id,
+        "status": job.status,
+        "thresholds": thresholds,
+        "queue_position": position,
+    }
+
+def _run_comparison(job_id: str, other_job_id: str):
+    baseline = _completed_job(job_id)
+    candidate = _completed_job(other_job_id)
+    return compare_jobs(baseline.outputs["ragas_bi"], candidate.outputs["ragas_bi"])
+
+@router.get("/jobs/{job_id}/compare/{other_job_id}")
+def compare(job_id: str, other_job_id: str):
+    comparison = _run_comparison(job_id, other_job_id)
+    return {
+        "baseline_job_id": job_id,
+        "candidate_job_id": other_job_id,
+        **comparison.summary,
+        "timings": comparison.timings,
+        "download": f"/api/jobs/{job_id}/compare/{other_job_id}/download",
+    }
+
+@router.get("/jobs/{job_id}/compare/{other_job_id}/download")
+def download_comparison(job_id: str, other_job_id: str, request: Request):
+    # Finished jobs never change, so a stored comparison is still current
+    _completed_job(job_id)
+    _completed_job(other_job_id)
+    path = comparison_path(job_id, other_job_id)
+    if not os.path.exists(path):
+        path = export_comparison(job_id, other_job_id, _run_comparison(job_id, other_job_id).diff)
+    return _file_response(request, path, filename=f"comparison_{job_id}_vs_{other_job_id}.csv")
+
+def _source_job_id(job) -> str:
+    # Reclassified jobs share their root job's keyword data
+    while job.parent_job_id:
+        job = get_valid_job(job.parent_job_id)
+    return job.job_id
+
+def _keyword_index(job_id: str):
+    job = _completed_job(job_id)
+    try:
+        return load_keyword_index(_source_job_id(job))
+    except FileNotFoundError:
+        raise HTTPException(404, "No keyword index stored for this job")
+
+@router.get("/jobs/{job_id}/keywords/{keyword}")
+def keyword_postings(
+    job_id: str,
+    keyword: str,
+    role: Optional[List[KeywordRole]] = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=10000)
+):
+    index = _keyword_index(job_id)
+    keyword = keyword.strip().lower()
+    return {
+        "job_id": job_id,
+        "keyword": keyword,
+        "roles": index.lookup(keyword, role or ROLES, offset=offset, limit=limit),
+    }
+
+@router.get("/jobs/{job_id}/missing-keywords")
+def missing_keywords(
+    job_id: str,
+    role: KeywordRole = "missing_context",
+    top: int = Query(20, ge=1, le=1000)
+):
+    index = _keyword_index(job_id)
+    return {"job_id": job_id, "role": role, "keywords": index.top_keywords(role, top)}
+
+@router.get("/jobs/{job_id}/search")
+def search_job(
+    job_id: str,
+    q: str,
+    kind: Optional[List[SearchKind]] = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=200)
+):
+    job = _completed_job(job_id)
+    path = job.outputs.get("search_index")
+    if not path or not os.path.exists(path):
+        raise HTTPException(404, "No search index stored for this job")
+
+    start = time.perf_counter()
+    result = search(path, q, kinds=kind, offset=offset, limit=limit)
+    return {
+        "job_id": job_id,
+        "query": q,
+        "offset": offset,
+        "limit": limit,
+        **result,
+        "took_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+def _table_query(job_id: str, output_type: str) -> TableQuery:
+    job = get_valid_job(job_id)
+    return TableQuery(_output_path(job, output_type, "parquet"))
+
+@router.post("/jobs/{job_id}/query/{output_type}")
+def query_table(job_id: str, output_type: str, request: TableQueryRequest):
+    table = _table_query(job_id, output_type)
+    try:
+        return table.rows(request)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+@router.post("/jobs/{job_id}/aggregate/{output_type}")
+def aggregate_table(job_id: str, output_type: str, request: AggregateRequest):
+    table = _table_query(job_id, output_type)
+    try:
+        return table.aggregate(request)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+@router.post("/jobs/{job_id}/histogram/{output_type}")
+def histogram_table(job_id: str, output_type: str, request: HistogramRequest):
+    table = _table_query(job_id, output_type)
+    try:
+        return table.histogram(request)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
@@ -0,0 +1,279 @@
+"""
+Offline batch runs of the pipeline over files of RAGAS results, without
+the HTTP API.
+
+Run from backend/:  python -m batch evals/ "archive/**/*.json.zst" --out results/
+
+Inputs are files, directories (their RAGAS files) or glob patterns, in
+any format the upload accepts. Files run in parallel on worker processes
+that share one budget of concurrent Bedrock calls. Outputs go to --out
+as ``{name}_{hash}_*`` files, and inputs whose content hash is already
+in the run manifest there are skipped.
+"""
+import argparse
+import contextlib
+import glob
+import hashlib
+import io
+import logging
+import mmap
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+from export.columnar import COLUMNAR_FORMATS
+from settings import EXPORT_FORMATS, LLM_MAX_CONCURRENCY
+from utils import json_codec
+
+INPUT_SUFFIXES = (".json", ".ndjson", ".jsonl", ".gz", ".zst")
+MANIFEST = "batch_manifest.json"
+
+_HASH_CHUNK = 1024 * 1024
+
+
+# --- Inputs ---
+
+def find_inputs(patterns: List[str]) -> List[str]:
+    """Files named by ``patterns`` (files, directories or globs), deduplicated."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(
+                os.path.join(pattern, name) for name in sorted(os.listdir(pattern))
+                if name.endswith(INPUT_SUFFIXES)
+            )
+        elif os.path.isfile(pattern):
+            paths.append(pattern)
+        else:
+            paths.extend(sorted(glob.glob(pattern, recursive=True)))
+
+    seen = set()
+    unique = []
+    for path in paths:
+        real = os.path.realpath(path)
+        if os.path.isfile(real) and real not in seen:
+            seen.add(real)
+            unique.append(path)
+    return unique
+
+
+def content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def job_name(path: str, digest: str) -> str:
+    stem = os.path.basename(path).split(".")[0] or "input"
+    stem = "".join(c if c.isalnum() or c in "-_" else "_" for c in stem)
+    return f"{stem}_{digest[:12]}"
+
+
+# --- Manifest of finished inputs, keyed by content hash ---
+
+def load_manifest(out_dir: str) -> Dict[str, dict]:
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        return json_codec.loads(f.read())
+
+
+def save_manifest(out_dir: str, manifest: Dict[str, dict]):
+    # Written after every file, so an interrupted run resumes where it stopped
+    path = os.path.join(out_dir, MANIFEST)
+    with open(path + ".tmp", "wb") as f:
+        f.write(json_codec.dumps(manifest, indent=True))
+    os.replace(path + ".tmp", path)
+
+
+def _already_processed(entry: dict) -> bool:
+    return bool(entry) and all(os.path.exists(p) for p in entry.get("outputs", {}).values())
+
+
+# --- Workers ---
+
+def _init_worker(llm_slots, verbose: bool):
+    if not verbose:
+        logging.disable(logging.INFO)
+
+    from analyze import llm_ranker
+    llm_ranker.use_llm_slots(llm_slots)
+
+
+def _run_file(path: str, job_id: str, verbose: bool) -> dict:
+    from export.exporter import load_artifact, remove_job_files
+    from jobs.job_progress import STAGE_COMPLETED, events_after, forget
+    from pipeline import run_pipeline
+
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        raw = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b""
+
+    # The pipeline prints a line per stage; the summary reports them instead
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with quiet:
+            outputs = run_pipeline(job_id, raw)
+    except BaseException:
+        # No partial outputs left behind for a file that failed
+        remove_job_files(job_id)
+        forget(job_id)
+        raise
+    finally:
+        if isinstance(raw, mmap.mmap):
+            raw.close()
+
+    stage_seconds = {
+        e["stage"]: e["elapsed_seconds"] for e in events_after(job_id) if e["kind"] == STAGE_COMPLETED
+    }
+    forget(job_id)
+    return {
+        "outputs": outputs,
+        "stage_seconds": stage_seconds,
+        "peak_rss_bytes": load_artifact(outputs["memory_report"])["peak_rss_bytes"],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+# --- Reporting ---
+
+def _mb(size: int) -> str:
+    return f"{size / 1024 ** 2:,.1f} MB"
+
+
+def _print_file(path: str, size: int, result: dict, top: int = 5):
+    print(f"✓ {path}  {_mb(size)}  {result['seconds']:.1f}s  peak RSS {_mb(result['peak_rss_bytes'])}")
+    # The slowest stages; the summary has all of them
+    stages = sorted(result["stage_seconds"].items(), key=lambda s: -(s[1] or 0))[:top]
+    print("    " + ", ".join(f"{stage} {seconds or 0:.2f}s" for stage, seconds in stages))
+
+
+def _print_summary(done: List[dict], skipped: int, duplicates: int, failed: int, elapsed: float):
+    total_bytes = sum(d["bytes"] for d in done)
+    print()
+    print(
+        f"processed {len(done)}, skipped {skipped}, duplicate inputs {duplicates}, "
+        f"failed {failed} in {elapsed:.1f}s"
+    )
+    if not done or elapsed <= 0:
+        return
+    print(
+        f"throughput: {_mb(total_bytes / elapsed)}/s, "
+        f"{len(done) / elapsed * 60:.1f} files/min ({_mb(total_bytes)} in total)"
+    )
+
+    # Where the time went, summed over files
+    totals: Dict[str, float] = {}
+    for d in done:
+        for stage, seconds in d["stage_seconds"].items():
+            totals[stage] = totals.get(stage, 0.0) + (seconds or 0.0)
+    busy = sum(totals.values()) or 1.0
+    print("stage time across files:")
+    for stage, seconds in sorted(totals.items(), key=lambda s: -s[1]):
+        print(f"    {stage:<28} {seconds:9.2f}s  {seconds / busy:6.1%}")
+
+
+# --- Entry point ---
+
+def _parse_formats(value: str) -> List[str]:
+    # CSV is always written; the rest are the columnar formats next to it
+    formats = [f.strip() for f in value.split(",") if f.strip() and f.strip() != "csv"]
+    unknown = [f for f in formats if f not in COLUMNAR_FORMATS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown format(s): {', '.join(unknown)}")
+    return formats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m batch", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("inputs", nargs="+", help="Input files, directories or glob patterns")
+    parser.add_argument("--out", required=True, help="Directory for outputs and the run manifest")
+    parser.add_argument(
+        "--formats", type=_parse_formats, default=EXPORT_FORMATS,
+        help="Formats written next to the CSVs: parquet, arrow, or csv for CSV only "
+             f"(default: {','.join(EXPORT_FORMATS) or 'csv'})"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=min(4, os.cpu_count() or 1), help="Files processed at once (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--llm-concurrency", type=int, default=LLM_MAX_CONCURRENCY,
+        help="Bedrock calls in flight across all workers (default: %(default)s)"
+    )
+    parser.add_argument("--force", action="store_true", help="Reprocess inputs already in the manifest")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own logs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    os.makedirs(args.out, exist_ok=True)
+
+    paths = find_inputs(args.inputs)
+    if not paths:
+        print("No input files found", file=sys.stderr)
+        return 1
+
+    manifest = load_manifest(args.out)
+    pending = {}
+    skipped = duplicates = 0
+    for path in paths:
+        digest = content_hash(path)
+        if digest in pending:
+            # Same content as another input of this run, which covers it
+            duplicates += 1
+            print(f"- {path}  same content as {pending[digest]}")
+            continue
+        if not args.force and _already_processed(manifest.get(digest)):
+            skipped += 1
+            print(f"- {path}  already processed")
+            continue
+        pending[digest] = path
+
+    # Largest first, so one big file does not run alone at the end
+    order = sorted(pending.items(), key=lambda item: -os.path.getsize(item[1]))
+
+    done, failed = [], 0
+    started = time.perf_counter()
+    # Fresh (spawned) workers read their settings from the environment
+    os.environ["OUTPUT_DIR"] = os.path.abspath(args.out)
+    os.environ["EXPORT_FORMATS"] = ",".join(args.formats)
+    context = multiprocessing.get_context("spawn")
+    llm_slots = context.BoundedSemaphore(max(1, args.llm_concurrency))
+    with ProcessPoolExecutor(
+        max_workers=max(1, args.workers),
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(llm_slots, args.verbose)
+    ) as pool:
+        futures = {
+            pool.submit(_run_file, path, job_name(path, digest), args.verbose): (digest, path)
+            for digest, path in order
+        }
+        for future in as_completed(futures):
+            digest, path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"✗ {path}  {type(e).__name__}: {e}", file=sys.stderr)
+                continue
+
+            entry = {"source": path, "bytes": os.path.getsize(path), "completed_at": time.time(), **result}
+            manifest[digest] = entry
+            save_manifest(args.out, manifest)
+            done.append(entry)
+            _print_file(path, entry["bytes"], result)
+
+    _print_summary(done, skipped, duplicates, failed, time.perf_counter() - started)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
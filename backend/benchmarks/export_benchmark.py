@@ -0,0 +1,98 @@
+"""
+Bytes on disk and load time of a Context BI-shaped table as CSV, Parquet
+and Arrow IPC.
+
+Run from backend/:  python -m benchmarks.export_benchmark
+"""
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from export.columnar import ColumnarWriter, iter_tables, ticket_batches
+from flatten.context_bi_flattener import CONTEXT_BI_CATEGORIES, CONTEXT_BI_TYPES
+from settings import EXPORT_BATCH_SIZE
+
+WORDS = (
+    "customer order list filter save wise system sales contract epa field "
+    "item import duty fta eligibility register master information session "
+    "客户订单 保存筛选 系统登录 销售合同 进口关税"
+).split()
+REASONS = ["Relevant to question", "Not relevant"]
+
+
+def build_table(tickets: int = 20000, contexts_per_ticket: int = 10, seed: int = 7) -> pd.DataFrame:
+    rng = random.Random(seed)
+    rows = []
+    for t in range(tickets):
+        ticket_id = f"T{t:07d}"
+        for c in range(contexts_per_ticket):
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120)))
+            useful = rng.random() < 0.5
+            rows.append({
+                "ticket_id": ticket_id,
+                "context_id": f"{ticket_id}_ctx_{c}",
+                "context_text": text,
+                "context_token_count": len(text.split()),
+                "duplicate_cluster_id": f"dup_{rng.randrange(tickets)}",
+                "context_keywords": sorted(set(rng.sample(WORDS, rng.randint(0, 12)))),
+                "question_keywords": sorted(set(rng.sample(WORDS, rng.randint(0, 6)))),
+                "question_keyword_coverage_pct": round(rng.random() * 100, 2),
+                "question_bm25": rng.random() * 20,
+                "entity_match": rng.random() < 0.3,
+                "is_context_useful": useful,
+                "usefulness_reason": REASONS[0] if useful else REASONS[1],
+                "drop_recommendation": not useful,
+                "rank": c + 1,
+            })
+    return pd.DataFrame(rows)
+
+
+def _write_columnar(df: pd.DataFrame, fmt: str, path: str) -> None:
+    writer = ColumnarWriter({fmt: path}, CONTEXT_BI_CATEGORIES, CONTEXT_BI_TYPES)
+    for offset, length in ticket_batches(df["ticket_id"].to_numpy(), EXPORT_BATCH_SIZE):
+        writer.write(df.iloc[offset:offset + length])
+    writer.close()
+
+
+def _time(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    df = build_table()
+    print(f"table: {len(df):,} rows, {len(df.columns)} columns")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {fmt: os.path.join(tmp, f"context_bi.{fmt}") for fmt in ("csv", "parquet", "arrow")}
+        write_seconds = {
+            "csv": _time(lambda: df.to_csv(paths["csv"], index=False)),
+            "parquet": _time(lambda: _write_columnar(df, "parquet", paths["parquet"])),
+            "arrow": _time(lambda: _write_columnar(df, "arrow", paths["arrow"])),
+        }
+        loaders = {
+            "csv": lambda: pd.read_csv(paths["csv"]),
+            "parquet": lambda: pd.read_parquet(paths["parquet"]),
+            "arrow": lambda: pa.concat_tables(iter_tables(paths["arrow"], "arrow")).to_pandas(),
+        }
+
+        print(f"{'format':<10} {'bytes':>14} {'write':>9} {'load':>9}")
+        for fmt, path in paths.items():
+            load = _time(loaders[fmt])
+            print(f"{fmt:<10} {os.path.getsize(path):>14,} {write_seconds[fmt]:8.3f}s {load:8.3f}s")
+
+        # One ticket: row-group statistics skip everything but its group
+        ticket = df["ticket_id"].iloc[len(df) // 2]
+        elapsed = _time(lambda: pq.read_table(paths["parquet"], filters=[("ticket_id", "=", ticket)]))
+        groups = pq.ParquetFile(paths["parquet"]).num_row_groups
+        print(f"parquet single-ticket read: {elapsed:.3f}s ({groups} row groups)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Upload parsing throughput (MB/s) of a RAGAS JSON document: the stdlib
+json.loads the loader used before, and load_ragas on bytes and on a
+memory-mapped file with the json_codec backend; then the same results
+as NDJSON.
+
+Run from backend/:  python -m benchmarks.ingest_benchmark
+"""
+import json
+import mmap
+import random
+import tempfile
+import time
+
+from ingest.ragas_loader import load_ragas
+from utils import json_codec
+
+WORDS = (
+    "customer order list filter save wise system sales contract epa field "
+    "item import duty fta eligibility register master information session "
+    "客户订单 保存筛选 系统登录 销售合同 进口关税"
+).split()
+METRICS = [
+    "context_entity_recall", "context_precision", "context_recall", "answer_correctness",
+    "answer_similarity", "answer_relevancy", "faithfulness",
+]
+
+
+def build_document(tickets: int = 5000, contexts_per_ticket: int = 5, seed: int = 7) -> bytes:
+    rng = random.Random(seed)
+
+    def text(low: int, high: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+    results = []
+    for _ in range(tickets):
+        record = {"question": text(10, 40), "ground_truth": text(60, 200), "rag answer": text(10, 60)}
+        record.update({name: rng.random() for name in METRICS})
+        record["contexts"] = [text(40, 120) for _ in range(contexts_per_ticket)]
+        results.append(record)
+
+    aggregated = {name: 0.5 for name in METRICS}
+    return json.dumps([{"aggregated_scores": aggregated, "detailed_results": results}]).encode("utf-8")
+
+
+def _run(label: str, fn, size: int, repeat: int = 3) -> None:
+    best = min(_time(fn) for _ in range(repeat))
+    print(f"{label:<32} {best:7.3f}s  {size / best / 1024 ** 2:8.1f} MB/s")
+
+
+def _time(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    raw = build_document()
+    print(f"document: {len(raw) / 1024 ** 2:.1f} MB, codec backend: {json_codec.BACKEND}")
+
+    _run("stdlib json.loads (before)", lambda: json.loads(raw), len(raw))
+    _run("load_ragas (bytes)", lambda: load_ragas(raw), len(raw))
+
+    with tempfile.TemporaryFile() as f:
+        f.write(raw)
+        f.flush()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            _run("load_ragas (memory-mapped)", lambda: load_ragas(mapped), len(raw))
+
+    document = json_codec.loads(raw)[0]
+    ndjson = b"".join(
+        json_codec.dumps(line) + b"\n"
+        for line in [{"aggregated_scores": document["aggregated_scores"]}, *document["detailed_results"]]
+    )
+    _run("load_ragas (NDJSON)", lambda: load_ragas(ndjson), len(ndjson))
+
+
+if __name__ == "__main__":
+    main()
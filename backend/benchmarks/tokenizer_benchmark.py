@@ -0,0 +1,63 @@
+"""
+Tokenizer throughput on a mixed English / Chinese corpus.
+
+Run from backend/:  python -m benchmarks.tokenizer_benchmark
+"""
+import random
+import re
+import time
+
+from utils.text_utils import tokenize
+
+EN_WORDS = (
+    "customer order list filter save wise system sales contract epa field "
+    "item import duty fta eligibility register master information session"
+).split()
+ZH_PHRASES = ["客户订单列表", "保存筛选", "系统登录", "销售合同", "进口关税", "主数据信息"]
+
+
+def _legacy_tokenize(text: str) -> set:
+    words = re.findall(r"[a-zA-Z0-9_]+", text.lower())
+    return {w for w in words if len(w) > 2}
+
+
+def _legacy_count(text: str) -> int:
+    return len(text.split())
+
+
+def build_corpus(docs: int = 20000, repeat_ratio: float = 0.3, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(docs):
+        if corpus and rng.random() < repeat_ratio:
+            corpus.append(rng.choice(corpus))
+            continue
+        parts = [
+            rng.choice(ZH_PHRASES) if rng.random() < 0.3 else rng.choice(EN_WORDS)
+            for _ in range(rng.randint(40, 200))
+        ]
+        corpus.append(" ".join(parts))
+    return corpus
+
+
+def _run(label: str, fn, corpus: list) -> None:
+    start = time.perf_counter()
+    tokens = sum(fn(text) for text in corpus)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {tokens:>10} tokens  {elapsed:7.3f}s  {tokens / elapsed:>12,.0f} tok/s")
+
+
+def main() -> None:
+    corpus = build_corpus()
+    print(f"corpus: {len(corpus)} docs, {sum(map(len, corpus)):,} chars")
+
+    _run("legacy (keywords + count)", lambda t: len(_legacy_tokenize(t)) and _legacy_count(t), corpus)
+
+    tokenize.cache_clear()
+    _run("tokenize (cold cache)", lambda t: tokenize(t).token_count, corpus)
+    _run("tokenize (warm cache)", lambda t: tokenize(t).token_count, corpus)
+    print(tokenize.cache_info())
+
+
+if __name__ == "__main__":
+    main()
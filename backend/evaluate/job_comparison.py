@@ -0,0 +1,135 @@
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from evaluate.metric_evaluator import _round
+from evaluate.resolution_classifier import METRIC_NAMES
+from utils.stats import bootstrap_mean_ci
+from utils.text_utils import question_hash
+from utils.timing import StageTimer
+
+# Per-question numeric columns compared between runs
+COMPARED_COLUMNS = METRIC_NAMES + ["context_count", "context_token_count"]
+
+_READ_COLUMNS = {"ticket_id", "question_hash", "question", "resolution_category", *COMPARED_COLUMNS}
+
+
+@dataclass
+class JobComparison:
+    """
+    Per-question diff (one row per question of either run) and the
+    aggregate paired statistics over questions present in both.
+    """
+
+    diff: pd.DataFrame
+    summary: Dict
+    timings: Dict[str, float]
+
+
+def _load_questions(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path, usecols=lambda c: c in _READ_COLUMNS)
+    df["question"] = df["question"].fillna("")
+
+    # Jobs exported before question hashes existed
+    if "question_hash" not in df:
+        df["question_hash"] = df["question"].map(question_hash)
+    if "context_token_count" not in df:
+        df["context_token_count"] = np.nan
+
+    # Repeated questions pair up by occurrence order instead of cross-joining
+    df["occurrence"] = df.groupby("question_hash").cumcount()
+    return df
+
+
+def _column_order(metric_columns: List[str]) -> List[str]:
+    columns = [
+        "question_hash", "occurrence", "status",
+        "ticket_id_baseline", "ticket_id_candidate", "question",
+        "resolution_category_baseline", "resolution_category_candidate", "category_changed",
+    ]
+    for name in metric_columns:
+        columns += [f"{name}_baseline", f"{name}_candidate", f"{name}_delta"]
+    return columns
+
+
+def compare_jobs(baseline_path: str, candidate_path: str) -> JobComparison:
+    """
+    Join two RAGAS BI tables on question hash and compute deltas,
+    category transitions and bootstrap CIs of the mean paired deltas.
+    """
+
+    timer = StageTimer("comparison")
+
+    with timer.stage("load"):
+        baseline = _load_questions(baseline_path)
+        candidate = _load_questions(candidate_path)
+
+    with timer.stage("hash_join"):
+        diff = baseline.merge(
+            candidate,
+            on=["question_hash", "occurrence"],
+            how="outer",
+            suffixes=("_baseline", "_candidate"),
+            indicator=True
+        )
+        diff["status"] = diff.pop("_merge").map(
+            {"both": "matched", "left_only": "removed", "right_only": "added"}
+        ).astype(str)
+        diff["question"] = diff.pop("question_baseline").fillna(diff.pop("question_candidate"))
+
+    with timer.stage("deltas"):
+        for name in COMPARED_COLUMNS:
+            diff[f"{name}_delta"] = diff[f"{name}_candidate"] - diff[f"{name}_baseline"]
+
+        matched = (diff["status"] == "matched").to_numpy()
+        diff["category_changed"] = matched & (
+            diff["resolution_category_baseline"] != diff["resolution_category_candidate"]
+        )
+        diff = diff[_column_order(COMPARED_COLUMNS)]
+
+    with timer.stage("paired_stats"):
+        pairs = diff[matched]
+        deltas = pairs[[f"{name}_delta" for name in COMPARED_COLUMNS]].to_numpy(dtype=np.float64)
+
+        metrics = []
+        for j, name in enumerate(COMPARED_COLUMNS):
+            delta = deltas[:, j]
+            # Columns missing from older exports are NaN and get no CI
+            (mean,), (low,), (high,) = bootstrap_mean_ci(delta[~np.isnan(delta)])
+            metrics.append({
+                "metric": name,
+                "baseline_mean": _round(pairs[f"{name}_baseline"].mean()),
+                "candidate_mean": _round(pairs[f"{name}_candidate"].mean()),
+                "mean_delta": _round(mean),
+                "ci_low": _round(low),
+                "ci_high": _round(high),
+                "improved": int((delta > 0).sum()),
+                "regressed": int((delta < 0).sum()),
+                "unchanged": int((delta == 0).sum()),
+            })
+
+        transitions = (
+            pairs.groupby(["resolution_category_baseline", "resolution_category_candidate"])
+            .size()
+            .reset_index(name="count")
+            .rename(columns={
+                "resolution_category_baseline": "from",
+                "resolution_category_candidate": "to"
+            })
+        )
+
+    status_counts = diff["status"].value_counts()
+    summary = {
+        "baseline_questions": len(baseline),
+        "candidate_questions": len(candidate),
+        "matched_questions": int(status_counts.get("matched", 0)),
+        "added_questions": int(status_counts.get("added", 0)),
+        "removed_questions": int(status_counts.get("removed", 0)),
+        "categories_changed": int(diff["category_changed"].sum()),
+        "metrics": metrics,
+        "category_transitions": transitions.to_dict(orient="records"),
+    }
+
+    return JobComparison(diff=diff, summary=summary, timings=timer.timings)
@@ -1,7 +1,103 @@
+from typing import Dict, Optional
+
+import numpy as np
+
 from models.ragas_models import NormalizedRagasResult
+from evaluate.resolution_classifier import METRIC_NAMES, metric_arrays
+from utils.stats import bootstrap_mean_ci, unit_histograms
+from settings import METRIC_HISTOGRAM_BINS
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def _round(value) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def summarize_metrics(
+    metrics: Dict[str, np.ndarray],
+    categories: np.ndarray,
+    aggregated_scores: Optional[Dict[str, float]] = None
+) -> Dict:
+    """
+    Job-level statistics over per-record metric columns: distributions,
+    bootstrap CIs of the means, correlations and per-category means.
+    Reported RAGAS aggregates, when present, are checked against the
+    recomputed means.
+    """
+
+    aggregated_scores = aggregated_scores or {}
+    X = np.column_stack([metrics[name] for name in METRIC_NAMES]).astype(np.float64)
+    n, k = X.shape
+
+    summary = {
+        "record_count": n,
+        "reported_aggregates": aggregated_scores,
+        "metrics": {},
+        "correlation": {"metrics": METRIC_NAMES, "matrix": []},
+        "categories": {},
+    }
+    if n == 0:
+        return summary
+
+    # --- Distributions (all metrics at once) ---
+    mean, ci_low, ci_high = bootstrap_mean_ci(X)
+    std = X.std(axis=0)
+    minimum, maximum = X.min(axis=0), X.max(axis=0)
+    percentiles = np.percentile(X, PERCENTILES, axis=0)
+    histograms = unit_histograms(X, METRIC_HISTOGRAM_BINS)
+    edges = np.linspace(0, 1, METRIC_HISTOGRAM_BINS + 1).round(4).tolist()
+
+    for j, name in enumerate(METRIC_NAMES):
+        reported = aggregated_scores.get(name)
+        summary["metrics"][name] = {
+            "mean": _round(mean[j]),
+            "ci_low": _round(ci_low[j]),
+            "ci_high": _round(ci_high[j]),
+            "std": _round(std[j]),
+            "min": _round(minimum[j]),
+            "max": _round(maximum[j]),
+            "percentiles": {f"p{p}": _round(percentiles[i, j]) for i, p in enumerate(PERCENTILES)},
+            "histogram": {"edges": edges, "counts": histograms[j].tolist()},
+            "reported_mean": reported,
+            "reported_mean_delta": _round(mean[j] - reported) if reported is not None else None,
+        }
+
+    # --- Correlations (constant metrics have none) ---
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.corrcoef(X, rowvar=False) if n > 1 else np.full((k, k), np.nan)
+    summary["correlation"]["matrix"] = [[_round(v) for v in row] for row in corr]
+
+    # --- Per-category breakdown ---
+    labels, inverse = np.unique(categories, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(labels))
+    sums = np.column_stack([
+        np.bincount(inverse, weights=X[:, j], minlength=len(labels)) for j in range(k)
+    ])
+    means = sums / counts[:, None]
+
+    for c, label in enumerate(labels.tolist()):
+        summary["categories"][label] = {
+            "count": int(counts[c]),
+            "share": _round(counts[c] / n),
+            "means": {name: _round(means[c, j]) for j, name in enumerate(METRIC_NAMES)},
+        }
 
-# metric_evaluator.py
-def evaluate_metrics(_):
-    return {}
+    return summary
 
 
+def evaluate_metrics(
+    normalized: NormalizedRagasResult,
+    resolution: Dict[str, Dict]
+) -> Dict:
+    """
+    Job-level metric statistics for a normalized run, broken down by the
+    resolution categories assigned per question.
+    """
+    categories = np.asarray(
+        [resolution[r.ticket_id]["resolution_category"] for r in normalized.records],
+        dtype=str
+    )
+    return summarize_metrics(
+        metric_arrays(normalized), categories, normalized.aggregated_scores
+    )
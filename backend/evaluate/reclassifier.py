@@ -0,0 +1,101 @@
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+
+from models.threshold_models import ClassificationThresholds
+from analyze.keyword_coverage import KeywordCoverage
+from analyze.relevance_scorer import RelevanceScores
+from analyze.context_analyzer import context_flags
+from evaluate.resolution_classifier import METRIC_NAMES, classify_arrays
+
+
+@dataclass
+class Reclassification:
+    """
+    Outcome of classifying a job under one threshold config. Question
+    arrays are in record order, context arrays in context order.
+    """
+
+    resolution_category: np.ndarray
+    resolution_confidence: np.ndarray
+    needs_manual_review: np.ndarray
+    useful_context_count: np.ndarray
+    dropped_context_count: np.ndarray
+
+    entity_match: np.ndarray
+    is_context_useful: np.ndarray
+    drop_recommendation: np.ndarray
+
+    def category_counts(self) -> Dict[str, int]:
+        labels, counts = np.unique(self.resolution_category, return_counts=True)
+        return {str(k): int(v) for k, v in zip(labels, counts)}
+
+
+def build_classification_inputs(
+    metrics: Dict[str, np.ndarray],
+    coverage: KeywordCoverage,
+    relevance: RelevanceScores
+) -> Dict[str, np.ndarray]:
+    """
+    Everything the classifier and usefulness rules read, as flat columns.
+    Stored per job so thresholds can be changed without re-running the
+    pipeline. Keyword overlaps are kept as counts, not keyword lists;
+    metrics (metric_arrays) stay float64 so threshold comparisons match
+    the pipeline.
+    """
+    return {
+        **metrics,
+        "context_ticket": coverage.context_ticket.astype(np.int32),
+        "question_overlap": coverage.counts(coverage.overlapping_question).astype(np.int32),
+        "question_total": coverage.counts(coverage.question).astype(np.int32),
+        "answer_overlap": coverage.counts(coverage.overlapping_answer).astype(np.int32),
+        "answer_total": coverage.counts(coverage.answer).astype(np.int32),
+        "ground_truth_weighted_coverage_pct": relevance.ground_truth_weighted_coverage_pct,
+    }
+
+
+def _coverage_pct(overlap: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    # Same rounding as KeywordCoverage.coverage_pct so flags match the pipeline
+    pct = np.divide(
+        overlap, totals,
+        out=np.zeros(len(totals), dtype=np.float64),
+        where=totals > 0
+    )
+    return np.round(pct, 4)
+
+
+def reclassify(
+    inputs: Dict[str, np.ndarray],
+    thresholds: ClassificationThresholds
+) -> Reclassification:
+    """
+    Re-run resolution classification and context usefulness over stored
+    columns. Cost is a few vectorized passes, independent of text size.
+    """
+
+    metrics = {name: inputs[name] for name in METRIC_NAMES}
+    category, confidence, needs_manual_review = classify_arrays(metrics, thresholds)
+
+    per_context = inputs["context_ticket"]
+    entity_match, is_useful, drop = context_flags(
+        inputs["ground_truth_weighted_coverage_pct"],
+        _coverage_pct(inputs["question_overlap"], inputs["question_total"][per_context]),
+        _coverage_pct(inputs["answer_overlap"], inputs["answer_total"][per_context]),
+        metrics["faithfulness"][per_context],
+        metrics["context_recall"][per_context],
+        metrics["context_precision"][per_context],
+        thresholds
+    )
+
+    ticket_count = len(category)
+    return Reclassification(
+        resolution_category=category,
+        resolution_confidence=confidence,
+        needs_manual_review=needs_manual_review,
+        useful_context_count=np.bincount(per_context, weights=is_useful, minlength=ticket_count).astype(np.int64),
+        dropped_context_count=np.bincount(per_context, weights=drop, minlength=ticket_count).astype(np.int64),
+        entity_match=entity_match,
+        is_context_useful=is_useful,
+        drop_recommendation=drop,
+    )
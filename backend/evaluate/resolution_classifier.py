@@ -1,50 +1,92 @@
-from typing import Dict
+from typing import Dict, Optional, Tuple
+import numpy as np
 from models.ragas_models import NormalizedRagasResult
+from models.threshold_models import ClassificationThresholds
 
 
-def classify_resolution(
-    normalized: NormalizedRagasResult
-) -> Dict[str, Dict]:
+METRIC_NAMES = [
+    "answer_relevancy",
+    "faithfulness",
+    "context_recall",
+    "context_precision",
+    "answer_correctness",
+    "answer_similarity",
+    "context_entity_recall",
+]
+
+
+def metric_arrays(normalized: NormalizedRagasResult) -> Dict[str, np.ndarray]:
     """
-    Classify resolution root cause per question (ticket_id).
+    Per-record RAGAS metrics as columns, in record order.
     """
+    return {
+        name: np.fromiter(
+            (getattr(r.metrics, name) for r in normalized.records),
+            dtype=np.float64,
+            count=len(normalized.records)
+        )
+        for name in METRIC_NAMES
+    }
 
-    resolution_map: Dict[str, Dict] = {}
 
-    for record in normalized.records:
-        m = record.metrics
-        category = "unknown"
-        confidence = 0.5
-        needs_manual_review = False
+def classify_arrays(
+    m: Dict[str, np.ndarray],
+    thresholds: ClassificationThresholds
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized resolution classification. Rules are evaluated in priority
+    order; the first match wins. Returns (category, confidence, needs_review).
+    """
+    th = thresholds
 
+    rules = [
         # 🔴 Hallucination
-        if m.faithfulness < 0.7 and m.context_precision < 0.5:
-            category = "hallucination"
-            confidence = 0.9
+        (m["faithfulness"] < th.hallucination_max_faithfulness)
+        & (m["context_precision"] < th.hallucination_max_context_precision),
 
         # 🔵 Retrieval failure
-        elif m.context_recall < 0.6 or m.context_entity_recall < 0.4:
-            category = "retrieval_failure"
-            confidence = 0.85
+        (m["context_recall"] < th.retrieval_failure_max_context_recall)
+        | (m["context_entity_recall"] < th.retrieval_failure_max_context_entity_recall),
 
         # 🟡 Noise / token waste
-        elif m.context_precision < 0.5:
-            category = "noise_token_waste"
-            confidence = 0.75
+        m["context_precision"] < th.noise_max_context_precision,
 
         # 🟢 Bad question / prompt
-        elif m.context_recall > 0.8 and m.answer_correctness < 0.6:
-            category = "bad_question_prompt"
-            confidence = 0.7
-
-        # Edge case
-        else:
-            needs_manual_review = True
-
-        resolution_map[record.ticket_id] = {
-            "resolution_category": category,
-            "resolution_confidence": confidence,
-            "needs_manual_review": needs_manual_review
-        }
+        (m["context_recall"] > th.bad_prompt_min_context_recall)
+        & (m["answer_correctness"] < th.bad_prompt_max_answer_correctness),
+    ]
+
+    category = np.select(
+        rules,
+        ["hallucination", "retrieval_failure", "noise_token_waste", "bad_question_prompt"],
+        default="unknown"
+    )
+    confidence = np.select(rules, [0.9, 0.85, 0.75, 0.7], default=0.5)
+
+    # Edge case
+    needs_manual_review = ~np.logical_or.reduce(rules)
 
-    return resolution_map
+    return category, confidence, needs_manual_review
+
+
+def classify_resolution(
+    normalized: NormalizedRagasResult,
+    thresholds: Optional[ClassificationThresholds] = None
+) -> Dict[str, Dict]:
+    """
+    Classify resolution root cause per question (ticket_id).
+    """
+
+    category, confidence, needs_manual_review = classify_arrays(
+        metric_arrays(normalized),
+        thresholds or ClassificationThresholds()
+    )
+
+    return {
+        record.ticket_id: {
+            "resolution_category": str(category[i]),
+            "resolution_confidence": float(confidence[i]),
+            "needs_manual_review": bool(needs_manual_review[i])
+        }
+        for i, record in enumerate(normalized.records)
+    }
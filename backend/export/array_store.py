@@ -0,0 +1,27 @@
+import os
+from typing import Dict
+
+import numpy as np
+
+from export.exporter import BASE
+
+
+def array_path(job_id: str, name: str) -> str:
+    return f"{BASE}/{job_id}_{name}.npz"
+
+
+def save_arrays(job_id: str, name: str, arrays: Dict[str, np.ndarray]) -> str:
+    """
+    Persist named columns for a job as one compressed .npz file.
+    """
+    path = array_path(job_id, name)
+    np.savez_compressed(path, **arrays)
+    return path
+
+
+def load_arrays(job_id: str, name: str) -> Dict[str, np.ndarray]:
+    path = array_path(job_id, name)
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
@@ -0,0 +1,275 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# Columnar formats written next to the CSV outputs
+COLUMNAR_FORMATS = ["parquet", "arrow"]
+
+FORMAT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+_CATEGORY_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+# Declared column types (the flatteners' *_TYPES) to Arrow types
+COLUMN_TYPES = {
+    "string": pa.string(),
+    "int": pa.int64(),
+    "float": pa.float64(),
+    "bool": pa.bool_(),
+    "keywords": pa.list_(pa.string()),
+}
+
+_TRUE_STRINGS = {"true", "1", "yes", "y", "t"}
+
+
+def output_key(name: str, fmt: str) -> str:
+    """
+    Key of a table in Job.outputs: CSV keeps the bare name so existing
+    clients keep working, other formats are suffixed ("ragas_bi.parquet").
+    """
+    return name if fmt == "csv" else f"{name}.{fmt}"
+
+
+def ticket_batches(ticket_ids: np.ndarray, target: int) -> List[Tuple[int, int]]:
+    """
+    (offset, length) slices of about ``target`` rows that never split a
+    ticket, so a reader filtering on ticket_id touches one row group.
+    Rows of a ticket are contiguous in every BI table.
+    """
+    n = len(ticket_ids)
+    if n == 0:
+        return []
+
+    starts = np.flatnonzero(np.r_[True, ticket_ids[1:] != ticket_ids[:-1]])
+    batches = []
+    offset = 0
+    while offset < n:
+        i = np.searchsorted(starts, offset + target)
+        end = int(starts[i]) if i < len(starts) else n
+        batches.append((offset, end - offset))
+        offset = end
+    return batches
+
+
+def _stable_type(field: pa.Field, categories: Iterable[str], types: Dict[str, str]) -> pa.DataType:
+    """
+    Type a column keeps for the whole file: its declared type, else the
+    first batch decides, with types it cannot decide (all-null, all-empty
+    lists) widened to strings.
+    """
+    if field.name in categories:
+        return _CATEGORY_TYPE
+    if field.name in types:
+        return COLUMN_TYPES[types[field.name]]
+    if pa.types.is_null(field.type) or pa.types.is_large_string(field.type):
+        return pa.string()
+    if pa.types.is_list(field.type) or pa.types.is_large_list(field.type):
+        return pa.list_(pa.string())
+    return field.type
+
+
+def _coerce(value, type_: pa.DataType):
+    """One value converted to ``type_``, or None when it does not convert."""
+    if value is None:
+        return None
+    try:
+        if pa.types.is_list(type_):
+            items = value if isinstance(value, (list, tuple, np.ndarray)) else [value]
+            return [None if item is None else str(item) for item in items]
+        if pa.types.is_integer(type_):
+            return int(float(value))
+        if pa.types.is_floating(type_):
+            return float(value)
+        if pa.types.is_boolean(type_):
+            return value.strip().lower() in _TRUE_STRINGS if isinstance(value, str) else bool(value)
+        return str(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _cast(column, type_: pa.DataType) -> pa.Array:
+    """
+    ``column`` as ``type_``. Values Arrow cannot cast (mixed Python types,
+    "3" for an int) are converted one by one, unconvertible ones to null.
+    """
+    try:
+        return column.cast(type_)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return pa.array([_coerce(v, type_) for v in column.to_pylist()], type=type_)
+
+
+class _CategoryEncoder:
+    """
+    Dictionary-encodes one column across batches against a dictionary
+    that only ever grows, so every batch's dictionary extends the last
+    (Arrow IPC files accept deltas but not replacements).
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, column: pa.ChunkedArray) -> pa.DictionaryArray:
+        local = pc.dictionary_encode(column.combine_chunks().cast(pa.string()))
+
+        mapping = []
+        for value in local.dictionary.to_pylist():
+            if value not in self.ids:
+                self.ids[value] = len(self.values)
+                self.values.append(value)
+            mapping.append(self.ids[value])
+
+        indices = pa.array(mapping, type=pa.int32()).take(local.indices)
+        return pa.DictionaryArray.from_arrays(indices, pa.array(self.values, type=pa.string()))
+
+
+class ColumnarWriter:
+    """
+    Writes one table batch by batch as Parquet (one row group per batch)
+    and/or Arrow IPC (one record batch per batch), zstd-compressed, with
+    list<string> keyword columns and dictionary-encoded ``categories``.
+    Columns in ``types`` (name -> COLUMN_TYPES key) keep that type in
+    every batch. Only the current batch is held in memory.
+    """
+
+    def __init__(
+        self,
+        paths: Dict[str, str],
+        categories: Iterable[str] = (),
+        types: Optional[Dict[str, str]] = None
+    ):
+        self.paths = paths
+        self.categories = list(categories)
+        self.types = types or {}
+        self.schema = None
+        self._encoders = {name: _CategoryEncoder() for name in self.categories}
+        self._writers = {}
+
+    def _open(self, table: pa.Table):
+        self.schema = pa.schema(
+            [pa.field(f.name, _stable_type(f, self.categories, self.types)) for f in table.schema]
+        )
+        if "parquet" in self.paths:
+            self._writers["parquet"] = pq.ParquetWriter(
+                self.paths["parquet"], self.schema, compression="zstd", use_dictionary=True
+            )
+        if "arrow" in self.paths:
+            options = ipc.IpcWriteOptions(compression="zstd", emit_dictionary_deltas=True)
+            self._writers["arrow"] = ipc.new_file(self.paths["arrow"], self.schema, options=options)
+
+    def write_table(self, table: pa.Table):
+        if not self.paths:
+            return
+        if self.schema is None:
+            self._open(table)
+
+        columns = []
+        for field in self.schema:
+            column = table.column(field.name)
+            if field.name in self._encoders:
+                columns.append(self._encoders[field.name].encode(column))
+            else:
+                columns.append(_cast(column, field.type))
+        table = pa.Table.from_arrays(columns, schema=self.schema)
+
+        for fmt, writer in self._writers.items():
+            if fmt == "parquet":
+                writer.write_table(table, row_group_size=max(table.num_rows, 1))
+            else:
+                writer.write_table(table)
+
+    def write(self, df: pd.DataFrame):
+        if self.paths:
+            self.write_table(self._from_pandas(df))
+
+    def _from_pandas(self, df: pd.DataFrame) -> pa.Table:
+        try:
+            return pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+
+        # An object column mixes Python types; convert it value by value
+        arrays = []
+        for name in df.columns:
+            try:
+                arrays.append(pa.array(df[name], from_pandas=True))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                type_ = COLUMN_TYPES.get(self.types.get(name), pa.string())
+                values = [None if _is_missing(v) else v for v in df[name].tolist()]
+                arrays.append(pa.array([_coerce(v, type_) for v in values], type=type_))
+        return pa.Table.from_arrays(arrays, names=[str(name) for name in df.columns])
+
+    def close(self) -> Dict[str, str]:
+        for writer in self._writers.values():
+            writer.close()
+        return {fmt: path for fmt, path in self.paths.items() if fmt in self._writers}
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+def iter_tables(path: str, fmt: str) -> Iterator[pa.Table]:
+    """
+    A stored columnar table one row group / record batch at a time.
+    """
+    if fmt == "parquet":
+        parquet = pq.ParquetFile(path)
+        for i in range(parquet.num_row_groups):
+            yield parquet.read_row_group(i)
+    else:
+        with ipc.open_file(path) as reader:
+            for i in range(reader.num_record_batches):
+                yield pa.Table.from_batches([reader.get_batch(i)])
+
+
+def replace_columns(table: pa.Table, columns: Dict[str, list]) -> pa.Table:
+    """
+    Swap whole columns of a table batch; the writer re-applies the
+    stored column types.
+    """
+    for name, values in columns.items():
+        array = pa.array(values)
+        i = table.schema.get_field_index(name)
+        table = table.set_column(i, name, array) if i >= 0 else table.append_column(name, array)
+    return table
+
+
+def read_rows(
+    path: str,
+    offset: int,
+    limit: int,
+    columns: Optional[List[str]] = None
+) -> Tuple[int, pa.Table]:
+    """
+    (total rows, rows [offset, offset + limit)) of a stored Parquet table,
+    reading only the row groups and columns the page needs.
+    """
+    parquet = pq.ParquetFile(path)
+    total = parquet.metadata.num_rows
+
+    groups, first, start = [], 0, 0
+    for i in range(parquet.num_row_groups):
+        rows = parquet.metadata.row_group(i).num_rows
+        if start + rows > offset and start < offset + limit:
+            if not groups:
+                first = start
+            groups.append(i)
+        start += rows
+
+    if not groups:
+        schema = parquet.schema_arrow
+        if columns is not None:
+            schema = pa.schema([schema.field(name) for name in columns])
+        return total, schema.empty_table()
+
+    table = parquet.read_row_groups(groups, columns=columns)
+    return total, table.slice(offset - first, limit)
@@ -0,0 +1,102 @@
+import gzip
+import hashlib
+import os
+import shutil
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import zstandard
+
+from settings import DOWNLOAD_GZIP_LEVEL, DOWNLOAD_ZSTD_LEVEL
+
+# Content-Encoding -> file suffix, in server preference order
+ENCODINGS = {
+    "zstd": ".zst",
+    "gzip": ".gz",
+}
+
+# Text outputs worth compressing; Parquet/Arrow are already zstd inside
+PRECOMPRESSED_EXTENSIONS = (".csv", ".json")
+
+_CHUNK = 1 << 20
+
+
+def precompress(path: str) -> List[str]:
+    """
+    Write ``path.gz`` and ``path.zst`` next to a finished output so
+    downloads are served compressed without per-request compression.
+    """
+    if not path.endswith(PRECOMPRESSED_EXTENSIONS):
+        return []
+
+    written = []
+    with open(path, "rb") as src, gzip.open(path + ENCODINGS["gzip"], "wb", DOWNLOAD_GZIP_LEVEL) as dst:
+        shutil.copyfileobj(src, dst, _CHUNK)
+    written.append(path + ENCODINGS["gzip"])
+
+    compressor = zstandard.ZstdCompressor(level=DOWNLOAD_ZSTD_LEVEL)
+    with open(path, "rb") as src, open(path + ENCODINGS["zstd"], "wb") as dst:
+        compressor.copy_stream(src, dst, read_size=_CHUNK, write_size=_CHUNK)
+    written.append(path + ENCODINGS["zstd"])
+
+    # Hash every representation now rather than on the first request
+    for representation in [path] + written:
+        file_etag(representation)
+    return written
+
+
+@lru_cache(maxsize=4096)
+def _content_hash(path: str, size: int, mtime_ns: int) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_etag(path: str) -> str:
+    """
+    Strong ETag from the file content. Outputs are written once, so the
+    hash is cached per (path, size, mtime).
+    """
+    stat = os.stat(path)
+    return f'"{_content_hash(path, stat.st_size, stat.st_mtime_ns)}"'
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def negotiate_encoding(path: str, accept_encoding: str) -> Optional[str]:
+    """
+    Best pre-compressed representation of ``path`` the client accepts,
+    or None to send the file as is.
+    """
+    accepted = _accepted_encodings(accept_encoding)
+    candidates = [
+        (accepted.get(coding, accepted.get("*", 0.0)), -rank, coding)
+        for rank, coding in enumerate(ENCODINGS)
+        if os.path.exists(path + ENCODINGS[coding])
+    ]
+    candidates = [c for c in candidates if c[0] > 0]
+    return max(candidates)[2] if candidates else None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as If-None-Match requires
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
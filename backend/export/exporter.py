@@ -1,18 +1,270 @@
+import glob
+import numpy as np
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from analyze.keyword_coverage import KeywordCoverage
+from flatten.ragas_bi_flattener import RAGAS_BI_COLUMNS, RAGAS_BI_CATEGORIES, RAGAS_BI_TYPES
+from flatten.context_bi_flattener import CONTEXT_BI_COLUMNS, CONTEXT_BI_CATEGORIES, CONTEXT_BI_TYPES
+from export.search_index import build_search_index
+from export.downloads import precompress
+from export.columnar import (
+    COLUMNAR_FORMATS, ColumnarWriter, output_key, ticket_batches, iter_tables, replace_columns
+)
+from settings import EXPORT_FORMATS, EXPORT_BATCH_SIZE, OUTPUT_DIR
+from utils import json_codec
+from utils.rows import column
 
-BASE = "outputs"
+BASE = os.path.normpath(OUTPUT_DIR)
 os.makedirs(BASE, exist_ok=True)
 
-def export_outputs(job_id, ragas_bi, context_bi):
-    ragas_path = f"{BASE}/{job_id}_ragas_bi.csv"
-    context_path = f"{BASE}/{job_id}_context_bi.csv"
 
-    pd.DataFrame(ragas_bi).to_csv(ragas_path, index=False)
-    pd.DataFrame(context_bi).to_csv(context_path, index=False)
+def _with_columns(
+    rows: List[Dict],
+    extra: Dict[str, list],
+    order: List[str]
+) -> pd.DataFrame:
+    df = pd.DataFrame(rows)
+    for field, values in extra.items():
+        df[field] = values
 
+    known = [c for c in order if c in df.columns]
+    return df[known + [c for c in df.columns if c not in known]]
 
-    return {
-        "ragas_bi": ragas_path,
-        "context_bi": context_path
-    }
+
+def _table_path(job_id, name: str, fmt: str) -> str:
+    return f"{BASE}/{job_id}_{name}.{fmt}"
+
+
+def _columnar_paths(job_id, name: str, formats: List[str]) -> Dict[str, str]:
+    return {fmt: _table_path(job_id, name, fmt) for fmt in COLUMNAR_FORMATS if fmt in formats}
+
+
+def _outputs(name: str, csv_path: str, columnar: Dict[str, str]) -> Dict[str, str]:
+    outputs = {name: csv_path}
+    outputs.update({output_key(name, fmt): path for fmt, path in columnar.items()})
+    return outputs
+
+
+def _export_table(
+    job_id,
+    name: str,
+    rows: List[Dict],
+    keyword_columns: Callable[[slice], Dict[str, list]],
+    order: List[str],
+    categories: List[str],
+    types: Dict[str, str],
+    progress: Optional[Callable[[str, int, int], None]] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Dict[str, str]:
+    """
+    Stream one BI table to CSV plus every configured columnar format, one
+    batch of rows at a time: only a batch is ever held as a DataFrame and
+    keyword lists are decoded per batch. ``progress(name, rows_done,
+    rows_total)`` is called after each batch.
+    """
+    csv_path = _table_path(job_id, name, "csv")
+    columnar = ColumnarWriter(_columnar_paths(job_id, name, EXPORT_FORMATS), categories, types)
+
+    # Spilled tables read just this column, not whole rows
+    ticket_ids = np.asarray(column(rows, "ticket_id"), dtype=object)
+    batches = ticket_batches(ticket_ids, batch_size) or [(0, 0)]
+
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        for i, (offset, length) in enumerate(batches):
+            rows_slice = slice(offset, offset + length)
+            df = _with_columns(rows[rows_slice], keyword_columns(rows_slice), order)
+            df.to_csv(f, header=i == 0, index=False)
+            columnar.write(df)
+            if progress:
+                progress(name, offset + length, len(rows))
+
+    precompress(csv_path)
+    return _outputs(name, csv_path, columnar.close())
+
+
+def export_outputs(
+    job_id,
+    ragas_bi,
+    context_bi,
+    keyword_coverage: Optional[KeywordCoverage] = None,
+    tables: Optional[Dict[str, List[Dict]]] = None,
+    artifacts: Optional[Dict[str, Dict]] = None,
+    progress: Optional[Callable[[str, int, int], None]] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    concurrency: int = 3
+):
+    """
+    Write both BI tables, the search index, side tables and artifacts.
+    ``concurrency=1`` writes the tables one after another, so only one
+    batch DataFrame is alive at a time (chunked mode).
+    """
+    # Keyword ids are only decoded to strings here, row order matches the engine
+    if keyword_coverage:
+        ragas_lists = keyword_coverage.ticket_keyword_columns
+        context_lists = keyword_coverage.context_keyword_columns
+    else:
+        ragas_lists = context_lists = lambda rows: {}
+
+    # Both BI tables and the search index are written concurrently
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        ragas = pool.submit(
+            _export_table, job_id, "ragas_bi", ragas_bi, ragas_lists,
+            RAGAS_BI_COLUMNS, RAGAS_BI_CATEGORIES, RAGAS_BI_TYPES, progress, batch_size
+        )
+        context = pool.submit(
+            _export_table, job_id, "context_bi", context_bi, context_lists,
+            CONTEXT_BI_COLUMNS, CONTEXT_BI_CATEGORIES, CONTEXT_BI_TYPES, progress, batch_size
+        )
+        search_index = pool.submit(
+            build_search_index, f"{BASE}/{job_id}_search.sqlite", ragas_bi, context_bi
+        )
+
+        outputs = {}
+        outputs.update(ragas.result())
+        outputs.update(context.result())
+        outputs["search_index"] = search_index.result()
+
+    # Job-level side tables (e.g. coverage_curve)
+    for name, rows in (tables or {}).items():
+        path = f"{BASE}/{job_id}_{name}.csv"
+        pd.DataFrame(rows).to_csv(path, index=False)
+        precompress(path)
+        outputs[name] = path
+
+    outputs.update(export_artifacts(job_id, artifacts or {}))
+
+    return outputs
+
+
+def export_artifacts(job_id, artifacts: Dict[str, Dict]) -> Dict[str, str]:
+    """
+    Write small job-level summaries (e.g. metric_summary) as JSON files.
+    """
+    outputs = {}
+    for name, payload in artifacts.items():
+        path = f"{BASE}/{job_id}_{name}.json"
+        with open(path, "wb") as f:
+            f.write(json_codec.dumps(payload))
+        precompress(path)
+        outputs[name] = path
+    return outputs
+
+
+def load_artifact(path: str) -> Dict:
+    with open(path, "rb") as f:
+        return json_codec.loads(f.read())
+
+
+def _slice_columns(columns: Dict[str, list], rows: slice) -> Dict[str, list]:
+    return {name: values[rows] for name, values in columns.items()}
+
+
+def _rewrite_table(
+    job_id,
+    name: str,
+    parent_outputs: Dict[str, str],
+    columns: Dict[str, list],
+    categories: List[str],
+    types: Dict[str, str],
+    progress: Optional[Callable[[str, int, int], None]] = None
+) -> Dict[str, str]:
+    """
+    Copy a parent BI table batch by batch with ``columns`` replaced, in
+    every format the parent was exported in.
+    """
+    total = len(next(iter(columns.values()), []))
+    csv_path = _table_path(job_id, name, "csv")
+    offset = 0
+    # Read everything as text so untouched columns round-trip unchanged
+    chunks = pd.read_csv(
+        parent_outputs[name], dtype=str, keep_default_na=False, chunksize=EXPORT_BATCH_SIZE
+    )
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        for i, df in enumerate(chunks):
+            for field, values in _slice_columns(columns, slice(offset, offset + len(df))).items():
+                df[field] = values
+            df.to_csv(f, header=i == 0, index=False)
+            offset += len(df)
+            if progress:
+                progress(name, offset, total)
+
+    parent_formats = [fmt for fmt in COLUMNAR_FORMATS if output_key(name, fmt) in parent_outputs]
+    columnar = ColumnarWriter(_columnar_paths(job_id, name, parent_formats), categories, types)
+    if parent_formats:
+        # The parent's formats hold the same rows; read whichever comes first
+        offset = 0
+        source = output_key(name, parent_formats[0])
+        for table in iter_tables(parent_outputs[source], parent_formats[0]):
+            rows = slice(offset, offset + table.num_rows)
+            columnar.write_table(replace_columns(table, _slice_columns(columns, rows)))
+            offset += table.num_rows
+
+    precompress(csv_path)
+    return _outputs(name, csv_path, columnar.close())
+
+
+def export_derived_outputs(
+    job_id,
+    parent_outputs: Dict[str, str],
+    ragas_columns: Dict[str, list],
+    context_columns: Dict[str, list],
+    tables: Optional[Dict[str, List[Dict]]] = None,
+    artifacts: Optional[Dict[str, Dict]] = None,
+    progress: Optional[Callable[[str, int, int], None]] = None
+):
+    """
+    Write a derived job's outputs from its parent's: the BI tables are
+    copied with ``*_columns`` replaced, ``tables`` and ``artifacts`` are
+    written fresh and every other parent output is shared by path.
+    """
+    outputs = dict(parent_outputs)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        ragas = pool.submit(
+            _rewrite_table, job_id, "ragas_bi", parent_outputs, ragas_columns,
+            RAGAS_BI_CATEGORIES, RAGAS_BI_TYPES, progress
+        )
+        context = pool.submit(
+            _rewrite_table, job_id, "context_bi", parent_outputs, context_columns,
+            CONTEXT_BI_CATEGORIES, CONTEXT_BI_TYPES, progress
+        )
+        outputs.update(ragas.result())
+        outputs.update(context.result())
+
+    for name, rows in (tables or {}).items():
+        path = f"{BASE}/{job_id}_{name}.csv"
+        pd.DataFrame(rows).to_csv(path, index=False)
+        precompress(path)
+        outputs[name] = path
+
+    outputs.update(export_artifacts(job_id, artifacts or {}))
+
+    return outputs
+
+
+def remove_job_files(job_id) -> List[str]:
+    """
+    Delete everything a job wrote under its own id (tables, pre-compressed
+    copies, arrays, search index), e.g. the partial outputs of a
+    cancelled run. Parent outputs shared by path are left alone.
+    """
+    removed = []
+    for path in glob.glob(f"{BASE}/{glob.escape(str(job_id))}_*"):
+        os.remove(path)
+        removed.append(path)
+    return removed
+
+
+def comparison_path(baseline_job_id: str, candidate_job_id: str) -> str:
+    return f"{BASE}/{baseline_job_id}_vs_{candidate_job_id}_comparison.csv"
+
+
+def export_comparison(baseline_job_id: str, candidate_job_id: str, diff: pd.DataFrame) -> str:
+    path = comparison_path(baseline_job_id, candidate_job_id)
+    # Deltas carry float noise (0.1000000000000009); short reprs also write faster.
+    # Written aside and moved in place, since downloads serve the file as is
+    diff.round(6).to_csv(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    return path
@@ -0,0 +1,184 @@
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.text_utils import token_runs, is_cjk, cjk_bigrams
+from utils.logger import get_logger
+from settings import SEARCH_RANKED_MAX_MATCHES
+
+logger = get_logger(__name__)
+
+# Document kinds, one row per ticket text field or context. Rows are
+# inserted kind by kind so each kind is one contiguous rowid range.
+SEARCH_KINDS = ["question", "ground_truth", "rag_answer", "context"]
+
+_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE documents USING fts5(
+        ticket_id UNINDEXED,
+        context_id UNINDEXED,
+        kind UNINDEXED,
+        text,
+        segmented,
+        tokenize = "unicode61 remove_diacritics 2 tokenchars '_'"
+    )
+    """,
+    """
+    CREATE TABLE kind_ranges (
+        kind TEXT PRIMARY KEY,
+        first_rowid INTEGER NOT NULL,
+        last_rowid INTEGER NOT NULL
+    )
+    """,
+]
+
+_INSERT_BATCH = 10000
+
+
+def _segmented_column(text: str) -> str:
+    """
+    unicode61 treats a CJK run and any latin word touching it as a single
+    token, so texts with CJK are re-indexed here as latin words plus CJK
+    bigrams. Empty for texts without CJK.
+    """
+    runs = token_runs(text)
+    if not any(is_cjk(run) for run in runs):
+        return ""
+    return " ".join(_segment(run) for run in runs)
+
+
+def _segment(run: str) -> str:
+    if not is_cjk(run) or len(run) == 1:
+        return run
+    # The trailing single character lets a one-character query match
+    # every position as a prefix (bigram start or run end)
+    return " ".join(cjk_bigrams(run)) + " " + run[-1]
+
+
+def _documents(kind: str, ragas_bi: List[Dict], context_bi: List[Dict]) -> Iterable[Tuple]:
+    if kind == "context":
+        for row in context_bi:
+            text = row.get("context_text") or ""
+            yield row["ticket_id"], row["context_id"], kind, text, _segmented_column(text)
+    else:
+        for row in ragas_bi:
+            text = row.get(kind) or ""
+            yield row["ticket_id"], None, kind, text, _segmented_column(text)
+
+
+def build_search_index(path: str, ragas_bi: List[Dict], context_bi: List[Dict]) -> str:
+    """
+    Write an FTS5 index over question, ground truth, answer and context
+    text. Built in one transaction and optimized into a single segment.
+    """
+    start = time.perf_counter()
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("DROP TABLE IF EXISTS documents")
+        conn.execute("DROP TABLE IF EXISTS kind_ranges")
+        for statement in _SCHEMA:
+            conn.execute(statement)
+
+        insert = (
+            "INSERT INTO documents(rowid, ticket_id, context_id, kind, text, segmented)"
+            " VALUES (?, ?, ?, ?, ?, ?)"
+        )
+        rowid = 0
+
+        for kind in SEARCH_KINDS:
+            first = rowid + 1
+            batch = []
+            for doc in _documents(kind, ragas_bi, context_bi):
+                rowid += 1
+                batch.append((rowid, *doc))
+                if len(batch) >= _INSERT_BATCH:
+                    conn.executemany(insert, batch)
+                    batch.clear()
+            conn.executemany(insert, batch)
+            conn.execute("INSERT INTO kind_ranges VALUES (?, ?, ?)", (kind, first, rowid))
+
+        conn.execute("INSERT INTO documents(documents) VALUES ('optimize')")
+        conn.commit()
+    finally:
+        conn.close()
+
+    logger.info("Built search index %s in %.3fs", path, time.perf_counter() - start)
+    return path
+
+
+def to_match_query(query: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 query: every word must match (AND),
+    CJK runs match as bigram phrases and a single CJK character as a
+    bigram prefix. None when nothing is searchable.
+    """
+    terms = []
+    for run in token_runs(query):
+        if is_cjk(run):
+            phrase = '"' + " ".join(cjk_bigrams(run)) + '"'
+            terms.append(f"segmented:{phrase}*" if len(run) == 1 else f"segmented:{phrase}")
+        else:
+            terms.append(f'{{text segmented}}:"{run}"')
+    return " AND ".join(terms) or None
+
+
+def search(
+    path: str,
+    query: str,
+    kinds: Optional[List[str]] = None,
+    offset: int = 0,
+    limit: int = 20
+) -> Dict:
+    """
+    Hits with highlighted snippets, best bm25 first.
+
+    Matches are counted first (cheap). Ranking scores every match, so
+    queries matching more than SEARCH_RANKED_MAX_MATCHES documents are
+    returned in document order instead and flagged ``ranked: False``.
+    """
+    match = to_match_query(query)
+    if match is None:
+        return {"total": 0, "ranked": True, "hits": []}
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        # Kind filter as rowid ranges, which FTS5 applies inside the index scan
+        where = "documents MATCH ?"
+        params: list = [match]
+        if kinds and set(kinds) != set(SEARCH_KINDS):
+            ranges = conn.execute(
+                "SELECT first_rowid, last_rowid FROM kind_ranges"
+                f" WHERE kind IN ({', '.join('?' * len(kinds))})",
+                kinds
+            ).fetchall()
+            if not ranges:
+                return {"total": 0, "ranked": True, "hits": []}
+            where += " AND (" + " OR ".join("rowid BETWEEN ? AND ?" for _ in ranges) + ")"
+            params.extend(bound for r in ranges for bound in r)
+
+        total = conn.execute(f"SELECT count(*) FROM documents WHERE {where}", params).fetchone()[0]
+        ranked = total <= SEARCH_RANKED_MAX_MATCHES
+
+        rows = conn.execute(
+            "SELECT ticket_id, context_id, kind, bm25(documents) AS score,"
+            " snippet(documents, 3, '[', ']', '…', 16)"
+            f" FROM documents WHERE {where}"
+            f"{' ORDER BY score' if ranked else ''} LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+    finally:
+        conn.close()
+
+    hits = [
+        {
+            "ticket_id": ticket_id,
+            "context_id": context_id,
+            "kind": kind,
+            "score": round(-score, 4),
+            "snippet": snippet,
+        }
+        for ticket_id, context_id, kind, score, snippet in rows
+    ]
+    return {"total": total, "ranked": ranked, "hits": hits}
@@ -0,0 +1,202 @@
+import os
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from export.exporter import BASE
+
+
+def _spill_path(job_id: str, name: str, batch: str, extension: str = "arrow") -> str:
+    # Named under the job, so remove_job_files also clears a cancelled run's
+    return f"{BASE}/{job_id}_spill_{name}_{batch}.{extension}"
+
+
+def _write_table(path: str, table: pa.Table):
+    with pa.OSFile(path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _read_table(path: str) -> pa.Table:
+    with pa.memory_map(path) as source:
+        return ipc.open_file(source).read_all()
+
+
+class SpilledRows(Sequence):
+    """
+    Table rows (dicts) kept in temporary Arrow IPC files instead of
+    memory, one file per batch, written all at once (``write``) or batch
+    by batch (``append``). Reads back as a read-only sequence of
+    rows: slices load only the batches they overlap, the most recent
+    one cached. Single columns can be read, and set, without decoding
+    whole rows. ``close()`` deletes the files.
+    """
+
+    def __init__(self, job_id: str, name: str):
+        self.job_id = job_id
+        self.name = name
+        self.paths: List[str] = []
+        self._ends = np.zeros(0, dtype=np.int64)
+        self._cached = (-1, [])
+
+    @classmethod
+    def write(cls, job_id: str, name: str, rows: Iterable[Dict], batch_size: int) -> "SpilledRows":
+        """
+        Spill ``rows`` in batches of ``batch_size``. Each batch infers its
+        own schema, so a column that is all None in one batch is fine.
+        """
+        spilled = cls(job_id, name)
+        batch: List[Dict] = []
+
+        try:
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    spilled.append(batch)
+                    batch = []
+            spilled.append(batch)
+        except BaseException:
+            # No batches of a half-written table left behind
+            spilled.close()
+            raise
+        return spilled
+
+    def append(self, rows: List[Dict]):
+        """Spill one more batch of rows (nothing for an empty batch)."""
+        if not rows:
+            return
+        path = _spill_path(self.job_id, self.name, f"{len(self.paths):05d}")
+        _write_table(path, pa.Table.from_pylist(rows))
+        self.paths.append(path)
+        self._ends = np.append(self._ends, len(self) + len(rows))
+
+    def _batch(self, i: int) -> List[Dict]:
+        if self._cached[0] != i:
+            self._cached = (i, _read_table(self.paths[i]).to_pylist())
+        return self._cached[1]
+
+    def _bounds(self, i: int) -> tuple:
+        return (int(self._ends[i - 1]) if i else 0), int(self._ends[i])
+
+    def column(self, name: str) -> List:
+        """Every row's ``name`` field, read batch by batch."""
+        values = []
+        for path in self.paths:
+            values.extend(_read_table(path).column(name).to_pylist())
+        return values
+
+    def set_columns(self, columns: Dict[str, Sequence]):
+        """
+        Set (or add) fields on every row, one value per row per field,
+        rewriting the batches one at a time.
+        """
+        self._cached = (-1, [])
+        for i, path in enumerate(self.paths):
+            start, end = self._bounds(i)
+            table = _read_table(path)
+            for name, values in columns.items():
+                array = pa.array(list(values[start:end]))
+                position = table.schema.get_field_index(name)
+                if position < 0:
+                    table = table.append_column(name, array)
+                else:
+                    table = table.set_column(position, name, array)
+            _write_table(path + ".tmp", table)
+            os.replace(path + ".tmp", path)
+
+    def __len__(self) -> int:
+        return int(self._ends[-1]) if len(self._ends) else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("SpilledRows supports contiguous slices only")
+            rows = []
+            while start < stop:
+                i = int(np.searchsorted(self._ends, start, side="right"))
+                first = int(self._ends[i - 1]) if i else 0
+                take = min(stop, int(self._ends[i])) - start
+                rows.extend(self._batch(i)[start - first:start - first + take])
+                start += take
+            return rows
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        i = int(np.searchsorted(self._ends, index, side="right"))
+        return self._batch(i)[index - (int(self._ends[i - 1]) if i else 0)]
+
+    def __iter__(self) -> Iterator[Dict]:
+        # Decoded batch by batch, without touching the slice cache
+        for path in self.paths:
+            yield from _read_table(path).to_pylist()
+
+    def close(self):
+        self._cached = (-1, [])
+        _remove(self.paths)
+        self.paths = []
+        self._ends = np.zeros(0, dtype=np.int64)
+
+
+class SpilledArrays:
+    """
+    Numpy columns of a stage's per-batch intermediates, one uncompressed
+    .npz file per batch. Iterating loads one batch at a time, so a later
+    stage can read them any number of times; ``stacked`` joins one column
+    of every batch into a memory-mapped .npy. ``close()`` deletes the files.
+    """
+
+    def __init__(self, job_id: str, name: str):
+        self.job_id = job_id
+        self.name = name
+        self.paths: List[str] = []
+        self._columns: List[Dict[str, tuple]] = []
+
+    def append(self, arrays: Dict[str, np.ndarray]):
+        path = _spill_path(self.job_id, self.name, f"{len(self.paths):05d}", "npz")
+        np.savez(path, **arrays)
+        self.paths.append(path)
+        self._columns.append({key: (values.shape, values.dtype) for key, values in arrays.items()})
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __iter__(self) -> Iterator[Dict[str, np.ndarray]]:
+        for path in self.paths[:len(self._columns)]:
+            with np.load(path, allow_pickle=False) as data:
+                yield {key: data[key] for key in data.files}
+
+    def stacked(self, key: str) -> np.ndarray:
+        """
+        ``key`` of every batch concatenated along the first axis, paged in
+        from disk on access instead of held in memory.
+        """
+        (_, *tail), dtype = self._columns[0][key]
+        rows = sum(columns[key][0][0] for columns in self._columns)
+        path = _spill_path(self.job_id, self.name, key, "npy")
+        stacked = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(rows, *tail))
+        self.paths.append(path)
+
+        start = 0
+        for arrays in self:
+            values = arrays[key]
+            stacked[start:start + len(values)] = values
+            start += len(values)
+        stacked.flush()
+        return stacked
+
+    def close(self):
+        _remove(self.paths)
+        self.paths = []
+        self._columns = []
+
+
+def _remove(paths: List[str]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
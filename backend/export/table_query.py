@@ -0,0 +1,288 @@
+import base64
+from typing import Dict, List, Optional, Tuple
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from models.api_models import (
+    AggregateRequest,
+    ColumnFilter,
+    HistogramRequest,
+    SortKey,
+    TableQueryRequest,
+)
+from settings import AGGREGATE_GROUPS_MAX, DUCKDB_MEMORY_LIMIT, DUCKDB_THREADS, ROWS_PAGE_MAX
+from utils import json_codec
+
+# DuckDB's parquet row position, the tiebreaker that makes cursors stable
+_ROW = "file_row_number"
+
+_COMPARISONS = {"eq": "=", "ne": "<>", "lt": "<", "le": "<=", "gt": ">", "ge": ">="}
+
+_AGGREGATES = {
+    "count": "count",
+    "mean": "avg",
+    "sum": "sum",
+    "min": "min",
+    "max": "max",
+    "median": "median",
+    "std": "stddev_pop",
+}
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _encode_cursor(sort: List[SortKey], values: list) -> str:
+    payload = {"sort": [[k.column, k.descending] for k in sort], "after": values}
+    return base64.urlsafe_b64encode(json_codec.dumps(payload)).decode()
+
+
+def _decode_cursor(cursor: str, sort: List[SortKey]) -> list:
+    try:
+        payload = json_codec.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise ValueError("Malformed cursor")
+    if not isinstance(payload, dict) or not isinstance(payload.get("after"), list):
+        raise ValueError("Malformed cursor")
+    if payload.get("sort") != [[k.column, k.descending] for k in sort]:
+        raise ValueError("Cursor was issued for a different sort order")
+    return payload["after"]
+
+
+class TableQuery:
+    """
+    Filter, sort, page and aggregate one stored Parquet table with an
+    embedded DuckDB. Column names are checked against the file schema and
+    every value is bound as a parameter.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.schema = pq.read_schema(path)
+
+    def _column(self, name: str) -> str:
+        if self.schema.get_field_index(name) < 0:
+            raise ValueError(f"Unknown column '{name}'")
+        return _quote(name)
+
+    def _is_list(self, name: str) -> bool:
+        return pa.types.is_list(self.schema.field(name).type)
+
+    def _source(self) -> str:
+        path = self.path.replace("'", "''")
+        return f"read_parquet('{path}', file_row_number = true)"
+
+    def _execute(self, sql: str, params: list) -> pa.Table:
+        conn = duckdb.connect()
+        try:
+            conn.execute(f"SET threads = {DUCKDB_THREADS}")
+            conn.execute(f"SET memory_limit = '{DUCKDB_MEMORY_LIMIT}'")
+            return conn.execute(sql, params).fetch_arrow_table()
+        except duckdb.Error as e:
+            # Type mismatches in filters, sorting on lists, ...
+            raise ValueError(str(e).splitlines()[0])
+        finally:
+            conn.close()
+
+    # --- Filters ---
+
+    def _filter(self, f: ColumnFilter) -> Tuple[str, list]:
+        column = self._column(f.column)
+
+        if f.op in ("is_null", "not_null"):
+            return f"{column} IS {'NOT ' if f.op == 'not_null' else ''}NULL", []
+
+        if f.value is None:
+            raise ValueError(f"Filter '{f.op}' on '{f.column}' requires a value")
+
+        if f.op in ("in", "not_in"):
+            if not isinstance(f.value, list) or not f.value:
+                raise ValueError(f"Filter '{f.op}' on '{f.column}' requires a non-empty list")
+            placeholders = ", ".join("?" * len(f.value))
+            return f"{column} {'NOT ' if f.op == 'not_in' else ''}IN ({placeholders})", list(f.value)
+
+        if f.op in ("in_range", "not_in_range"):
+            # Half-open [low, high), so adjacent ranges never overlap
+            if not isinstance(f.value, list) or len(f.value) != 2:
+                raise ValueError(f"Filter '{f.op}' on '{f.column}' requires [low, high]")
+            clause = f"({column} >= ? AND {column} < ?)"
+            if f.op == "not_in_range":
+                clause = f"({column} < ? OR {column} >= ?)"
+            return clause, list(f.value)
+
+        if isinstance(f.value, list):
+            raise ValueError(f"Filter '{f.op}' on '{f.column}' takes a single value")
+
+        if f.op == "contains":
+            if not self._is_list(f.column):
+                raise ValueError(f"'contains' needs a keyword list column, got '{f.column}'")
+            return f"list_contains({column}, ?)", [f.value]
+
+        return f"{column} {_COMPARISONS[f.op]} ?", [f.value]
+
+    def _where(self, filters: List[ColumnFilter], extra: Optional[Tuple[str, list]] = None) -> Tuple[str, list]:
+        clauses, params = [], []
+        for f in filters:
+            clause, values = self._filter(f)
+            clauses.append(clause)
+            params.extend(values)
+        if extra:
+            clauses.append(extra[0])
+            params.extend(extra[1])
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    # --- Rows ---
+
+    def _after(self, keys: List[Tuple[str, bool]], values: list) -> Tuple[str, list]:
+        """
+        Keyset predicate "sorts after ``values``" under ORDER BY ``keys``
+        (NULLS LAST in both directions).
+        """
+        branches, params = [], []
+        for i, (column, descending) in enumerate(keys):
+            if values[i] is None:
+                # Nothing sorts after NULL on this key; only ties continue
+                continue
+            clause = [f"{c} IS NOT DISTINCT FROM ?" for c, _ in keys[:i]]
+            clause.append(f"({column} {'<' if descending else '>'} ? OR {column} IS NULL)")
+            branches.append("(" + " AND ".join(clause) + ")")
+            params.extend(values[:i] + [values[i]])
+        return "(" + (" OR ".join(branches) or "FALSE") + ")", params
+
+    def rows(self, request: TableQueryRequest) -> Dict:
+        """
+        One page of filtered, projected, sorted rows and the cursor of
+        the next page (None on the last one).
+        """
+        if not 1 <= request.limit <= ROWS_PAGE_MAX:
+            raise ValueError(f"limit must be between 1 and {ROWS_PAGE_MAX}")
+
+        columns = request.columns or self.schema.names
+        projection = [self._column(name) for name in columns]
+        keys = [(self._column(k.column), k.descending) for k in request.sort] + [(_ROW, False)]
+
+        after = None
+        if request.cursor:
+            values = _decode_cursor(request.cursor, request.sort)
+            if len(values) != len(keys):
+                raise ValueError("Malformed cursor")
+            after = self._after(keys, values)
+
+        where, params = self._where(request.filters)
+        total = self._execute(f"SELECT count(*) AS n FROM {self._source()}{where}", params)["n"][0].as_py()
+
+        where, params = self._where(request.filters, after)
+        sort_columns = [f"{column} AS __key{i}" for i, (column, _) in enumerate(keys)]
+        order = ", ".join(
+            f"{column} {'DESC' if descending else 'ASC'} NULLS LAST" for column, descending in keys
+        )
+        page = self._execute(
+            f"SELECT {', '.join(projection + sort_columns)} FROM {self._source()}{where}"
+            f" ORDER BY {order} LIMIT {request.limit + 1}",
+            params
+        )
+
+        has_more = page.num_rows > request.limit
+        page = page.slice(0, request.limit)
+        next_cursor = None
+        if has_more:
+            last = page.slice(page.num_rows - 1)
+            values = [last[f"__key{i}"][0].as_py() for i in range(len(keys))]
+            next_cursor = _encode_cursor(request.sort, values)
+
+        return {
+            "total": total,
+            "rows": page.select(list(range(len(columns)))).rename_columns(columns).to_pylist(),
+            "next_cursor": next_cursor,
+        }
+
+    # --- Aggregations ---
+
+    def aggregate(self, request: AggregateRequest) -> Dict:
+        """
+        Aggregations per group (or over all rows without ``group_by``),
+        e.g. mean keyword coverage per ticket.
+        """
+        if not request.aggregations:
+            raise ValueError("At least one aggregation is required")
+        if not 1 <= request.limit <= AGGREGATE_GROUPS_MAX:
+            raise ValueError(f"limit must be between 1 and {AGGREGATE_GROUPS_MAX}")
+
+        groups = [self._column(name) for name in request.group_by]
+        selected = list(groups)
+        labels = list(request.group_by)
+        for agg in request.aggregations:
+            if agg.column is None and agg.function != "count":
+                raise ValueError(f"Aggregation '{agg.function}' requires a column")
+            argument = "*" if agg.column is None else self._column(agg.column)
+            selected.append(f"{_AGGREGATES[agg.function]}({argument}) AS {_quote(agg.label)}")
+            labels.append(agg.label)
+
+        for key in request.sort:
+            if key.column not in labels:
+                raise ValueError(f"Can only sort on group or aggregation columns, got '{key.column}'")
+        order = ", ".join(
+            f"{_quote(k.column)} {'DESC' if k.descending else 'ASC'} NULLS LAST" for k in request.sort
+        ) or ", ".join(groups)
+
+        where, params = self._where(request.filters)
+        sql = f"SELECT {', '.join(selected)} FROM {self._source()}{where}"
+        if groups:
+            sql += f" GROUP BY {', '.join(groups)}"
+        if order:
+            sql += f" ORDER BY {order}"
+        result = self._execute(sql + f" LIMIT {request.limit + 1}", params)
+
+        return {
+            "rows": result.slice(0, request.limit).to_pylist(),
+            "truncated": result.num_rows > request.limit,
+        }
+
+    def histogram(self, request: HistogramRequest) -> Dict:
+        """
+        Equal-width histogram of a numeric column over [low, high]
+        (the column's range by default). Values outside the range and
+        NULLs are not counted.
+        """
+        column = self._column(request.column)
+        if not pa.types.is_integer(self.schema.field(request.column).type) and \
+                not pa.types.is_floating(self.schema.field(request.column).type):
+            raise ValueError(f"Histogram needs a numeric column, got '{request.column}'")
+        if request.bins < 1 or request.bins > ROWS_PAGE_MAX:
+            raise ValueError(f"bins must be between 1 and {ROWS_PAGE_MAX}")
+
+        where, params = self._where(request.filters)
+        low, high = request.low, request.high
+        if low is None or high is None:
+            bounds = self._execute(
+                f"SELECT min({column}) AS lo, max({column}) AS hi FROM {self._source()}{where}", params
+            )
+            low = bounds["lo"][0].as_py() if low is None else low
+            high = bounds["hi"][0].as_py() if high is None else high
+
+        edges = []
+        counts = np.zeros(request.bins, dtype=np.int64)
+        if low is not None and high is not None and high >= low:
+            width = (high - low) / request.bins or 1.0
+            # The top edge is inclusive, like numpy.histogram
+            bucket = f"least(floor(({column} - ?) / ?)::BIGINT, {request.bins - 1})"
+            where, params = self._where(
+                request.filters, (f"{column} BETWEEN ? AND ?", [low, high])
+            )
+            result = self._execute(
+                f"SELECT {bucket} AS bucket, count(*) AS n FROM {self._source()}{where} GROUP BY bucket",
+                [low, width] + params
+            )
+            counts[result["bucket"].to_numpy()] = result["n"].to_numpy()
+            edges = np.linspace(low, low + width * request.bins, request.bins + 1).round(6).tolist()
+
+        return {
+            "column": request.column,
+            "edges": edges,
+            "counts": counts.tolist(),
+            "total": int(counts.sum()),
+        }
@@ -1,5 +1,93 @@
 from typing import List, Dict
 
+
+# Column order of the exported Context BI table. Keyword list columns are
+# decoded from the coverage engine at export time.
+CONTEXT_BI_COLUMNS = [
+    "ticket_id",
+    "context_id",
+    "context_text",
+    "context_char_count",
+    "context_token_count",
+    "duplicate_cluster_id",
+    "redundant_token_count",
+    "context_keywords",
+    "question_keywords",
+    "ground_truth_keywords",
+    "rag_answer_keywords",
+    "overlapping_question_keywords",
+    "overlapping_ground_truth_keywords",
+    "overlapping_answer_keywords",
+    "question_keyword_coverage_pct",
+    "ground_truth_keyword_coverage_pct",
+    "rag_answer_keyword_coverage_pct",
+    "question_bm25",
+    "ground_truth_bm25",
+    "rag_answer_bm25",
+    "ground_truth_weighted_coverage_pct",
+    "context_sentence_count",
+    "attributed_sentence_count",
+    "attributed_token_share",
+    "cumulative_question_coverage_pct",
+    "cumulative_ground_truth_coverage_pct",
+    "cumulative_token_count",
+    "missing_question_keywords",
+    "missing_ground_truth_keywords",
+    "entity_match",
+    "is_context_useful",
+    "usefulness_reason",
+    "drop_recommendation",
+    "rank",
+    "rank_reason",
+]
+
+
+# Low-cardinality text columns, dictionary-encoded in columnar exports
+CONTEXT_BI_CATEGORIES = [
+    "ticket_id",
+    "duplicate_cluster_id",
+    "usefulness_reason",
+]
+
+
+# Types of the other columns in columnar exports, fixed up front so a
+# batch with oddly typed values (e.g. LLM ranks as strings) is coerced
+CONTEXT_BI_TYPES = {
+    "context_id": "string",
+    "context_text": "string",
+    "context_char_count": "int",
+    "context_token_count": "int",
+    "redundant_token_count": "int",
+    "context_keywords": "keywords",
+    "question_keywords": "keywords",
+    "ground_truth_keywords": "keywords",
+    "rag_answer_keywords": "keywords",
+    "overlapping_question_keywords": "keywords",
+    "overlapping_ground_truth_keywords": "keywords",
+    "overlapping_answer_keywords": "keywords",
+    "question_keyword_coverage_pct": "float",
+    "ground_truth_keyword_coverage_pct": "float",
+    "rag_answer_keyword_coverage_pct": "float",
+    "question_bm25": "float",
+    "ground_truth_bm25": "float",
+    "rag_answer_bm25": "float",
+    "ground_truth_weighted_coverage_pct": "float",
+    "context_sentence_count": "int",
+    "attributed_sentence_count": "int",
+    "attributed_token_share": "float",
+    "cumulative_question_coverage_pct": "float",
+    "cumulative_ground_truth_coverage_pct": "float",
+    "cumulative_token_count": "int",
+    "missing_question_keywords": "keywords",
+    "missing_ground_truth_keywords": "keywords",
+    "entity_match": "bool",
+    "is_context_useful": "bool",
+    "drop_recommendation": "bool",
+    "rank": "int",
+    "rank_reason": "string",
+}
+
+
 def build_context_bi(
     contexts: List[Dict],
     keyword_info: Dict[str, Dict]
@@ -9,4 +97,3 @@ def build_context_bi(
     Currently contexts are already enriched by context_analyzer.
     """
     return contexts
-
@@ -1,29 +1,116 @@
-from typing import List, Dict
-from models.ragas_models import NormalizedRagasResult
+from typing import Dict, Iterable, Iterator, List
+from collections import Counter
+from models.ragas_models import NormalizedRagasResult, RagasRecord
+from utils.rows import column
+
+
+# Column order of the exported RAGAS BI table. Keyword list columns are
+# decoded from the coverage engine at export time.
+RAGAS_BI_COLUMNS = [
+    "ticket_id",
+    "question_hash",
+    "question",
+    "rag_answer",
+    "ground_truth",
+    "context_entity_recall",
+    "context_precision",
+    "context_recall",
+    "answer_correctness",
+    "answer_similarity",
+    "answer_relevancy",
+    "faithfulness",
+    "resolution_category",
+    "resolution_confidence",
+    "needs_manual_review",
+    "context_count",
+    "context_token_count",
+    "useful_context_count",
+    "dropped_context_count",
+    "redundant_token_count",
+    "question_keywords",
+    "ground_truth_keywords",
+    "rag_answer_keywords",
+    "missing_answer_keywords",
+    "missing_context_keywords",
+    "rank",
+    "rank_reason",
+]
+
+
+# Low-cardinality text columns, dictionary-encoded in columnar exports
+RAGAS_BI_CATEGORIES = ["resolution_category"]
+
+
+# Types of the other columns in columnar exports, fixed up front so a
+# batch with oddly typed values (e.g. LLM ranks as strings) is coerced
+RAGAS_BI_TYPES = {
+    "ticket_id": "string",
+    "question_hash": "string",
+    "question": "string",
+    "rag_answer": "string",
+    "ground_truth": "string",
+    "context_entity_recall": "float",
+    "context_precision": "float",
+    "context_recall": "float",
+    "answer_correctness": "float",
+    "answer_similarity": "float",
+    "answer_relevancy": "float",
+    "faithfulness": "float",
+    "resolution_confidence": "float",
+    "needs_manual_review": "bool",
+    "context_count": "int",
+    "context_token_count": "int",
+    "useful_context_count": "int",
+    "dropped_context_count": "int",
+    "redundant_token_count": "int",
+    "question_keywords": "keywords",
+    "ground_truth_keywords": "keywords",
+    "rag_answer_keywords": "keywords",
+    "missing_answer_keywords": "keywords",
+    "missing_context_keywords": "keywords",
+    "rank": "int",
+    "rank_reason": "string",
+}
 
 
 def build_ragas_bi(
     normalized: NormalizedRagasResult,
     resolution: Dict[str, Dict],
-    contexts: List[Dict],
-    keyword_info: Dict[str, Dict]
+    contexts: List[Dict]
 ) -> List[Dict]:
     """
     Build question-level RAGAS BI output with keyword explainability.
     """
+    return list(iter_ragas_bi_rows(normalized.records, resolution, contexts))
 
-    bi_rows = []
 
-    for record in normalized.records:
-        ticket_id = record.ticket_id
-        keywords = keyword_info.get(ticket_id, {})
+def iter_ragas_bi_rows(
+    records: Iterable[RagasRecord],
+    resolution: Dict[str, Dict],
+    contexts: List[Dict]
+) -> Iterator[Dict]:
+    """
+    RAGAS BI rows one record at a time, so chunked jobs can spill them.
+    """
 
-        gt_keywords = set(keywords.get("ground_truth_keywords", []))
-        ans_keywords = set(keywords.get("rag_answer_keywords", []))
-        ctx_keywords = set(keywords.get("context_keywords", []))
+    # One pass over the context columns instead of a scan per ticket
+    ticket_ids = column(contexts, "ticket_id")
+    useful_counts = Counter(t for t, u in zip(ticket_ids, column(contexts, "is_context_useful")) if u)
+    dropped_counts = Counter(t for t, d in zip(ticket_ids, column(contexts, "drop_recommendation")) if d)
+    context_tokens = Counter()
+    redundant_tokens = Counter()
+    for t, tokens, redundant in zip(
+        ticket_ids, column(contexts, "context_token_count"), column(contexts, "redundant_token_count")
+    ):
+        context_tokens[t] += tokens
+        redundant_tokens[t] += redundant
+
+    for record in records:
+        ticket_id = record.ticket_id
 
         row = {
             "ticket_id": ticket_id,
+            "question_hash": record.question_hash,
             "question": record.question,
             "rag_answer": record.rag_answer,
             "ground_truth": record.ground_truth,
@@ -42,25 +129,10 @@ def build_ragas_bi(
 
             # Context stats
             "context_count": len(record.contexts),
-            "useful_context_count": sum(
-                1 for c in contexts
-                if c["ticket_id"] == ticket_id and c["is_context_useful"]
-            ),
-            "dropped_context_count": sum(
-                1 for c in contexts
-                if c["ticket_id"] == ticket_id and c["drop_recommendation"]
-            ),
-
-            # 🔑 Keyword explainability columns
-            "question_keywords": keywords.get("question_keywords", []),
-            "ground_truth_keywords": keywords.get("ground_truth_keywords", []),
-            "rag_answer_keywords": keywords.get("rag_answer_keywords", []),
-
-            # 🔍 Gap analysis
-            "missing_answer_keywords": list(gt_keywords - ans_keywords),
-            "missing_context_keywords": list(gt_keywords - ctx_keywords),
+            "context_token_count": context_tokens[ticket_id],
+            "useful_context_count": useful_counts[ticket_id],
+            "dropped_context_count": dropped_counts[ticket_id],
+            "redundant_token_count": redundant_tokens[ticket_id],
         }
 
-        bi_rows.append(row)
-
-    return bi_rows
+        yield row
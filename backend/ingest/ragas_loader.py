@@ -1,4 +1,157 @@
-import json
+import gzip
+import io
+import mmap
+from typing import BinaryIO, Iterator, List
 
-def load_ragas(raw: bytes) -> dict:
-    return json.loads(raw)
+import zstandard
+
+from settings import (
+    INGEST_BLOCK_BYTES,
+    INGEST_MAX_DECOMPRESSED_BYTES,
+)
+from utils import json_codec
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Enough to see past a BOM and leading whitespace to the first token
+_PEEK_BYTES = 64 * 1024
+_LEADING = b"\xef\xbb\xbf \t\r\n"
+
+
+def _compressed(raw) -> bool:
+    magic = raw[:len(_ZSTD_MAGIC)]
+    return magic.startswith(_GZIP_MAGIC) or magic.startswith(_ZSTD_MAGIC)
+
+
+def declared_size(raw) -> int:
+    """
+    Decompressed size an upload declares (the zstd frame content size or
+    the gzip trailer, which is modulo 4 GiB), never less than its own
+    length. Only an estimate for admission: headers can lie, so the
+    loader still enforces INGEST_MAX_DECOMPRESSED_BYTES as it reads.
+    """
+    magic = raw[:len(_ZSTD_MAGIC)]
+    declared = 0
+    if magic.startswith(_GZIP_MAGIC) and len(raw) >= 18:
+        declared = int.from_bytes(raw[-4:], "little")
+    elif magic.startswith(_ZSTD_MAGIC):
+        try:
+            # -1 when the frame does not record it (streamed compressors)
+            declared = zstandard.frame_content_size(raw[:18])
+        except zstandard.ZstdError:
+            declared = 0
+    return max(len(raw), declared)
+
+
+def _open(raw) -> BinaryIO:
+    """
+    Stream over an upload (bytes or a memory-mapped file), decompressing
+    gzip / zstd (detected by their magic bytes) as it is read.
+    """
+    if isinstance(raw, mmap.mmap):
+        raw.seek(0)
+        source = raw
+    else:
+        source = io.BytesIO(raw)
+    magic = raw[:len(_ZSTD_MAGIC)]
+    if magic.startswith(_GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=source, mode="rb")
+    if magic.startswith(_ZSTD_MAGIC):
+        # Frames without a content size (streamed compressors) are fine
+        return zstandard.ZstdDecompressor().stream_reader(source)
+    return source
+
+
+def _read(stream: BinaryIO, size: int, seen: int) -> bytes:
+    try:
+        data = stream.read(size)
+    except (OSError, EOFError, zstandard.ZstdError) as e:
+        raise ValueError(f"Invalid compressed upload: {e}")
+    if seen + len(data) > INGEST_MAX_DECOMPRESSED_BYTES:
+        raise ValueError(f"Upload expands beyond {INGEST_MAX_DECOMPRESSED_BYTES} bytes")
+    return data
+
+
+def _read_all(head: bytes, stream: BinaryIO) -> bytes:
+    parts = [head]
+    seen = len(head)
+    while True:
+        data = _read(stream, INGEST_BLOCK_BYTES, seen)
+        if not data:
+            return b"".join(parts)
+        seen += len(data)
+        parts.append(data)
+
+
+def _line_blocks(head: bytes, stream: BinaryIO) -> Iterator[bytes]:
+    """
+    The rest of the stream in blocks of about INGEST_BLOCK_BYTES that end
+    on a line boundary, so each block parses on its own.
+    """
+    buffer = head
+    seen = len(head)
+    while True:
+        data = _read(stream, INGEST_BLOCK_BYTES, seen)
+        seen += len(data)
+        buffer += data
+        if not data:
+            if buffer.strip():
+                yield buffer
+            return
+        cut = buffer.rfind(b"\n")
+        if cut >= 0:
+            yield buffer[:cut + 1]
+            buffer = buffer[cut + 1:]
+
+
+def _parse_lines(block: bytes) -> List[dict]:
+    records = []
+    for line in block.splitlines():
+        if line.strip():
+            try:
+                records.append(json_codec.loads(line))
+            except ValueError as e:
+                raise ValueError(f"Invalid NDJSON record: {e}")
+    return records
+
+
+def _load_ndjson(head: bytes, stream: BinaryIO) -> list:
+    # Block by block, so decompression streams instead of materialising
+    # the whole upload
+    aggregated_scores = {}
+    detailed_results = []
+    first = True
+    for records in map(_parse_lines, _line_blocks(head, stream)):
+        if first and records:
+            if not isinstance(records[0], dict) or "detailed_results" in records[0]:
+                raise ValueError("Invalid RAGAS input: root must be a non-empty list")
+            if "aggregated_scores" in records[0] and "question" not in records[0]:
+                aggregated_scores = records[0]["aggregated_scores"] or {}
+                records = records[1:]
+            first = False
+        detailed_results.extend(records)
+
+    # Same shape as the JSON document, for the normalizer
+    return [{"aggregated_scores": aggregated_scores, "detailed_results": detailed_results}]
+
+
+def load_ragas(raw) -> list:
+    """
+    Parse a RAGAS upload: the JSON document (a list holding
+    aggregated_scores and detailed_results) or NDJSON (an optional
+    {"aggregated_scores": ...} header line, then one detailed_results
+    item per line), either of them plain, gzip- or zstd-compressed.
+    ``raw`` is bytes or a memory-mapped upload; an uncompressed JSON
+    document is parsed from it in place; NDJSON is parsed block by block.
+    """
+    stream = _open(raw)
+    head = _read(stream, _PEEK_BYTES, 0)
+    token = head.lstrip(_LEADING)[:1]
+
+    if not token:
+        raise ValueError("Invalid RAGAS input: empty upload")
+    if token == b"[":
+        return json_codec.loads(_read_all(head, stream) if _compressed(raw) else raw)
+
+    return _load_ndjson(head, stream)
@@ -0,0 +1,293 @@
+import dataclasses
+import glob
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from analyze.answer_attribution import AttributionReport, attribute_answers
+from analyze.keyword_analyzer import extract_keywords
+from analyze.llm_ranker import CONTEXT_RANK_FIELDS, TICKET_RANK_FIELDS, UNRANKED, rank_context_bi, rank_ragas_bi
+from evaluate.resolution_classifier import classify_resolution
+from export.exporter import BASE
+from jobs.job_cancellation import CancellationToken
+from jobs.job_progress import JobProgress
+from jobs.shard_queue import DONE, FAILED, ShardQueue
+from models.ragas_models import NormalizedRagasResult, RagasRecord
+from normalize.ragas_normalizer import normalize
+from settings import SHARD_POLL_SECONDS, SHARD_QUEUE_PATH, SHARD_RECORDS, SHARD_WAIT_TIMEOUT_SECONDS
+from utils import json_codec
+from utils.logger import get_logger
+from utils.rows import column, set_columns
+
+logger = get_logger(__name__)
+
+RECORD_STAGE = "shard record analysis"
+RANK_STAGE = "shard ranking"
+
+# Pipeline stages that only look at one record at a time; distributed
+# runs do them on the workers, in RECORD_STAGE
+RECORD_STAGES = ["normalization", "resolution classification", "keyword extraction", "answer attribution"]
+
+# Shard kinds, one queue phase each
+RECORDS = "records"
+RANKING = "ranking"
+
+_ATTRIBUTION_FIELDS = [f.name for f in dataclasses.fields(AttributionReport)]
+
+
+def _split(ragas_bi: Sequence[Dict], context_bi: Sequence[Dict], records: int) -> List[Tuple[List[int], List[int]]]:
+    """
+    (ticket row indices, context row indices) per shard: ``records``
+    consecutive tickets and all of their contexts.
+    """
+    shard_of = {ticket_id: i // records for i, ticket_id in enumerate(column(ragas_bi, "ticket_id"))}
+    shards = [([], []) for _ in range(-(-len(ragas_bi) // records))]
+    for i in range(len(ragas_bi)):
+        shards[i // records][0].append(i)
+    for i, ticket_id in enumerate(column(context_bi, "ticket_id")):
+        shards[shard_of[ticket_id]][1].append(i)
+    return shards
+
+
+def _write(path: str, payload: Dict):
+    with open(path + ".tmp", "wb") as f:
+        f.write(json_codec.dumps(payload))
+    os.replace(path + ".tmp", path)
+
+
+def _read(path: str) -> Dict:
+    with open(path, "rb") as f:
+        return json_codec.loads(f.read())
+
+
+def _shard_path(job_id: str, kind: str, shard: int) -> str:
+    return os.path.abspath(f"{BASE}/{job_id}_{kind}_shard_{shard:05d}.json")
+
+
+def shard_result_path(payload_path: str, attempt: int) -> str:
+    # One file per attempt: a worker that lost its lease never overwrites
+    # the result of the one that took the shard over
+    return payload_path[:-len(".json")] + f"_result_{attempt}.json"
+
+
+def _remove_shard_files(job_id: str, kind: str):
+    for path in glob.glob(f"{BASE}/{glob.escape(job_id)}_{kind}_shard_*"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _wait(queue: ShardQueue, key: str, total: int, progress: JobProgress, stage: str):
+    """
+    Block until all ``total`` shards under ``key`` are done, reporting
+    progress and honouring cancellation. A failed shard fails the job,
+    and so does the phase running past SHARD_WAIT_TIMEOUT_SECONDS (e.g.
+    when no worker is running).
+    """
+    deadline = time.monotonic() + SHARD_WAIT_TIMEOUT_SECONDS
+    done = -1
+    while done < total:
+        counts = queue.counts(key)
+        if counts[FAILED]:
+            raise ValueError(f"Distributed {stage} failed: " + "; ".join(queue.failures(key)))
+        if counts[DONE] != done:
+            done = counts[DONE]
+            progress.advance(stage, done, total, "shards")
+        elif progress.cancel:
+            progress.cancel.raise_if_cancelled()
+        if done < total:
+            if time.monotonic() > deadline:
+                raise TimeoutError(
+                    f"Distributed {stage} timed out after {SHARD_WAIT_TIMEOUT_SECONDS:g}s "
+                    f"with {done} of {total} shards done"
+                )
+            time.sleep(SHARD_POLL_SECONDS)
+
+
+@contextmanager
+def _run_shards(
+    job_id: str,
+    kind: str,
+    payloads: Iterable[Dict],
+    progress: JobProgress,
+    stage: str,
+    queue: Optional[ShardQueue] = None
+) -> Iterator[List[str]]:
+    """
+    Write one shard file per payload, queue them, wait for every shard
+    and yield their result paths in shard order. The shards (and any
+    worker still holding one) are dropped on exit, with their files.
+    """
+    queue = queue or ShardQueue(SHARD_QUEUE_PATH)
+    # Each phase queues under its own key, so shard numbers never clash
+    key = f"{job_id}/{kind}"
+    try:
+        paths = []
+        for n, payload in enumerate(payloads):
+            path = _shard_path(job_id, kind, n)
+            _write(path, {"kind": kind, **payload})
+            paths.append(path)
+
+        queue.enqueue(key, paths)
+        logger.info("Job %s: queued %d %s shards", job_id, len(paths), kind)
+        _wait(queue, key, len(paths), progress, stage)
+        yield queue.results(key)
+    finally:
+        queue.remove(key)
+        _remove_shard_files(job_id, kind)
+
+
+# --- Coordinator side ---
+
+def analyze_records_distributed(
+    job_id: str,
+    raw: list,
+    ticket_id: str,
+    progress: JobProgress,
+    queue: Optional[ShardQueue] = None
+) -> Tuple[NormalizedRagasResult, Dict[str, Dict], Dict[str, Dict], AttributionReport]:
+    """
+    Run the per-record stages (RECORD_STAGES) on shard workers, SHARD_RECORDS
+    results per shard, and merge the shards back in record order. Returns
+    what the local stages would: (normalized, resolution map, keyword info,
+    attribution).
+    """
+    if isinstance(raw, list) and raw:
+        items = raw[0].get("detailed_results", [])
+        raw = [{**raw[0], "detailed_results": []}]
+    else:
+        items = []
+    # Validates the input and maps the aggregated scores, as a local run does
+    normalized = normalize(raw, ticket_id=ticket_id)
+
+    payloads = (
+        {"ticket_id": ticket_id, "first": start, "items": items[start:start + SHARD_RECORDS]}
+        for start in range(0, len(items), SHARD_RECORDS)
+    )
+    resolution_map: Dict[str, Dict] = {}
+    keyword_info: Dict[str, Dict] = {}
+    attribution: Dict[str, list] = {name: [] for name in _ATTRIBUTION_FIELDS}
+    with _run_shards(job_id, RECORDS, payloads, progress, RECORD_STAGE, queue) as results:
+        del items
+        for path in results:
+            result = _read(path)
+            normalized.records.extend(RagasRecord.model_validate(r) for r in result["records"])
+            resolution_map.update(result["resolution"])
+            keyword_info.update(result["keywords"])
+            for name in _ATTRIBUTION_FIELDS:
+                attribution[name].extend(result["attribution"][name])
+
+    report = AttributionReport(
+        context_sentence_count=np.asarray(attribution["context_sentence_count"], dtype=np.int64),
+        attributed_sentence_count=np.asarray(attribution["attributed_sentence_count"], dtype=np.int64),
+        attributed_token_share=np.asarray(attribution["attributed_token_share"], dtype=np.float64),
+    )
+    return normalized, resolution_map, keyword_info, report
+
+
+def _merge_ticket_ranks(shard_ranks: List[List[list]]) -> Dict[Tuple[int, int], int]:
+    """
+    One job-wide ticket order from per-shard LLM ranks, keyed by (shard,
+    position in shard). Each shard's own order is kept and shards are
+    interleaved by relative position (every shard's first tenth before
+    any shard's second tenth), ties going to the earlier shard. Tickets
+    the LLM left unranked are left out.
+    """
+    keyed = []
+    for n, ranks in enumerate(shard_ranks):
+        ranked = sorted((rank, j) for j, (rank, _) in enumerate(ranks) if rank != UNRANKED)
+        for position, (_, j) in enumerate(ranked):
+            keyed.append(((position + 0.5) / len(ranked), n, j))
+    keyed.sort()
+    return {(n, j): rank for rank, (_, n, j) in enumerate(keyed, start=1)}
+
+
+def rank_distributed(
+    job_id: str,
+    ragas_bi: Sequence[Dict],
+    context_bi: Sequence[Dict],
+    progress: JobProgress,
+    queue: Optional[ShardQueue] = None
+):
+    """
+    Rank both BI tables on shard workers and set the ranks on the rows
+    (columns of spilled tables). The LLM ranks each shard's tickets among
+    themselves; the finalizer merges them into one job-wide ticket
+    order (see _merge_ticket_ranks). Context ranks are relative to their
+    ranking batch, as in local runs.
+    """
+    shards = _split(ragas_bi, context_bi, SHARD_RECORDS)
+    if not shards:
+        return
+
+    payloads = (
+        {
+            "tickets": [{f: ragas_bi[i][f] for f in TICKET_RANK_FIELDS} for i in tickets],
+            "contexts": [{f: context_bi[i][f] for f in CONTEXT_RANK_FIELDS} for i in contexts],
+        }
+        for tickets, contexts in shards
+    )
+    ticket_ranks = []
+    context_ranks = [UNRANKED] * len(context_bi)
+    context_reasons = ["Not ranked by LLM"] * len(context_bi)
+    with _run_shards(job_id, RANKING, payloads, progress, RANK_STAGE, queue) as results:
+        for (_, contexts), path in zip(shards, results):
+            ranks = _read(path)
+            ticket_ranks.append(ranks["tickets"])
+            for i, (rank, reason) in zip(contexts, ranks["contexts"]):
+                context_ranks[i] = rank
+                context_reasons[i] = reason
+    set_columns(context_bi, {"rank": context_ranks, "rank_reason": context_reasons})
+
+    order = _merge_ticket_ranks(ticket_ranks)
+    rank_column = [UNRANKED] * len(ragas_bi)
+    reason_column = ["Not ranked by LLM"] * len(ragas_bi)
+    for n, ((tickets, _), ranks) in enumerate(zip(shards, ticket_ranks)):
+        for j, (i, (rank, reason)) in enumerate(zip(tickets, ranks)):
+            rank_column[i] = order.get((n, j), rank)
+            reason_column[i] = reason
+    set_columns(ragas_bi, {"rank": rank_column, "rank_reason": reason_column})
+
+
+# --- Worker side ---
+
+def _analyze_records(payload: Dict, cancel: Optional[CancellationToken]) -> Dict:
+    normalized = normalize(
+        [{"detailed_results": payload["items"]}],
+        ticket_id=payload["ticket_id"],
+        first_index=payload["first"] + 1
+    )
+    resolution_map = classify_resolution(normalized)
+    keyword_info = extract_keywords(normalized)
+    if cancel:
+        cancel.raise_if_cancelled()
+    attribution = attribute_answers(normalized)
+    return {
+        "records": [r.model_dump() for r in normalized.records],
+        "resolution": resolution_map,
+        "keywords": keyword_info,
+        "attribution": {name: getattr(attribution, name).tolist() for name in _ATTRIBUTION_FIELDS},
+    }
+
+
+def _rank(payload: Dict, cancel: Optional[CancellationToken]) -> Dict:
+    tickets = rank_ragas_bi(payload["tickets"], cancel=cancel) if payload["tickets"] else []
+    contexts = rank_context_bi(payload["contexts"], cancel=cancel)
+    return {
+        "tickets": [[r["rank"], r["rank_reason"]] for r in tickets],
+        "contexts": [[r["rank"], r["rank_reason"]] for r in contexts],
+    }
+
+
+def run_shard(payload_path: str, result_path: str, cancel: Optional[CancellationToken] = None):
+    """
+    Worker side: process one shard (per-record analysis or ranking, by
+    its kind) and write the result, in payload order, to ``result_path``.
+    """
+    payload = _read(payload_path)
+    run = _analyze_records if payload["kind"] == RECORDS else _rank
+    _write(result_path, run(payload, cancel))
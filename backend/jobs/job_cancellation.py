@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict
+
+# How often a wait on in-flight work re-checks for cancellation
+_POLL_SECONDS = 0.05
+
+
+class JobCancelled(Exception):
+    """Raised at a checkpoint of a job that was cancelled."""
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation for one job: the API sets it, the pipeline
+    checks it between stages and batches and stops waiting on in-flight
+    work once it is set.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+    def wait_for(self, future: Future):
+        """
+        Result of ``future``, or JobCancelled as soon as the job is
+        cancelled. The abandoned work keeps running on its thread but
+        its result is never used.
+        """
+        while True:
+            self.raise_if_cancelled()
+            try:
+                return future.result(timeout=_POLL_SECONDS)
+            except FutureTimeout:
+                continue
+
+
+_TOKENS: Dict[str, CancellationToken] = {}
+_LOCK = threading.Lock()
+
+
+def cancellation_token(job_id: str) -> CancellationToken:
+    with _LOCK:
+        if job_id not in _TOKENS:
+            _TOKENS[job_id] = CancellationToken(job_id)
+        return _TOKENS[job_id]
+
+
+def request_cancellation(job_id: str) -> bool:
+    """
+    Cancel a job that holds a token (i.e. is running); False otherwise.
+    """
+    with _LOCK:
+        token = _TOKENS.get(job_id)
+    if token:
+        token.cancel()
+    return token is not None
+
+
+def release_token(job_id: str):
+    with _LOCK:
+        _TOKENS.pop(job_id, None)
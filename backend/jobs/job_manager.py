@@ -1,16 +1,25 @@
+import threading
 import uuid
 from datetime import datetime
 from jobs.job_models import Job
+from jobs.job_progress import publish, JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED
 
 _JOBS = {}
 
-def create_job() -> Job:
+# Status changes race between the DELETE route and the job's own thread
+_LOCK = threading.Lock()
+
+# Statuses a DELETE can still act on
+CANCELLABLE_STATUSES = ("queued", "processing", "cancelling")
+
+def create_job(parent_job_id: str | None = None, status: str = "processing") -> Job:
     job_id = str(uuid.uuid4())
     job = Job(
         job_id=job_id,
-        status="processing",
+        status=status,
         created_at=datetime.utcnow(),
-        outputs={}
+        outputs={},
+        parent_job_id=parent_job_id
     )
     _JOBS[job_id] = job
     return job
@@ -18,12 +27,44 @@ def create_job() -> Job:
 def get_job(job_id: str) -> Job | None:
     return _JOBS.get(job_id)
 
+def discard_job(job_id: str):
+    _JOBS.pop(job_id, None)
+
+def start_job(job_id: str):
+    with _LOCK:
+        job = _JOBS[job_id]
+        # Left as is when a DELETE already marked it cancelling
+        if job.status == "queued":
+            job.status = "processing"
+
+def mark_cancelling(job_id: str) -> bool:
+    """
+    Atomically mark a queued or running job as cancelling. False when
+    it has already completed, failed or been cancelled.
+    """
+    with _LOCK:
+        job = _JOBS.get(job_id)
+        if job is None or job.status not in CANCELLABLE_STATUSES:
+            return False
+        job.status = "cancelling"
+        return True
+
+def cancel_job(job_id: str):
+    with _LOCK:
+        job = _JOBS[job_id]
+        job.status = "cancelled"
+    publish(job_id, JOB_CANCELLED, status=job.status)
+
 def complete_job(job_id: str, outputs: dict):
-    job = _JOBS[job_id]
-    job.status = "completed"
-    job.outputs = outputs
+    with _LOCK:
+        job = _JOBS[job_id]
+        job.status = "completed"
+        job.outputs = outputs
+    publish(job_id, JOB_COMPLETED, status=job.status)
 
 def fail_job(job_id: str, error: str):
-    job = _JOBS[job_id]
-    job.status = "failed"
-    job.error = error
+    with _LOCK:
+        job = _JOBS[job_id]
+        job.status = "failed"
+        job.error = error
+    publish(job_id, JOB_FAILED, status=job.status, error=error)
@@ -8,3 +8,5 @@ class Job(BaseModel):
     created_at: datetime
     outputs: Optional[Dict[str, str]] = None
     error: Optional[str] = None
+    parent_job_id: Optional[str] = None
+    queue_position: Optional[int] = None
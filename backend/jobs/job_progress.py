@@ -0,0 +1,192 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from jobs.job_cancellation import CancellationToken
+from settings import JOB_EVENTS_RETENTION_SECONDS
+from utils.memory import rss_bytes
+
+# Event kinds
+JOB_QUEUED = "job_queued"
+STAGE_STARTED = "stage_started"
+STAGE_COMPLETED = "stage_completed"
+PROGRESS = "progress"
+JOB_COMPLETED = "job_completed"
+JOB_FAILED = "job_failed"
+JOB_CANCELLED = "job_cancelled"
+
+TERMINAL_EVENTS = {JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED}
+
+# job_id -> events in publish order; an event's id is its 1-based position
+_EVENTS: Dict[str, List[dict]] = {}
+# job_id -> terminal event of a finished job whose log has been pruned
+_PRUNED: Dict[str, dict] = {}
+# (prune after, job_id) of finished jobs, in finishing order
+_EXPIRY: Deque[Tuple[float, str]] = deque()
+# job_id -> (loop, event) of every request waiting for new events
+_WAITERS: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+_LOCK = threading.Lock()
+
+
+def publish(job_id: str, kind: str, **fields) -> dict:
+    """
+    Append an event to a job's log and wake its waiting listeners.
+    Safe to call from pipeline worker threads.
+    """
+    with _LOCK:
+        events = _EVENTS.setdefault(job_id, [])
+        event = {"id": len(events) + 1, "job_id": job_id, "kind": kind, "time": time.time(), **fields}
+        events.append(event)
+        waiters = list(_WAITERS.get(job_id, ()))
+        now = time.monotonic()
+        if kind in TERMINAL_EVENTS:
+            _EXPIRY.append((now + JOB_EVENTS_RETENTION_SECONDS, job_id))
+        _prune(now)
+
+    for loop, waiter in waiters:
+        loop.call_soon_threadsafe(waiter.set)
+    return event
+
+
+def _prune(now: float):
+    # Logs of jobs finished JOB_EVENTS_RETENTION_SECONDS ago shrink to
+    # their terminal event
+    while _EXPIRY and _EXPIRY[0][0] <= now:
+        _, job_id = _EXPIRY.popleft()
+        events = _EVENTS.pop(job_id, None)
+        if events:
+            _PRUNED[job_id] = events[-1]
+
+
+def _events_after(job_id: str, after: int) -> List[dict]:
+    if job_id in _PRUNED:
+        terminal = _PRUNED[job_id]
+        return [terminal] if terminal["id"] > after else []
+    return _EVENTS.get(job_id, [])[after:]
+
+
+def events_after(job_id: str, after: int = 0) -> List[dict]:
+    """
+    Events with id > ``after``. Once a finished job's log is pruned only
+    its terminal event is left.
+    """
+    with _LOCK:
+        return list(_events_after(job_id, after))
+
+
+def forget(job_id: str):
+    with _LOCK:
+        _EVENTS.pop(job_id, None)
+        _PRUNED.pop(job_id, None)
+
+
+def _finished(job_id: str) -> bool:
+    if job_id in _PRUNED:
+        return True
+    events = _EVENTS.get(job_id)
+    return bool(events) and events[-1]["kind"] in TERMINAL_EVENTS
+
+
+def finished(job_id: str) -> bool:
+    """Whether the job's terminal event has been published."""
+    with _LOCK:
+        return _finished(job_id)
+
+
+async def wait_for_events(job_id: str, after: int, timeout: float) -> List[dict]:
+    """
+    Events with id > ``after``, waiting up to ``timeout`` seconds for the
+    first one. Only a running job is waited on: when there are new events
+    or the job has finished this returns at once, so an empty list means
+    either the wait timed out or nothing more will come (see ``finished``).
+    """
+    loop = asyncio.get_running_loop()
+    waiter = asyncio.Event()
+    with _LOCK:
+        events = _events_after(job_id, after)
+        if events or _finished(job_id):
+            return list(events)
+        _WAITERS.setdefault(job_id, set()).add((loop, waiter))
+
+    try:
+        await asyncio.wait_for(waiter.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        with _LOCK:
+            _WAITERS.get(job_id, set()).discard((loop, waiter))
+
+    return events_after(job_id, after)
+
+
+class JobProgress:
+    """
+    Publishes one run's progress: stage started/completed events for a
+    known list of stages and batch progress (done/total with an ETA)
+    inside long-running stages. Every report is also a cancellation
+    checkpoint when a ``cancel`` token is given.
+    """
+
+    def __init__(self, job_id: str, stages: List[str], cancel: Optional[CancellationToken] = None):
+        self.job_id = job_id
+        self.stages = stages
+        self.cancel = cancel
+        self._stage_started: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _stage_event(self, kind: str, stage: str, **fields) -> dict:
+        return publish(
+            self.job_id,
+            kind,
+            stage=stage,
+            stage_index=self.stages.index(stage) + 1,
+            stage_count=len(self.stages),
+            **fields
+        )
+
+    def start(self, stage: Optional[str] = None):
+        stage = stage or self.stages[0]
+        with self._lock:
+            self._stage_started[stage] = time.monotonic()
+        self._stage_event(STAGE_STARTED, stage)
+
+    def complete(self, stage: str):
+        """
+        Mark ``stage`` done (printing the usual completion line) and the
+        next stage started. The event carries the process RSS at that point.
+        """
+        with self._lock:
+            started = self._stage_started.pop(stage, None)
+        elapsed = round(time.monotonic() - started, 3) if started is not None else None
+        self._stage_event(STAGE_COMPLETED, stage, elapsed_seconds=elapsed, rss_bytes=rss_bytes())
+        print(f"✓ Completed {stage}")
+        self._checkpoint()
+
+        i = self.stages.index(stage) + 1
+        if i < len(self.stages):
+            self.start(self.stages[i])
+
+    def advance(self, stage: str, done: int, total: int, unit: str, item: Optional[str] = None):
+        """
+        ``done`` of ``total`` units of ``stage`` processed (optionally of a
+        named ``item``, e.g. one of several tables). The ETA extrapolates
+        the stage's rate so far.
+        """
+        with self._lock:
+            started = self._stage_started.get(stage)
+        elapsed = time.monotonic() - started if started is not None else None
+        eta = None
+        if elapsed is not None and 0 < done < total:
+            eta = round(elapsed / done * (total - done), 1)
+
+        fields = {"item": item} if item else {}
+        self._stage_event(
+            PROGRESS, stage, done=done, total=total, unit=unit, eta_seconds=eta, **fields
+        )
+        self._checkpoint()
+
+    def _checkpoint(self):
+        if self.cancel:
+            self.cancel.raise_if_cancelled()
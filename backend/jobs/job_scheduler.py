@@ -0,0 +1,223 @@
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from settings import (
+    MAX_CONCURRENT_JOBS,
+    MAX_QUEUED_JOBS,
+    MAX_INFLIGHT_BYTES,
+    JOB_AGING_RATE,
+    JOB_BYTES_PER_SECOND,
+    JOB_STATS_WINDOW,
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STAT_PERCENTILES = {"p50": 50, "p90": 90, "p99": 99}
+
+
+class JobRejected(Exception):
+    """
+    A job that cannot be admitted now (``retry_after`` seconds is a
+    guess at when it could be) or ever (``retry_after`` is None).
+    """
+
+    def __init__(self, reason: str, retry_after: Optional[int], queue_position: Optional[int] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+        self.queue_position = queue_position
+
+
+@dataclass
+class _QueuedJob:
+    job_id: str
+    size_bytes: int
+    run: Callable[[], bool]
+    estimate_seconds: float
+    queued_at: float = field(default_factory=time.monotonic)
+
+    def priority(self, now: float) -> float:
+        # Shortest estimated job first; waiting earns credit so large
+        # jobs are not starved by a steady stream of small ones
+        return self.estimate_seconds - JOB_AGING_RATE * (now - self.queued_at)
+
+
+def _percentiles(values) -> Dict[str, Optional[float]]:
+    if not values:
+        return {name: None for name in STAT_PERCENTILES}
+    points = np.percentile(np.fromiter(values, dtype=np.float64), list(STAT_PERCENTILES.values()))
+    return {name: round(float(v), 3) for name, v in zip(STAT_PERCENTILES, points)}
+
+
+class JobScheduler:
+    """
+    Admission control and size-aware scheduling for pipeline runs.
+
+    At most ``max_running`` jobs run at once. Waiting jobs start
+    shortest-estimated-first, where the estimate is the input size over
+    the throughput observed so far, minus an aging credit. Admission
+    fails when the queue is full or the input bytes of running plus
+    queued jobs (compressed uploads at their decompressed size) would
+    exceed ``max_inflight_bytes``.
+    """
+
+    def __init__(
+        self,
+        max_running: int = MAX_CONCURRENT_JOBS,
+        max_queued: int = MAX_QUEUED_JOBS,
+        max_inflight_bytes: int = MAX_INFLIGHT_BYTES
+    ):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.max_inflight_bytes = max_inflight_bytes
+
+        self._lock = threading.Lock()
+        self._queue: Dict[str, _QueuedJob] = {}
+        self._running: Dict[str, int] = {}
+        self._bytes_per_second = float(JOB_BYTES_PER_SECOND)
+
+        self._wait_seconds = deque(maxlen=JOB_STATS_WINDOW)
+        self._run_seconds = deque(maxlen=JOB_STATS_WINDOW)
+        self._rejected = 0
+        self._completed = 0
+
+    # --- Admission ---
+
+    def _inflight_bytes(self) -> int:
+        return sum(self._running.values()) + sum(j.size_bytes for j in self._queue.values())
+
+    def _retry_after(self) -> int:
+        # Time for the jobs ahead to drain at the median run time
+        typical = np.median(self._run_seconds) if self._run_seconds else 30.0
+        ahead = len(self._queue) + len(self._running)
+        return int(min(max(math.ceil(typical * ahead / self.max_running), 1), 600))
+
+    def check(self, size_bytes: int):
+        """
+        Raise JobRejected if a job of ``size_bytes`` would not be
+        admitted right now. Lets callers refuse before reading a body.
+        """
+        with self._lock:
+            self._check(size_bytes)
+
+    def _check(self, size_bytes: int):
+        if size_bytes > self.max_inflight_bytes:
+            self._rejected += 1
+            raise JobRejected(
+                f"Input of {size_bytes} bytes exceeds the {self.max_inflight_bytes} byte limit",
+                retry_after=None
+            )
+        saturated = self._inflight_bytes() + size_bytes > self.max_inflight_bytes
+        if len(self._queue) >= self.max_queued or saturated:
+            self._rejected += 1
+            raise JobRejected(
+                "Job queue is full" if not saturated else "Too many input bytes in flight",
+                retry_after=self._retry_after(),
+                queue_position=len(self._queue) + 1
+            )
+
+    def submit(self, job_id: str, size_bytes: int, run: Callable[[], bool]) -> int:
+        """
+        Queue ``run`` (the job's whole pipeline, returning whether it ran
+        to completion) and start whatever can start. Returns the job's
+        queue position, 0 once it is running.
+        """
+        with self._lock:
+            self._check(size_bytes)
+            self._queue[job_id] = _QueuedJob(
+                job_id, size_bytes, run, estimate_seconds=size_bytes / self._bytes_per_second
+            )
+            self._dispatch()
+            return self._position(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Callable[[], bool]]:
+        """
+        Drop a job that has not started yet and return its ``run``, for
+        the caller to let it clean up; None if it is not waiting.
+        """
+        with self._lock:
+            job = self._queue.pop(job_id, None)
+        return job.run if job else None
+
+    # --- Scheduling ---
+
+    def _ordered(self):
+        now = time.monotonic()
+        return sorted(self._queue.values(), key=lambda j: (j.priority(now), j.queued_at))
+
+    def _position(self, job_id: str) -> int:
+        if job_id not in self._queue:
+            return 0
+        return [j.job_id for j in self._ordered()].index(job_id) + 1
+
+    def position(self, job_id: str) -> Optional[int]:
+        """
+        1-based position among waiting jobs, 0 while running, None for
+        jobs the scheduler no longer tracks.
+        """
+        with self._lock:
+            if job_id in self._running:
+                return 0
+            return self._position(job_id) if job_id in self._queue else None
+
+    def _dispatch(self):
+        # Caller holds the lock
+        while self._queue and len(self._running) < self.max_running:
+            job = self._ordered()[0]
+            del self._queue[job.job_id]
+            self._running[job.job_id] = job.size_bytes
+            self._wait_seconds.append(time.monotonic() - job.queued_at)
+            threading.Thread(
+                target=self._run, args=(job,), name=f"job-{job.job_id}", daemon=True
+            ).start()
+
+    def _run(self, job: _QueuedJob):
+        started = time.monotonic()
+        completed = False
+        try:
+            completed = job.run()
+        except Exception:
+            logger.exception("Job %s raised outside its pipeline", job.job_id)
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                del self._running[job.job_id]
+                # Cancelled or failed runs stop early, so they would skew
+                # the run times behind Retry-After and the throughput
+                if completed:
+                    self._run_seconds.append(elapsed)
+                    self._completed += 1
+                    if job.size_bytes and elapsed > 0:
+                        # Smoothed throughput of full runs feeds the next size estimates
+                        self._bytes_per_second = 0.8 * self._bytes_per_second + 0.2 * job.size_bytes / elapsed
+                self._dispatch()
+
+    # --- Reporting ---
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "running": len(self._running),
+                "queued": len(self._queue),
+                "inflight_bytes": self._inflight_bytes(),
+                "limits": {
+                    "max_running": self.max_running,
+                    "max_queued": self.max_queued,
+                    "max_inflight_bytes": self.max_inflight_bytes,
+                },
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "estimated_bytes_per_second": round(self._bytes_per_second, 1),
+                "queue_wait_seconds": _percentiles(self._wait_seconds),
+                "run_seconds": _percentiles(self._run_seconds),
+            }
+
+
+scheduler = JobScheduler()
@@ -0,0 +1,215 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from settings import SHARD_LEASE_SECONDS, SHARD_MAX_ATTEMPTS
+
+# Shard states
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    job_id TEXT NOT NULL,
+    shard INTEGER NOT NULL,
+    payload_path TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    result_path TEXT,
+    error TEXT,
+    enqueued_at REAL NOT NULL,
+    PRIMARY KEY (job_id, shard)
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS shards_by_state ON shards (state, enqueued_at)"
+
+
+@dataclass
+class ShardLease:
+    """A shard claimed by one worker until ``expires`` (unless renewed)."""
+
+    job_id: str
+    shard: int
+    payload_path: str
+    attempt: int
+    worker: str
+    expires: float
+
+
+class ShardQueue:
+    """
+    Work queue of job shards in a SQLite file that every coordinator and
+    worker opens, possibly from several hosts over a shared filesystem.
+
+    A worker claims a shard under a lease and must renew it while it
+    works. A shard whose lease runs out (the worker died or hung) is
+    handed to the next claimant; after ``max_attempts`` claims it fails.
+    Only the current leaseholder can complete or fail a shard.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: float = SHARD_LEASE_SECONDS,
+        max_attempts: int = SHARD_MAX_ATTEMPTS
+    ):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(_SCHEMA)
+            conn.execute(_INDEX)
+
+    @contextmanager
+    def _transaction(self):
+        # One short-lived connection per operation: safe across threads,
+        # and BEGIN IMMEDIATE serializes writers across processes / hosts
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    # --- Coordinator side ---
+
+    def enqueue(self, job_id: str, payload_paths: List[str]):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO shards (job_id, shard, payload_path, state, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, i, path, QUEUED, now) for i, path in enumerate(payload_paths)]
+            )
+
+    def counts(self, job_id: str) -> Dict[str, int]:
+        """Shards of a job per state, expired leases counted as queued."""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                """
+                SELECT CASE WHEN state = ? AND lease_expires < ? THEN ? ELSE state END, COUNT(*)
+                FROM shards WHERE job_id = ? GROUP BY 1
+                """,
+                (LEASED, time.time(), QUEUED, job_id)
+            ).fetchall()
+        counts = {state: 0 for state in (QUEUED, LEASED, DONE, FAILED)}
+        counts.update(dict(rows))
+        return counts
+
+    def results(self, job_id: str) -> List[str]:
+        """Result paths of a job's shards in shard order (all must be done)."""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT state, result_path FROM shards WHERE job_id = ? ORDER BY shard", (job_id,)
+            ).fetchall()
+        if any(state != DONE for state, _ in rows):
+            raise ValueError(f"Job {job_id} has unfinished shards")
+        return [path for _, path in rows]
+
+    def failures(self, job_id: str) -> List[str]:
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT shard, error FROM shards WHERE job_id = ? AND state = ? ORDER BY shard",
+                (job_id, FAILED)
+            ).fetchall()
+        return [f"shard {shard}: {error}" for shard, error in rows]
+
+    def remove(self, job_id: str):
+        """
+        Drop a job's shards (finished, failed or cancelled). Workers still
+        holding one find their lease gone and abandon it.
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM shards WHERE job_id = ?", (job_id,))
+
+    # --- Worker side ---
+
+    def pending(self) -> int:
+        """Shards of all jobs not yet done or failed (waiting or leased)."""
+        with self._transaction() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM shards WHERE state IN (?, ?)", (QUEUED, LEASED)
+            ).fetchone()[0]
+
+    def claim(self, worker: str) -> Optional[ShardLease]:
+        """
+        Lease the oldest waiting shard (or one whose lease expired) to
+        ``worker``; None when there is nothing to do.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            # Expired leases that used up their attempts fail instead of retrying
+            conn.execute(
+                """
+                UPDATE shards SET state = ?, worker = NULL,
+                    error = 'lease expired on attempt ' || attempts || ' (last worker ' || worker || ')'
+                WHERE state = ? AND lease_expires < ? AND attempts >= ?
+                """,
+                (FAILED, LEASED, now, self.max_attempts)
+            )
+            row = conn.execute(
+                """
+                SELECT job_id, shard, payload_path, attempts FROM shards
+                WHERE state = ? OR (state = ? AND lease_expires < ?)
+                ORDER BY enqueued_at, job_id, shard LIMIT 1
+                """,
+                (QUEUED, LEASED, now)
+            ).fetchone()
+            if row is None:
+                return None
+
+            job_id, shard, payload_path, attempts = row
+            expires = now + self.lease_seconds
+            conn.execute(
+                """
+                UPDATE shards SET state = ?, worker = ?, lease_expires = ?, attempts = attempts + 1
+                WHERE job_id = ? AND shard = ?
+                """,
+                (LEASED, worker, expires, job_id, shard)
+            )
+        return ShardLease(job_id, shard, payload_path, attempts + 1, worker, expires)
+
+    def _update_leased(self, lease: ShardLease, assignments: str, values: tuple) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"""
+                UPDATE shards SET {assignments}
+                WHERE job_id = ? AND shard = ? AND state = ? AND worker = ? AND attempts = ?
+                """,
+                (*values, lease.job_id, lease.shard, LEASED, lease.worker, lease.attempt)
+            )
+            return cursor.rowcount == 1
+
+    def renew(self, lease: ShardLease) -> bool:
+        """Extend a lease; False once it was lost (expired and reclaimed, or removed)."""
+        expires = time.time() + self.lease_seconds
+        if not self._update_leased(lease, "lease_expires = ?", (expires,)):
+            return False
+        lease.expires = expires
+        return True
+
+    def complete(self, lease: ShardLease, result_path: str) -> bool:
+        return self._update_leased(lease, "state = ?, result_path = ?, error = NULL", (DONE, result_path))
+
+    def fail(self, lease: ShardLease, error: str) -> bool:
+        """
+        Give a shard back after an error: it is retried until it has
+        used ``max_attempts`` claims, then fails the job.
+        """
+        state = FAILED if lease.attempt >= self.max_attempts else QUEUED
+        return self._update_leased(
+            lease, "state = ?, worker = NULL, lease_expires = NULL, error = ?", (state, error)
+        )
@@ -1,6 +1,16 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from api.routes import router
+from utils import json_codec
 
-app = FastAPI(title="RAGAS BI Analytics")
+
+class CodecJSONResponse(JSONResponse):
+    """JSON responses encoded by utils.json_codec."""
+
+    def render(self, content) -> bytes:
+        return json_codec.dumps(content)
+
+
+app = FastAPI(title="RAGAS BI Analytics", default_response_class=CodecJSONResponse)
 
 app.include_router(router, prefix="/api")
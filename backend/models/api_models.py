@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Literal
+from typing import Optional, Dict, List, Literal, Union
 
 
 # -------- Upload Response --------
@@ -15,6 +15,7 @@ class JobStatusResponse(BaseModel):
     status: Literal["processing", "completed", "failed"]
     outputs: Optional[Dict[str, str]] = None
     error: Optional[str] = None
+    parent_job_id: Optional[str] = None
 
 
 # -------- Error Response --------
@@ -22,3 +23,107 @@ class ErrorResponse(BaseModel):
     status: Literal["error"]
     message: str
     details: Optional[str] = None
+
+
+# -------- Token Savings Simulation --------
+class TokenSavingsPolicy(BaseModel):
+    kind: Literal[
+        "drop_flagged",
+        "min_ground_truth_coverage",
+        "max_tokens_per_ticket",
+        "top_k_by_relevance"
+    ]
+    value: Optional[float] = None
+    name: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        if self.name:
+            return self.name
+        return self.kind if self.value is None else f"{self.kind}={self.value:g}"
+
+
+class TokenSavingsRequest(BaseModel):
+    policies: List[TokenSavingsPolicy]
+    include_tickets: bool = False
+
+
+# -------- Full-text Search --------
+SearchKind = Literal["question", "ground_truth", "rag_answer", "context"]
+
+
+# -------- Keyword Index --------
+KeywordRole = Literal[
+    "question",
+    "ground_truth",
+    "rag_answer",
+    "missing_answer",
+    "missing_context",
+    "context",
+    "overlapping_question",
+    "overlapping_ground_truth",
+    "overlapping_answer",
+    "missing_question",
+    "missing_ground_truth"
+]
+
+
+# -------- Downloads --------
+ExportFormat = Literal["csv", "parquet", "arrow"]
+
+
+# -------- Table Queries --------
+FilterValue = Union[bool, int, float, str]
+
+
+class ColumnFilter(BaseModel):
+    column: str
+    op: Literal[
+        "eq", "ne", "lt", "le", "gt", "ge",
+        "in", "not_in",
+        "in_range", "not_in_range",
+        "contains",
+        "is_null", "not_null"
+    ]
+    value: Optional[Union[FilterValue, List[FilterValue]]] = None
+
+
+class SortKey(BaseModel):
+    column: str
+    descending: bool = False
+
+
+class TableQueryRequest(BaseModel):
+    filters: List[ColumnFilter] = []
+    columns: Optional[List[str]] = None
+    sort: List[SortKey] = []
+    limit: int = 100
+    cursor: Optional[str] = None
+
+
+class Aggregation(BaseModel):
+    function: Literal["count", "mean", "sum", "min", "max", "median", "std"]
+    column: Optional[str] = None
+    name: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        if self.name:
+            return self.name
+        return self.function if self.column is None else f"{self.function}_{self.column}"
+
+
+class AggregateRequest(BaseModel):
+    filters: List[ColumnFilter] = []
+    group_by: List[str] = []
+    aggregations: List[Aggregation]
+    sort: List[SortKey] = []
+    limit: int = 1000
+
+
+class HistogramRequest(BaseModel):
+    column: str
+    bins: int = 10
+    low: Optional[float] = None
+    high: Optional[float] = None
+    filters: List[ColumnFilter] = []
@@ -23,6 +23,7 @@ class RagasMetrics(BaseModel):
 # -------- One Evaluation Record --------
 class RagasRecord(BaseModel):
     ticket_id: str
+    question_hash: str
     question: str
     ground_truth: str
     rag_answer: str
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+
+
+# -------- Classification Thresholds --------
+class ClassificationThresholds(BaseModel):
+    # Resolution category (per question)
+    hallucination_max_faithfulness: float = 0.7
+    hallucination_max_context_precision: float = 0.5
+    retrieval_failure_max_context_recall: float = 0.6
+    retrieval_failure_max_context_entity_recall: float = 0.4
+    noise_max_context_precision: float = 0.5
+    bad_prompt_min_context_recall: float = 0.8
+    bad_prompt_max_answer_correctness: float = 0.6
+
+    # Context usefulness / drop (per context)
+    entity_match_min_weighted_coverage: float = 0.1
+    useful_min_question_coverage_pct: float = 15
+    useful_min_faithfulness: float = 0.7
+    useful_max_context_recall: float = 0.6
+    drop_max_context_precision: float = 0.5
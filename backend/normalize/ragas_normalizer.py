@@ -7,6 +7,7 @@ from models.ragas_models import (
     RagasMetrics,
     NormalizedContext
 )
+from utils.text_utils import question_hash
 
 def _safe_float(value, default=0.0):
     if value is None:
@@ -18,11 +19,13 @@ def _safe_float(value, default=0.0):
 
 def normalize(
     raw: List[Dict[str, Any]],
-    ticket_id: str
+    ticket_id: str,
+    first_index: int = 1
 ) -> NormalizedRagasResult:
     """
     Normalize raw RAGAS JSON input into a deterministic internal structure.
-    ticket_id is provided by the application layer.
+    ticket_id is provided by the application layer. Records are numbered
+    from ``first_index``, so a slice of the results keeps its ticket ids.
     """
 
     if not isinstance(raw, list) or len(raw) == 0:
@@ -37,7 +40,7 @@ def normalize(
 
     records: List[RagasRecord] = []
 
-    for idx, item in enumerate(root.get("detailed_results", []), start=1):
+    for idx, item in enumerate(root.get("detailed_results", []), start=first_index):
         ticket_id = f"question_{idx}"
 
         question = item.get("question", "").strip()
@@ -78,6 +81,7 @@ def normalize(
         records.append(
             RagasRecord(
                 ticket_id=ticket_id,
+                question_hash=question_hash(question),
                 question=question,
                 ground_truth=ground_truth,
                 rag_answer=rag_answer,
@@ -1,59 +1,637 @@
 import uuid
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional
+import numpy as np
 from ingest.ragas_loader import load_ragas
 from normalize.ragas_normalizer import normalize
-from evaluate.resolution_classifier import classify_resolution
+from models.ragas_models import NormalizedRagasResult, RagasRecord
+from evaluate.resolution_classifier import METRIC_NAMES, classify_resolution, metric_arrays
 from analyze.keyword_analyzer import extract_keywords
-from analyze.context_analyzer import analyze_contexts
-from flatten.ragas_bi_flattener import build_ragas_bi
+from analyze.keyword_coverage import build_keyword_coverage, merge_keyword_coverage
+from analyze.relevance_scorer import score_relevance, hash_relevance, score_relevance_batches
+from analyze.duplicate_detector import detect_duplicates, context_signatures, cluster_duplicates
+from analyze.answer_attribution import AttributionReport, attribute_answers
+from analyze.coverage_curves import (
+    compute_coverage_curves, context_counts, context_token_counts, curves_from_counts
+)
+from analyze.keyword_index import build_keyword_index
+from analyze.context_analyzer import analyze_contexts, iter_context_rows
+from analyze.token_savings import build_savings_inputs, simulate_policies, DEFAULT_POLICIES
+from flatten.ragas_bi_flattener import build_ragas_bi, iter_ragas_bi_rows
 from flatten.context_bi_flattener import build_context_bi
-from export.exporter import export_outputs
+from evaluate.metric_evaluator import evaluate_metrics, summarize_metrics
+from evaluate.reclassifier import build_classification_inputs, reclassify
+from export.exporter import export_outputs, export_derived_outputs, export_artifacts, load_artifact
+from export.array_store import save_arrays, load_arrays
+from models.threshold_models import ClassificationThresholds
+from analyze.context_analyzer import USEFUL_REASON, NOT_USEFUL_REASON
+from analyze.token_savings import SavingsInputs
+from analyze.dashboard_summary import build_dashboard_summary
 from analyze.llm_ranker import rank_ragas_bi, rank_context_bi
+from jobs.job_progress import STAGE_COMPLETED, JobProgress, events_after
+from jobs.job_cancellation import CancellationToken
+from jobs.distributed import (
+    RANK_STAGE, RECORD_STAGE, RECORD_STAGES, analyze_records_distributed, rank_distributed
+)
+from export.spill import SpilledArrays, SpilledRows
+from settings import CHUNKED_BATCH_SIZE, CHUNKED_MINHASH_BYTES, EXPORT_BATCH_SIZE, PIPELINE_MODE
+from utils.logger import get_logger
+from utils.memory import MemoryPlan, PeakRss
+from utils.rows import column
 
+logger = get_logger(__name__)
 
-def run_pipeline(job_id: str, raw_bytes: bytes) -> dict:
-    #Load raw RAGAS JSON
-    raw = load_ragas(raw_bytes)
+PIPELINE_STAGES = [
+    "normalization",
+    "resolution classification",
+    "metric evaluation",
+    "keyword extraction",
+    "keyword coverage",
+    "keyword index",
+    "relevance scoring",
+    "duplicate detection",
+    "answer attribution",
+    "coverage curves",
+    "context analysis",
+    "token-savings simulation",
+    "dashboard summary",
+    "RAGAS BI ranking",
+    "Context BI ranking",
+    "export",
+]
 
+# PIPELINE_MODE=distributed: the per-record stages and both rankings run
+# on shard workers, the job-level stages on the coordinator
+DISTRIBUTED_PIPELINE_STAGES = (
+    [RECORD_STAGE]
+    + [s for s in PIPELINE_STAGES[:-3] if s not in RECORD_STAGES]
+    + [RANK_STAGE, "export"]
+)
+
+# Chunked mode: the per-record stages run batch by batch as one stage,
+# the job-level stages then read the batches' results
+CHUNKED_RECORD_STAGE = "record batches"
+CHUNKED_JOB_STAGES = [
+    "metric evaluation",
+    "keyword coverage",
+    "keyword index",
+    "relevance scoring",
+    "duplicate detection",
+    "coverage curves",
+    "context analysis",
+    "token-savings simulation",
+    "dashboard summary",
+]
+CHUNKED_PIPELINE_STAGES = [CHUNKED_RECORD_STAGE] + CHUNKED_JOB_STAGES + PIPELINE_STAGES[-3:]
+DISTRIBUTED_CHUNKED_PIPELINE_STAGES = (
+    [RECORD_STAGE, CHUNKED_RECORD_STAGE] + CHUNKED_JOB_STAGES + [RANK_STAGE, "export"]
+)
+
+RECLASSIFICATION_STAGES = [
+    "reclassification",
+    "metric evaluation",
+    "token-savings simulation",
+    "dashboard summary",
+    "export",
+]
+
+
+def _export_progress(progress: JobProgress):
+    # Rows written per BI table
+    return lambda table, done, total: progress.advance("export", done, total, "rows", item=table)
+
+
+def _stages(distributed: bool, chunked: bool) -> List[str]:
+    if chunked:
+        return DISTRIBUTED_CHUNKED_PIPELINE_STAGES if distributed else CHUNKED_PIPELINE_STAGES
+    return DISTRIBUTED_PIPELINE_STAGES if distributed else PIPELINE_STAGES
+
+
+def run_pipeline(job_id: str, raw_bytes: bytes, cancel: Optional[CancellationToken] = None) -> dict:
+    distributed = PIPELINE_MODE == "distributed"
+
+    #Jobs over the memory budget run chunked (see _run_chunked_stages).
+    #Decided from the upload size, before anything is parsed
+    plan = MemoryPlan.for_upload(raw_bytes)
+    if plan.chunked:
+        logger.info(
+            "Job %s: estimated %.1f MB exceeds the %.1f MB budget, running chunked",
+            job_id, plan.estimated_bytes / 1024 ** 2, plan.budget_bytes / 1024 ** 2
+        )
+
+    # Every stage / batch report is also a cancellation checkpoint
+    progress = JobProgress(job_id, _stages(distributed, plan.chunked), cancel)
+    progress.start()
+
+    with PeakRss() as rss:
+        run_stages = _run_chunked_stages if plan.chunked else _run_stages
+        outputs = run_stages(job_id, raw_bytes, progress, cancel, distributed)
+
+    #Peak resident memory of the run, next to the RSS after each stage
+    memory_report = {
+        "budget_bytes": plan.budget_bytes,
+        "estimated_bytes": plan.estimated_bytes,
+        "chunked": plan.chunked,
+        "start_rss_bytes": rss.start_bytes,
+        "peak_rss_bytes": rss.peak_bytes,
+        "stage_rss_bytes": {
+            e["stage"]: e["rss_bytes"] for e in events_after(job_id) if e["kind"] == STAGE_COMPLETED
+        },
+    }
+    outputs.update(export_artifacts(job_id, {"memory_report": memory_report}))
+    logger.info(
+        "Job %s: peak RSS %.1f MB (%s mode)",
+        job_id, rss.peak_bytes / 1024 ** 2, "chunked" if plan.chunked else "in-memory"
+    )
+
+    return outputs
+
+
+def _run_stages(
+    job_id: str,
+    raw_bytes: bytes,
+    progress: JobProgress,
+    cancel: Optional[CancellationToken],
+    distributed: bool
+) -> dict:
     # Generate tracking ID for this upload
     ticket_id = str(uuid.uuid4())
 
-    #Normalize RAGAS results
-    normalized = normalize(raw, ticket_id=ticket_id)
-    print("✓ Completed normalization")
+    if distributed:
+        #Normalization, classification, keyword extraction and attribution,
+        #shard by shard on the workers
+        normalized, resolution_map, keyword_info, attribution = analyze_records_distributed(
+            job_id, load_ragas(raw_bytes), ticket_id, progress
+        )
+        progress.complete(RECORD_STAGE)
+    else:
+        #Load raw RAGAS JSON
+        raw = load_ragas(raw_bytes)
+
+        #Normalize RAGAS results
+        normalized = normalize(raw, ticket_id=ticket_id)
+        del raw
+        progress.complete("normalization")
 
     #Resolution classification (PER QUESTION)
-    resolution_map = classify_resolution(normalized)
-    print("✓ Completed resolution classification")
+    if not distributed:
+        resolution_map = classify_resolution(normalized)
+        progress.complete("resolution classification")
+
+    #Job-level metric statistics
+    metric_summary = evaluate_metrics(normalized, resolution_map)
+    progress.complete("metric evaluation")
 
     #Keyword extraction
-    keyword_info = extract_keywords(normalized)
-    print("✓ Completed keyword extraction")
+    if not distributed:
+        keyword_info = extract_keywords(normalized)
+        progress.complete("keyword extraction")
+
+    #Sparse keyword coverage for all (ticket, context) pairs
+    coverage = build_keyword_coverage(normalized, keyword_info)
+    progress.complete("keyword coverage")
+
+    #Inverted keyword index (keyword -> tickets / contexts per role)
+    ticket_ids = [r.ticket_id for r in normalized.records]
+    save_arrays(
+        job_id,
+        "keyword_index",
+        build_keyword_index(
+            coverage,
+            ticket_ids,
+            [ctx.context_id for r in normalized.records for ctx in r.contexts]
+        )
+    )
+    progress.complete("keyword index")
+
+    #BM25 relevance of contexts against question, ground truth and answer
+    relevance = score_relevance(normalized)
+    progress.complete("relevance scoring")
+
+    #Near-duplicate contexts (MinHash / LSH)
+    duplicates = detect_duplicates(normalized)
+    progress.complete("duplicate detection")
+
+    #Sentence-level answer attribution
+    if not distributed:
+        attribution = attribute_answers(normalized)
+        progress.complete("answer attribution")
+
+    #Top-k cutoff curves (cumulative coverage vs retrieval depth)
+    curves = compute_coverage_curves(normalized, coverage)
+    progress.complete("coverage curves")
 
     #Context analysis (usefulness, token waste)
-    contexts = analyze_contexts(normalized, keyword_info)
-    print("✓ Completed context analysis")
+    contexts = analyze_contexts(
+        normalized, coverage, relevance, duplicates, attribution, curves
+    )
+    del duplicates, attribution
+    progress.complete("context analysis")
+
+    #Build Context BI table
+    context_bi = build_context_bi(
+        contexts=contexts,
+        keyword_info=keyword_info
+    )
+    del keyword_info
+
+    #Columns needed to reclassify this job under other thresholds
+    classification_inputs = build_classification_inputs(metric_arrays(normalized), coverage, relevance)
+    save_arrays(job_id, "classification_inputs", classification_inputs)
+    del relevance
+
+    savings_summary, savings_by_ticket, dashboard_summary = _job_summaries(
+        job_id, classification_inputs, coverage, contexts, ticket_ids, resolution_map, progress
+    )
+    del classification_inputs
 
     #Build RAGAS BI table
     ragas_bi = build_ragas_bi(
         normalized=normalized,
         resolution=resolution_map,
-        contexts=contexts,
-        keyword_info=keyword_info
+        contexts=contexts
     )
+    del normalized, resolution_map, contexts
 
-    #LLM ranking for RAGAS BI
-    ragas_bi = rank_ragas_bi(ragas_bi)
-    print("✓ Completed RAGAS BI ranking")
+    return _rank_and_export(
+        job_id,
+        ragas_bi,
+        context_bi,
+        coverage,
+        tables={
+            "coverage_curve": curves.table,
+            "token_savings": savings_summary,
+            "token_savings_by_ticket": savings_by_ticket
+        },
+        artifacts={
+            "metric_summary": metric_summary,
+            "dashboard_summary": dashboard_summary
+        },
+        progress=progress,
+        cancel=cancel,
+        distributed=distributed
+    )
 
-    #Build Context BI table
-    context_bi = build_context_bi(
-        contexts=contexts,
-        keyword_info=keyword_info
+
+def _split_upload(raw, ticket_id: str) -> tuple:
+    """
+    (aggregated scores, raw result items) of an upload, validated the
+    way normalize validates it.
+    """
+    if isinstance(raw, list) and raw:
+        items = raw[0].get("detailed_results", [])
+        raw = [{**raw[0], "detailed_results": []}]
+    else:
+        items = []
+    return normalize(raw, ticket_id=ticket_id).aggregated_scores, items
+
+
+def _spilled_records(records: SpilledRows) -> Iterator[RagasRecord]:
+    return (RagasRecord.model_validate(row) for row in records)
+
+
+def _run_chunked_stages(
+    job_id: str,
+    raw_bytes: bytes,
+    progress: JobProgress,
+    cancel: Optional[CancellationToken],
+    distributed: bool
+) -> dict:
+    """
+    Chunked mode. The per-record stages (normalize, classify, keywords,
+    keyword coverage, relevance hashing, MinHash, attribution) run over
+    CHUNKED_BATCH_SIZE records at a time; each batch's input items are
+    released once it is normalized. Its records, hashed relevance
+    matrices and MinHash signatures are spilled to temporary columnar
+    files, read back by the job-level stages (BM25 scoring, duplicate
+    clustering) and deleted once those are done. Context and RAGAS BI
+    rows are built from the spilled records and spilled in turn.
+
+    Job-wide state kept in memory: numeric columns per ticket or context,
+    the resolution map, ticket and context ids, and the sparse keyword
+    coverage (the exporter decodes keyword lists from it).
+    """
+    ticket_id = str(uuid.uuid4())
+
+    if distributed:
+        #Per-record results come back from the shard workers; the batches
+        #below only add the stages that run on the coordinator
+        normalized, resolution_map, keyword_info, attribution = analyze_records_distributed(
+            job_id, load_ragas(raw_bytes), ticket_id, progress
+        )
+        progress.complete(RECORD_STAGE)
+        aggregated_scores, items = normalized.aggregated_scores, normalized.records
+        del normalized
+    else:
+        resolution_map, keyword_info, attribution_parts = {}, None, []
+        aggregated_scores, items = _split_upload(load_ragas(raw_bytes), ticket_id)
+
+    records = SpilledRows(job_id, "records")
+    relevance_batches = SpilledArrays(job_id, "relevance")
+    signature_batches = SpilledArrays(job_id, "signatures")
+    spills = [records, relevance_batches, signature_batches]
+
+    # Small per-ticket / per-context columns, one array per batch
+    parts: Dict[str, List[np.ndarray]] = defaultdict(list)
+    ticket_ids: List[str] = []
+    context_ids: List[str] = []
+
+    try:
+        total = len(items)
+        # An empty upload still runs one (empty) batch
+        for start in range(0, max(total, 1), CHUNKED_BATCH_SIZE):
+            stop = min(start + CHUNKED_BATCH_SIZE, total)
+            if distributed:
+                batch = NormalizedRagasResult.model_construct(
+                    aggregated_scores=aggregated_scores, records=items[start:stop]
+                )
+            else:
+                batch = normalize(
+                    [{"detailed_results": items[start:stop]}], ticket_id=ticket_id, first_index=start + 1
+                )
+            # From here on only the batch holds them
+            items[start:stop] = [None] * (stop - start)
+
+            if not distributed:
+                resolution_map.update(classify_resolution(batch))
+                keyword_info = extract_keywords(batch)
+                attribution_parts.append(attribute_answers(batch))
+
+            coverage_part = build_keyword_coverage(batch, keyword_info)
+            parts["coverage"].append(coverage_part)
+            relevance_batches.append(hash_relevance(batch))
+
+            signatures = context_signatures(batch, CHUNKED_MINHASH_BYTES)
+            signature_batches.append({"signatures": signatures.pop("signatures")})
+
+            for name, values in {
+                **metric_arrays(batch),
+                **signatures,
+                "context_count": context_counts(batch),
+                "context_tokens": context_token_counts(batch),
+            }.items():
+                parts[name].append(values)
+            ticket_ids.extend(r.ticket_id for r in batch.records)
+            context_ids.extend(ctx.context_id for r in batch.records for ctx in r.contexts)
+
+            records.append([r.model_dump() for r in batch.records])
+            del batch, coverage_part, signatures
+            progress.advance(CHUNKED_RECORD_STAGE, stop, total, "records")
+        del items, keyword_info
+        progress.complete(CHUNKED_RECORD_STAGE)
+
+        coverage_parts = parts.pop("coverage")
+        columns = {name: np.concatenate(values) for name, values in parts.items()}
+        del parts
+        metrics = {name: columns[name] for name in METRIC_NAMES}
+        if not distributed:
+            attribution = AttributionReport.concat(attribution_parts)
+            del attribution_parts
+
+        #Job-level metric statistics
+        metric_summary = summarize_metrics(
+            metrics,
+            np.asarray([resolution_map[t]["resolution_category"] for t in ticket_ids], dtype=str),
+            aggregated_scores
+        )
+        progress.complete("metric evaluation")
+
+        #Batch coverage over the job vocabulary
+        coverage = merge_keyword_coverage(coverage_parts)
+        del coverage_parts
+        progress.complete("keyword coverage")
+
+        #Inverted keyword index (keyword -> tickets / contexts per role)
+        save_arrays(job_id, "keyword_index", build_keyword_index(coverage, ticket_ids, context_ids))
+        del context_ids
+        progress.complete("keyword index")
+
+        #BM25 with job-level document frequencies, scored batch by batch
+        relevance = score_relevance_batches(relevance_batches)
+        relevance_batches.close()
+        progress.complete("relevance scoring")
+
+        #LSH over the job's signatures, paged in from the spill
+        duplicates = cluster_duplicates(
+            signature_batches.stacked("signatures"),
+            columns["has_shingles"],
+            columns["token_counts"],
+            coverage.context_ticket
+        )
+        signature_batches.close()
+        progress.complete("duplicate detection")
+
+        #Top-k cutoff curves (cumulative coverage vs retrieval depth)
+        curves = curves_from_counts(coverage, columns["context_count"], columns["context_tokens"])
+        del columns
+        progress.complete("coverage curves")
+
+        #Context rows from the spilled records, spilled as they are built.
+        #They are the Context BI table as is (see build_context_bi)
+        context_bi = contexts = SpilledRows.write(
+            job_id,
+            "context_bi",
+            iter_context_rows(_spilled_records(records), metrics, coverage, relevance, duplicates, attribution, curves),
+            CHUNKED_BATCH_SIZE
+        )
+        spills.append(contexts)
+        del duplicates, attribution
+        progress.complete("context analysis")
+
+        #Columns needed to reclassify this job under other thresholds
+        classification_inputs = build_classification_inputs(metrics, coverage, relevance)
+        save_arrays(job_id, "classification_inputs", classification_inputs)
+        del relevance, metrics
+
+        savings_summary, savings_by_ticket, dashboard_summary = _job_summaries(
+            job_id, classification_inputs, coverage, contexts, ticket_ids, resolution_map, progress
+        )
+        del classification_inputs
+
+        #RAGAS BI rows from the spilled records, spilled as well
+        ragas_bi = SpilledRows.write(
+            job_id,
+            "ragas_bi",
+            iter_ragas_bi_rows(_spilled_records(records), resolution_map, contexts),
+            CHUNKED_BATCH_SIZE
+        )
+        spills.append(ragas_bi)
+        records.close()
+        del resolution_map
+
+        return _rank_and_export(
+            job_id,
+            ragas_bi,
+            context_bi,
+            coverage,
+            tables={
+                "coverage_curve": curves.table,
+                "token_savings": savings_summary,
+                "token_savings_by_ticket": savings_by_ticket
+            },
+            artifacts={
+                "metric_summary": metric_summary,
+                "dashboard_summary": dashboard_summary
+            },
+            progress=progress,
+            cancel=cancel,
+            distributed=distributed,
+            chunked=True
+        )
+    finally:
+        #Spilled intermediates and tables are only needed until export
+        for spill in spills:
+            spill.close()
+
+
+def _job_summaries(
+    job_id: str,
+    classification_inputs: Dict[str, np.ndarray],
+    coverage,
+    contexts,
+    ticket_ids: List[str],
+    resolution_map: Dict[str, Dict],
+    progress: JobProgress
+) -> tuple:
+    """
+    Token-savings simulation and dashboard summary. Returns (savings
+    summary, savings by ticket, dashboard summary).
+    """
+    #Token-savings simulation for the default drop policies
+    savings_inputs = build_savings_inputs(coverage, contexts, ticket_ids)
+    save_arrays(job_id, "savings_inputs", savings_inputs.to_arrays())
+    savings_summary, savings_by_ticket = simulate_policies(savings_inputs, DEFAULT_POLICIES)
+    progress.complete("token-savings simulation")
+
+    #Dashboard overview, served without the detail tables
+    dashboard_summary = build_dashboard_summary(
+        classification_inputs,
+        savings_inputs,
+        np.asarray([resolution_map[t]["resolution_category"] for t in ticket_ids], dtype=str),
+        np.asarray(column(contexts, "is_context_useful"), dtype=bool)
+    )
+    progress.complete("dashboard summary")
+
+    return savings_summary, savings_by_ticket, dashboard_summary
+
+
+def _rank_and_export(
+    job_id: str,
+    ragas_bi,
+    context_bi,
+    coverage,
+    tables: Dict[str, List[Dict]],
+    artifacts: Dict[str, Dict],
+    progress: JobProgress,
+    cancel: Optional[CancellationToken],
+    distributed: bool,
+    chunked: bool = False
+) -> dict:
+    if distributed:
+        #LLM ranking of both tables, shard by shard on the workers
+        rank_distributed(job_id, ragas_bi, context_bi, progress)
+        progress.complete(RANK_STAGE)
+    else:
+        #LLM ranking for RAGAS BI
+        ragas_bi = rank_ragas_bi(ragas_bi, cancel=cancel)
+        progress.complete("RAGAS BI ranking")
+
+        #LLM ranking for Context BI
+        context_bi = rank_context_bi(
+            context_bi,
+            lambda done, total: progress.advance("Context BI ranking", done, total, "batches"),
+            cancel=cancel
+        )
+        progress.complete("Context BI ranking")
+
+    #Export outputs; chunked jobs write one table at a time
+    outputs = export_outputs(
+        job_id,
+        ragas_bi,
+        context_bi,
+        keyword_coverage=coverage,
+        tables=tables,
+        artifacts=artifacts,
+        progress=_export_progress(progress),
+        batch_size=CHUNKED_BATCH_SIZE if chunked else EXPORT_BATCH_SIZE,
+        concurrency=1 if chunked else 3
+    )
+    progress.complete("export")
+    return outputs
+
+
+def run_reclassification(
+    job_id: str,
+    parent_job_id: str,
+    parent_outputs: dict,
+    thresholds: ClassificationThresholds,
+    cancel: Optional[CancellationToken] = None
+) -> tuple:
+    """
+    What-if run: apply new thresholds to a finished job's stored columns
+    and write the derived job's outputs. Nothing upstream is recomputed.
+    Returns (outputs, reclassification).
+    """
+
+    progress = JobProgress(job_id, RECLASSIFICATION_STAGES, cancel)
+    progress.start()
+
+    inputs = load_arrays(parent_job_id, "classification_inputs")
+    result = reclassify(inputs, thresholds)
+    progress.complete("reclassification")
+
+    #Per-category breakdown follows the new categories
+    metric_summary = summarize_metrics(
+        inputs,
+        result.resolution_category,
+        load_artifact(parent_outputs["metric_summary"])["reported_aggregates"]
+    )
+    progress.complete("metric evaluation")
+
+    #Drop flags changed, so the savings simulation changes with them
+    savings_inputs = SavingsInputs.from_arrays(load_arrays(parent_job_id, "savings_inputs"))
+    savings_inputs.drop_recommendation = result.drop_recommendation
+    save_arrays(job_id, "savings_inputs", savings_inputs.to_arrays())
+    savings_summary, savings_by_ticket = simulate_policies(savings_inputs, DEFAULT_POLICIES)
+    progress.complete("token-savings simulation")
+
+    dashboard_summary = build_dashboard_summary(
+        inputs, savings_inputs, result.resolution_category, result.is_context_useful
+    )
+    progress.complete("dashboard summary")
+
+    outputs = export_derived_outputs(
+        job_id,
+        parent_outputs,
+        ragas_columns={
+            "resolution_category": result.resolution_category.tolist(),
+            "resolution_confidence": result.resolution_confidence.tolist(),
+            "needs_manual_review": result.needs_manual_review.tolist(),
+            "useful_context_count": result.useful_context_count.tolist(),
+            "dropped_context_count": result.dropped_context_count.tolist(),
+        },
+        context_columns={
+            "entity_match": result.entity_match.tolist(),
+            "is_context_useful": result.is_context_useful.tolist(),
+            "usefulness_reason": [
+                USEFUL_REASON if useful else NOT_USEFUL_REASON
+                for useful in result.is_context_useful.tolist()
+            ],
+            "drop_recommendation": result.drop_recommendation.tolist(),
+        },
+        tables={
+            "token_savings": savings_summary,
+            "token_savings_by_ticket": savings_by_ticket
+        },
+        artifacts={
+            "metric_summary": metric_summary,
+            "dashboard_summary": dashboard_summary
+        },
+        progress=_export_progress(progress)
     )
+    progress.complete("export")
 
-    #LLM ranking for Context BI
-    context_bi = rank_context_bi(context_bi)
-    print("✓ Completed Context BI ranking")
+    # Reclassified jobs can be reclassified again
+    save_arrays(job_id, "classification_inputs", inputs)
 
-    #Export outputs
-    return export_outputs(job_id, ragas_bi, context_bi)
+    return outputs, result
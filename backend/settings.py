@@ -13,6 +13,9 @@ BEDROCK_MODEL_ID = os.getenv(
 
 BEDROCK_MAX_TOKENS = int(os.getenv("BEDROCK_MAX_TOKENS", "1024"))
 BEDROCK_TEMPERATURE = float(os.getenv("BEDROCK_TEMPERATURE", "0.2"))
+# Bedrock calls in flight at once across all jobs of a process (the
+# batch CLI shares one budget across its worker processes)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
 
 # ==============================
 # File / Job Settings
@@ -20,3 +23,129 @@ BEDROCK_TEMPERATURE = float(os.getenv("BEDROCK_TEMPERATURE", "0.2"))
 
 OUTPUT_DIR = os.getenv("OUTPUT_DIR", "./outputs")
 JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "86400"))
+
+# ==============================
+# Analysis Settings
+# ==============================
+
+TOKENIZER_CACHE_SIZE = int(os.getenv("TOKENIZER_CACHE_SIZE", "65536"))
+
+RELEVANCE_HASH_FEATURES = int(os.getenv("RELEVANCE_HASH_FEATURES", str(2 ** 20)))
+RELEVANCE_BATCH_SIZE = int(os.getenv("RELEVANCE_BATCH_SIZE", "100000"))
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+MINHASH_NUM_PERM = int(os.getenv("MINHASH_NUM_PERM", "64"))
+MINHASH_BANDS = int(os.getenv("MINHASH_BANDS", "8"))
+MINHASH_SHINGLE_SIZE = int(os.getenv("MINHASH_SHINGLE_SIZE", "3"))
+DUPLICATE_JACCARD_THRESHOLD = float(os.getenv("DUPLICATE_JACCARD_THRESHOLD", "0.8"))
+
+ATTRIBUTION_SHINGLE_SIZE = int(os.getenv("ATTRIBUTION_SHINGLE_SIZE", "3"))
+ATTRIBUTION_MIN_CONTAINMENT = float(os.getenv("ATTRIBUTION_MIN_CONTAINMENT", "0.3"))
+# Distinct sentences whose shingles are kept (LRU) while attributing a job
+ATTRIBUTION_SENTENCE_CACHE_SIZE = int(os.getenv("ATTRIBUTION_SENTENCE_CACHE_SIZE", "65536"))
+
+# Share of the all-contexts coverage a recommended top-k must reach
+TOPK_TARGET_COVERAGE = float(os.getenv("TOPK_TARGET_COVERAGE", "0.95"))
+
+# Estimated prompt (input) cost used by the token-savings simulator
+PROMPT_COST_PER_1K_TOKENS = float(os.getenv("PROMPT_COST_PER_1K_TOKENS", "0.003"))
+
+# Paired / job-level statistics
+BOOTSTRAP_RESAMPLES = int(os.getenv("BOOTSTRAP_RESAMPLES", "1000"))
+BOOTSTRAP_CONFIDENCE = float(os.getenv("BOOTSTRAP_CONFIDENCE", "0.95"))
+BOOTSTRAP_SEED = int(os.getenv("BOOTSTRAP_SEED", "0"))
+# Columns with more distinct values are resampled over this many quantile
+# bins, keeping each bin's within-bin variance
+BOOTSTRAP_BINS = int(os.getenv("BOOTSTRAP_BINS", "1000"))
+
+METRIC_HISTOGRAM_BINS = int(os.getenv("METRIC_HISTOGRAM_BINS", "10"))
+
+# Stored keyword indexes kept decoded in memory (per job)
+KEYWORD_INDEX_CACHE_SIZE = int(os.getenv("KEYWORD_INDEX_CACHE_SIZE", "8"))
+
+# Full-text search ranks (bm25) at most this many matches; broader
+# queries are returned in document order to keep latency bounded
+SEARCH_RANKED_MAX_MATCHES = int(os.getenv("SEARCH_RANKED_MAX_MATCHES", "20000"))
+
+# Columnar formats written next to the BI CSVs: any of parquet, arrow
+EXPORT_FORMATS = [f.strip() for f in os.getenv("EXPORT_FORMATS", "parquet,arrow").split(",") if f.strip()]
+# Rows per export batch, which is also the Parquet row group / Arrow
+# record batch size (batches never split a ticket). Bounds export memory.
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "65536"))
+
+# Pre-compressed download copies of CSV/JSON outputs
+DOWNLOAD_GZIP_LEVEL = int(os.getenv("DOWNLOAD_GZIP_LEVEL", "6"))
+DOWNLOAD_ZSTD_LEVEL = int(os.getenv("DOWNLOAD_ZSTD_LEVEL", "10"))
+# Largest page served by the JSON rows endpoint
+ROWS_PAGE_MAX = int(os.getenv("ROWS_PAGE_MAX", "1000"))
+
+# Embedded analytical engine for the table query API
+DUCKDB_THREADS = int(os.getenv("DUCKDB_THREADS", "2"))
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT", "1GB")
+# Largest number of groups one aggregation returns (e.g. one per ticket)
+AGGREGATE_GROUPS_MAX = int(os.getenv("AGGREGATE_GROUPS_MAX", "100000"))
+
+# Job progress: SSE keep-alive comment interval and longest long-poll wait
+JOB_EVENTS_KEEPALIVE_SECONDS = float(os.getenv("JOB_EVENTS_KEEPALIVE_SECONDS", "15"))
+JOB_PROGRESS_WAIT_MAX_SECONDS = float(os.getenv("JOB_PROGRESS_WAIT_MAX_SECONDS", "30"))
+# A finished job's event log is kept this long, then only its terminal
+# event (so late listeners still see the job end)
+JOB_EVENTS_RETENTION_SECONDS = float(os.getenv("JOB_EVENTS_RETENTION_SECONDS", "3600"))
+
+# Job admission and scheduling: concurrent pipelines, waiting jobs and
+# input bytes held by running plus waiting jobs; beyond these uploads
+# get 429 with Retry-After
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "2"))
+MAX_QUEUED_JOBS = int(os.getenv("MAX_QUEUED_JOBS", "32"))
+MAX_INFLIGHT_BYTES = int(os.getenv("MAX_INFLIGHT_BYTES", str(1024 ** 3)))
+# Shortest-estimated-job-first: a waiting job gains this many seconds
+# of priority per second waited, so big jobs cannot starve
+JOB_AGING_RATE = float(os.getenv("JOB_AGING_RATE", "1.0"))
+# Initial pipeline throughput guess for run-time estimates; refined from
+# finished jobs
+JOB_BYTES_PER_SECOND = float(os.getenv("JOB_BYTES_PER_SECOND", "1000000"))
+# Finished jobs kept for queue-wait / run-time percentiles
+JOB_STATS_WINDOW = int(os.getenv("JOB_STATS_WINDOW", "1000"))
+
+# Upload parsing: NDJSON uploads are decompressed and parsed in
+# line-aligned blocks of about this size
+INGEST_BLOCK_BYTES = int(os.getenv("INGEST_BLOCK_BYTES", str(8 * 1024 ** 2)))
+# Compressed uploads may not expand beyond this. Admission counts them
+# at the size they declare, so by default one job cannot exceed the
+# in-flight budget by expanding past it.
+INGEST_MAX_DECOMPRESSED_BYTES = int(os.getenv("INGEST_MAX_DECOMPRESSED_BYTES", str(MAX_INFLIGHT_BYTES)))
+# Uploads of at least this size are memory-mapped from Starlette's spool
+# file instead of being read into memory
+UPLOAD_MMAP_MIN_BYTES = int(os.getenv("UPLOAD_MMAP_MIN_BYTES", str(8 * 1024 ** 2)))
+
+# Distributed runs: with PIPELINE_MODE=distributed the per-record stages
+# and the LLM ranking of a job are split into shards of SHARD_RECORDS
+# tickets (with their contexts) on a queue in SHARD_QUEUE_PATH, which
+# `python -m worker` processes on any host sharing it and OUTPUT_DIR
+# claim. A shard whose worker stops renewing its lease for
+# SHARD_LEASE_SECONDS is retried elsewhere, up to SHARD_MAX_ATTEMPTS
+# claims. A job whose shards are not all done SHARD_WAIT_TIMEOUT_SECONDS
+# after queueing (e.g. no worker running) fails.
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "local")
+SHARD_QUEUE_PATH = os.getenv("SHARD_QUEUE_PATH", os.path.join(OUTPUT_DIR, "shard_queue.sqlite"))
+SHARD_RECORDS = int(os.getenv("SHARD_RECORDS", "100"))
+SHARD_LEASE_SECONDS = float(os.getenv("SHARD_LEASE_SECONDS", "60"))
+SHARD_MAX_ATTEMPTS = int(os.getenv("SHARD_MAX_ATTEMPTS", "3"))
+SHARD_WAIT_TIMEOUT_SECONDS = float(os.getenv("SHARD_WAIT_TIMEOUT_SECONDS", "3600"))
+# How often coordinators check their shards and idle workers the queue
+SHARD_POLL_SECONDS = float(os.getenv("SHARD_POLL_SECONDS", "1.0"))
+
+# Per-job memory budget. A job whose estimated footprint (decompressed
+# upload bytes x JOB_MEMORY_EXPANSION) exceeds it runs in chunked mode: the
+# per-record stages run over CHUNKED_BATCH_SIZE records at a time with their
+# intermediates spilled to temporary columnar files, the BI tables are
+# spilled as they are built and exported one at a time in CHUNKED_BATCH_SIZE
+# rows. 0 disables the budget.
+JOB_MEMORY_BUDGET_BYTES = int(os.getenv("JOB_MEMORY_BUDGET_BYTES", str(2 * 1024 ** 3)))
+JOB_MEMORY_EXPANSION = float(os.getenv("JOB_MEMORY_EXPANSION", "40"))
+CHUNKED_BATCH_SIZE = int(os.getenv("CHUNKED_BATCH_SIZE", "2048"))
+# Largest MinHash signature temporary in chunked mode
+CHUNKED_MINHASH_BYTES = int(os.getenv("CHUNKED_MINHASH_BYTES", str(64 * 1024 ** 2)))
+# Resident-set sampling interval for the per-job peak RSS report
+RSS_SAMPLE_SECONDS = float(os.getenv("RSS_SAMPLE_SECONDS", "0.05"))
@@ -0,0 +1,62 @@
+"""
+JSON encoding and decoding for the backend: orjson when it is installed,
+the standard library otherwise.
+
+``loads`` takes bytes, str or any buffer (memoryview, mmap) and ``dumps``
+encodes straight to UTF-8 bytes. The backends differ on non-finite
+floats: the stdlib reads and writes NaN / Infinity tokens, orjson writes
+them as null and rejects them on input, so ``loads`` retries such
+documents with the stdlib.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+
+
+def loads(data) -> Any:
+    """
+    Parse a JSON document from bytes, str or a buffer. Raises ValueError
+    on invalid input.
+    """
+    if not isinstance(data, (bytes, bytearray, memoryview, str)):
+        # mmap and other buffer-protocol objects, without copying
+        data = memoryview(data)
+
+    if orjson:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN / Infinity (pandas writes them) or invalid input, which
+            # the stdlib parses or rejects with its own ValueError
+            pass
+
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize ``obj`` to UTF-8 JSON bytes, compact or with a 2-space
+    ``indent``. Non-ASCII text is written as is.
+    """
+    if orjson:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_str(obj: Any, indent: bool = False) -> str:
+    """``dumps`` for callers that need text (prompts, SSE frames)."""
+    return dumps(obj, indent).decode("utf-8")
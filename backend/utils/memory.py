@@ -0,0 +1,78 @@
+import os
+import resource
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from ingest.ragas_loader import declared_size
+from settings import JOB_MEMORY_BUDGET_BYTES, JOB_MEMORY_EXPANSION, RSS_SAMPLE_SECONDS
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def rss_bytes() -> int:
+    """
+    Current resident set size of this process. Where /proc is missing
+    this is the peak so far instead (getrusage), which only over-reports.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if peak > 1 << 32 else peak * 1024
+
+
+class PeakRss:
+    """
+    Highest resident set size seen while the block runs, sampled every
+    RSS_SAMPLE_SECONDS on a background thread. RSS is process-wide, so
+    jobs running side by side count each other's memory too.
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.start_bytes = 0
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, rss_bytes())
+
+    def __enter__(self):
+        self.start_bytes = self.peak_bytes = rss_bytes()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, rss_bytes())
+
+
+@dataclass
+class MemoryPlan:
+    """
+    Whether a job fits its memory budget or runs in chunked mode,
+    decided from the upload before it is parsed.
+    """
+
+    budget_bytes: int
+    estimated_bytes: int
+
+    @property
+    def chunked(self) -> bool:
+        return 0 < self.budget_bytes < self.estimated_bytes
+
+    @classmethod
+    def for_upload(cls, raw_bytes, budget_bytes: int = JOB_MEMORY_BUDGET_BYTES) -> "MemoryPlan":
+        # Parsed records, stage outputs and their transient peaks all scale
+        # with the input; compressed uploads count at their declared size
+        return cls(budget_bytes, int(declared_size(raw_bytes) * JOB_MEMORY_EXPANSION))
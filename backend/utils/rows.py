@@ -0,0 +1,26 @@
+from typing import Dict, List, Sequence
+
+
+def column(rows: Sequence[Dict], name: str) -> List:
+    """
+    One field of every row. Tables spilled to disk (SpilledRows) read
+    just that column instead of decoding whole rows.
+    """
+    reader = getattr(rows, "column", None)
+    if reader is not None:
+        return reader(name)
+    return [row[name] for row in rows]
+
+
+def set_columns(rows: Sequence[Dict], columns: Dict[str, Sequence]):
+    """
+    Set fields on every row in place, ``columns`` mapping each field to
+    one value per row. Spilled tables rewrite their batches.
+    """
+    writer = getattr(rows, "set_columns", None)
+    if writer is not None:
+        writer(columns)
+        return
+    for name, values in columns.items():
+        for row, value in zip(rows, values):
+            row[name] = value
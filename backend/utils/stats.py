@@ -0,0 +1,84 @@
+from typing import Tuple
+
+import numpy as np
+
+from settings import BOOTSTRAP_RESAMPLES, BOOTSTRAP_CONFIDENCE, BOOTSTRAP_SEED, BOOTSTRAP_BINS
+
+
+def _levels(values: np.ndarray, bins: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Collapse a column to (level, count, variance) triples: its distinct
+    values (variance 0), or ``bins`` equal-count quantile bins when there
+    are more of those, with each bin's mean and within-bin variance. Bins
+    never split a distinct value; bin means keep the overall mean exact.
+    """
+    levels, counts = np.unique(values, return_counts=True)
+    if len(levels) <= bins:
+        return levels, counts, np.zeros(len(levels))
+
+    # Bin of each distinct value by the rank of its first row
+    n = counts.sum()
+    idx = np.minimum((np.cumsum(counts) - counts) * bins // n, bins - 1)
+    bin_counts = np.bincount(idx, weights=counts, minlength=bins)
+    filled = bin_counts > 0
+    means = np.bincount(idx, weights=levels * counts, minlength=bins)[filled] / bin_counts[filled]
+
+    spread = np.zeros(bins)
+    spread[filled] = means
+    variances = np.bincount(idx, weights=counts * (levels - spread[idx]) ** 2, minlength=bins)[filled]
+    return means, bin_counts[filled], variances / bin_counts[filled]
+
+
+def bootstrap_mean_ci(
+    values: np.ndarray,
+    resamples: int = BOOTSTRAP_RESAMPLES,
+    confidence: float = BOOTSTRAP_CONFIDENCE,
+    seed: int = BOOTSTRAP_SEED,
+    bins: int = BOOTSTRAP_BINS
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Percentile bootstrap CI of the mean of each column of ``values``.
+
+    A resample of n rows is a multinomial draw of counts over the column's
+    value levels, so cost is resamples x levels instead of resamples x n.
+    With more distinct values than ``bins``, the rows drawn from a
+    quantile bin add its within-bin spread as a normal term of variance
+    count x bin variance, so the resampled means keep the full variance.
+    Returns (mean, low, high) with one entry per column; NaN for no rows.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    n, k = values.shape
+
+    mean = np.full(k, np.nan)
+    low, high = np.full(k, np.nan), np.full(k, np.nan)
+    if n == 0:
+        return mean, low, high
+
+    rng = np.random.default_rng(seed)
+    alpha = (1 - confidence) / 2
+
+    for j in range(k):
+        levels, counts, variances = _levels(values[:, j], bins)
+        draws = rng.multinomial(n, counts / n, size=resamples)
+        sums = draws @ levels
+        if variances.any():
+            sums += np.sqrt(draws @ variances) * rng.standard_normal(resamples)
+        means = sums / n
+        mean[j] = values[:, j].mean()
+        low[j], high[j] = np.quantile(means, [alpha, 1 - alpha])
+
+    return mean, low, high
+
+
+def unit_histograms(X: np.ndarray, bins: int) -> np.ndarray:
+    """
+    Fixed [0, 1] histograms of every column at once: bucket ids are offset
+    per column so one bincount fills the whole (k x bins) table. The top
+    bin includes 1.0.
+    """
+    n, k = X.shape
+    buckets = np.clip((X * bins).astype(np.int64), 0, bins - 1)
+    buckets += np.arange(k) * bins
+    return np.bincount(buckets.ravel(), minlength=k * bins).reshape(k, bins)
@@ -1,2 +1,146 @@
+import functools
+import hashlib
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, FrozenSet, List, NamedTuple, Tuple
+from settings import TOKENIZER_CACHE_SIZE
+
+
+STOPWORDS = {
+    "the", "is", "are", "a", "an", "and", "or", "to", "of", "in",
+    "for", "on", "by", "with", "before", "after", "be", "can",
+    "may", "will", "shall", "that", "this"
+}
+
+# Han (incl. extension A and compatibility), kana and hangul
+_CJK_RANGES = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3040-\u30ff\uac00-\ud7af"
+
+# One pass over lowercased text: either a CJK run or a latin word
+_TOKEN_PATTERN = re.compile(rf"[{_CJK_RANGES}]+|[a-z0-9_]+")
+
+
+class TextTokens(NamedTuple):
+    tokens: Tuple[str, ...]
+    keywords: FrozenSet[str]
+    token_count: int
+
+
+def scan_tokens(text: str) -> TextTokens:
+    """
+    Tokenize text once and return keyword tokens (in order, stopwords and
+    short words removed), their distinct set and the token count.
+
+    CJK runs have no word boundaries, so they are segmented into character
+    bigrams (cjk_bigrams, as the search index does). The token count is
+    the whitespace-separated word count every token and cost metric
+    (context_token_count, token savings) is expressed in.
+    """
+    tokens = []
+
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if run[0] < "\x80":
+            if len(run) > 2 and run not in STOPWORDS:
+                tokens.append(run)
+        else:
+            tokens.extend(cjk_bigrams(run))
+
+    return TextTokens(tuple(tokens), frozenset(tokens), len(text.split()))
+
+
+class _DigestInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+def digest_lru_cache(maxsize: int) -> Callable:
+    """
+    Like functools.lru_cache for functions of one string, but keyed by a
+    16-byte blake2b digest of it, so cached entries do not keep whole
+    chunks of text alive.
+    """
+    def decorator(fn: Callable[[str], object]) -> Callable[[str], object]:
+        cache: "OrderedDict[bytes, object]" = OrderedDict()
+        lock = threading.Lock()
+        stats = [0, 0]
+
+        @functools.wraps(fn)
+        def wrapper(text: str):
+            key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+            with lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    stats[0] += 1
+                    return cache[key]
+            value = fn(text)
+            with lock:
+                stats[1] += 1
+                cache[key] = value
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return value
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+                stats[:] = [0, 0]
+
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_info = lambda: _DigestInfo(stats[0], stats[1], maxsize, len(cache))
+        return wrapper
+
+    return decorator
+
+
+@digest_lru_cache(maxsize=TOKENIZER_CACHE_SIZE)
+def tokenize(text: str) -> TextTokens:
+    """
+    Memoized scan_tokens for whole questions, answers and chunks, kept in
+    a bounded LRU cache keyed by text digest. Use scan_tokens for one-off
+    fragments (sentences) so they do not evict chunk entries.
+    """
+    return scan_tokens(text)
+
+
+@lru_cache(maxsize=TOKENIZER_CACHE_SIZE)
+def token_hash(token: str) -> int:
+    """
+    Stable 32-bit token hash (crc32), identical across processes. Keyed
+    by the token itself: single words and bigrams are short.
+    """
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def token_runs(text: str) -> List[str]:
+    """
+    Lowercased latin words and whole CJK runs, in order (unfiltered).
+    """
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def is_cjk(run: str) -> bool:
+    return run[0] >= "\x80"
+
+
+def cjk_bigrams(run: str) -> List[str]:
+    # A lone character is its own token, for keywords and search alike
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
 def count_tokens(text: str) -> int:
-    return len(text.split())
+    return tokenize(text).token_count
+
+
+def question_hash(text: str) -> str:
+    """
+    Stable id for a question across uploads: case and whitespace are
+    normalized so reformatted runs of the same dataset still line up.
+    """
+    canonical = " ".join(text.casefold().split())
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
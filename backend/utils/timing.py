@@ -0,0 +1,27 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class StageTimer:
+    """
+    Collect wall-clock durations of named stages.
+    """
+
+    def __init__(self, label: Optional[str] = None):
+        self.label = label
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = round(elapsed, 4)
+            prefix = f"{self.label} | " if self.label else ""
+            logger.info("%s%s took %.3fs", prefix, name, elapsed)
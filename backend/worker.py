@@ -0,0 +1,115 @@
+"""
+Shard worker for distributed runs (PIPELINE_MODE=distributed): claims
+shards from the shared queue (per-record analysis or ranking), processes
+them and records the results.
+
+Run from backend/:  python -m worker
+
+Start any number of workers, on any host that sees the same
+SHARD_QUEUE_PATH and OUTPUT_DIR as the API nodes. A worker renews its
+lease while it works; if it dies, its shard is retried by another
+worker once the lease expires.
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+
+from jobs.job_cancellation import CancellationToken, JobCancelled
+from jobs.shard_queue import ShardLease, ShardQueue
+from jobs.distributed import run_shard, shard_result_path
+from settings import SHARD_POLL_SECONDS, SHARD_QUEUE_PATH
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _keep_leased(queue: ShardQueue, lease: ShardLease, lost: CancellationToken, done: threading.Event):
+    # Renew at a third of the lease so one slow renewal does not lose it
+    while not done.wait(queue.lease_seconds / 3):
+        if not queue.renew(lease):
+            logger.warning("Lost the lease on %s shard %d", lease.job_id, lease.shard)
+            lost.cancel()
+            return
+
+
+def process(queue: ShardQueue, lease: ShardLease):
+    """
+    Process one claimed shard and complete it, or hand it back for a retry
+    on error. A shard whose lease is lost meanwhile (expired and taken
+    over, or its job cancelled) is abandoned.
+    """
+    lost = CancellationToken(f"{lease.job_id}/{lease.shard}")
+    done = threading.Event()
+    heartbeat = threading.Thread(target=_keep_leased, args=(queue, lease, lost, done), daemon=True)
+    heartbeat.start()
+
+    result = shard_result_path(lease.payload_path, lease.attempt)
+    try:
+        run_shard(lease.payload_path, result, cancel=lost)
+        done.set()
+        if not queue.complete(lease, result):
+            raise JobCancelled("lease lost before completion")
+        logger.info("Processed %s shard %d (attempt %d)", lease.job_id, lease.shard, lease.attempt)
+    except JobCancelled:
+        logger.info("Abandoned %s shard %d", lease.job_id, lease.shard)
+        _discard(result)
+    except Exception as e:
+        logger.exception("Shard %d of job %s failed", lease.shard, lease.job_id)
+        _discard(result)
+        queue.fail(lease, f"{type(e).__name__}: {e}")
+    finally:
+        done.set()
+        heartbeat.join()
+
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def run(queue: ShardQueue, worker_id: str, stop: threading.Event, drain: bool = False) -> int:
+    """
+    Claim and process shards until ``stop`` is set (or, with ``drain``,
+    until no shard is waiting or leased elsewhere). Returns the number
+    of shards processed.
+    """
+    processed = 0
+    while not stop.is_set():
+        lease = queue.claim(worker_id)
+        if lease is None:
+            if drain and not queue.pending():
+                break
+            stop.wait(SHARD_POLL_SECONDS)
+            continue
+        process(queue, lease)
+        processed += 1
+    return processed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m worker", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--queue", default=SHARD_QUEUE_PATH, help="Shard queue file (default: %(default)s)")
+    parser.add_argument("--drain", action="store_true", help="Exit once every queued shard is done")
+    args = parser.parse_args(argv)
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    queue = ShardQueue(args.queue)
+
+    # Finish the shard in hand on SIGTERM / Ctrl-C, then exit
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    logger.info("Worker %s polling %s", worker_id, args.queue)
+    processed = run(queue, worker_id, stop, drain=args.drain)
+    logger.info("Worker %s stopped after %d shards", worker_id, processed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
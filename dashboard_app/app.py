@@ -13,21 +13,22 @@ from matplotlib import colors
 import altair as alt
 from io import BytesIO
 import requests
-import time
-from utils.constants import BACKEND_URL, JOB_PENDING, JOB_RUNNING, JOB_COMPLETED, JOB_FAILED
+from utils.constants import BACKEND_URL, JOB_PENDING, JOB_RUNNING, JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED
 from components.filters import ragas_metric_filters
-from components.metrics import render_ragas_kpis, render_total_context_card
+from components.metrics import render_ragas_kpis, render_total_context_card, filtered_kpis
 from components.charts import render_keyword_coverage_chart, render_context_answer_scatter, render_ground_truth_quality, render_question_coverage
-from services.job_service import submit_job, download_csv, normalize_job_status
-
-
-def download_csv(job_id: str, output_type: str) -> pd.DataFrame:
-    resp = requests.get(f"{BACKEND_URL}/{job_id}/download/{output_type}")
-    resp.raise_for_status()
-    return pd.read_csv(BytesIO(resp.content))
+from services.job_service import (
+    submit_job, get_summary, query_table, query_rows, ticket_contexts, normalize_job_status, cancel_job,
+    JobRejected
+)
+from components.search import render_search
+from components.progress import render_job_progress
 
 st.set_page_config(layout="wide", page_title="Dashboard")
 
+# Tickets per page of the ragas_bi drilldown and detail table
+RAGAS_PAGE_SIZE = 100
+
 feedback_table = 'vw_user_feedback_summary'
 rag_log_table = 'rag_process_result_log'
 
@@ -254,11 +255,8 @@ elif page == "RAGAS Dashboard":
     if "job_id" not in st.session_state:
         st.session_state.job_id = None
 
-    if "ragas_df" not in st.session_state:
-        st.session_state.ragas_df = None
-
-    if "context_df" not in st.session_state:
-        st.session_state.context_df = None
+    if "summary" not in st.session_state:
+        st.session_state.summary = None
 
     st.set_page_config(
         page_title="RAGAS BI Analytics",
@@ -272,8 +270,8 @@ elif page == "RAGAS Dashboard":
 
     json_file = st.sidebar.file_uploader(
         "Upload RAG Evaluation JSON",
-        type=["json"],
-        help="Upload the input JSON for RAGAS evaluation"
+        type=["json", "ndjson", "jsonl", "gz", "zst"],
+        help="Upload the input JSON (or NDJSON) for RAGAS evaluation, optionally gzip- or zstd-compressed"
     )
 
     if "job_id" not in st.session_state and json_file is None:
@@ -288,10 +286,16 @@ elif page == "RAGAS Dashboard":
             st.stop()
 
         with st.spinner("Submitting job to backend..."):
-            st.session_state.job_id = submit_job(json_file)  # ✅ CALL it
+            try:
+                st.session_state.job_id = submit_job(json_file)  # ✅ CALL it
+            except JobRejected as e:
+                retry = f" Try again in about {e.retry_after}s." if e.retry_after else ""
+                st.sidebar.error(f"❌ {e}.{retry}")
+                st.stop()
             st.session_state.job_status = JOB_PENDING
-            st.session_state.ragas_df = None
-            st.session_state.context_df = None
+            st.session_state.summary = None
+            st.session_state.ragas_page_key = None
+            st.session_state.job_done = False
 
         st.rerun()  # 🔥 trigger polling immediately
 
@@ -332,30 +336,44 @@ elif page == "RAGAS Dashboard":
         st.error("❌ Backend job failed")
         st.stop()
 
+    if job_status == JOB_CANCELLED:
+        st.warning("🛑 Job was cancelled")
+        st.stop()
+
     # =========================================================
-    # Job Running → Auto Refresh
+    # Job Running → Follow Progress Events
     # =========================================================
     if job_status in (JOB_PENDING, JOB_RUNNING):
         st.info("⏳ RAGAS evaluation running… dashboard will appear automatically")
-        time.sleep(2)
+
+        # Clicking interrupts the progress wait below and lands here
+        if st.sidebar.button("🛑 Cancel job"):
+            cancel_job(job_id)
+
+        # Blocks on the job's event stream and updates in place;
+        # the page reruns once, when the job finishes
+        final_status = render_job_progress(job_id)
+        if final_status == JOB_FAILED:
+            st.error("❌ Backend job failed")
+            st.stop()
+        if final_status == JOB_CANCELLED:
+            st.warning("🛑 Job was cancelled")
+            st.stop()
         st.rerun()
 
     # =========================================================
-    # Download Results (ONCE)
+    # Download Summary (ONCE); detail rows are queried as they are shown
     # =========================================================
     if (
         job_status == JOB_COMPLETED
         and not st.session_state.job_done
     ):
-        st.session_state.ragas_df = download_csv(job_id, "ragas_bi")
-        st.session_state.context_df = download_csv(job_id, "context_bi")
+        st.session_state.summary = get_summary(job_id)
         st.session_state.job_done = True
-        st.rerun()
 
-    ragas_df = st.session_state.ragas_df
-    context_df = st.session_state.context_df
+    summary = st.session_state.summary
 
-    if ragas_df is None or context_df is None:
+    if summary is None:
         st.info("⏳ Waiting for evaluation results…")
     else:
         # DASHBOARD STARTS HERE
@@ -364,17 +382,62 @@ elif page == "RAGAS Dashboard":
         st.title("RAGAS BI Analytics")
         st.subheader("1. RAGAS Analysis Dashboard")
 
-        # ---------- Filters ----------
-        filtered_df, selected_metric = ragas_metric_filters(ragas_df)
+        # ---------- Filters (applied by the backend) ----------
+        filters, selected_metric = ragas_metric_filters(job_id)
+
+        # ---------- Current page of filtered tickets ----------
+        # Cursors of the pages seen so far; a filter change starts over
+        page_key = json.dumps(filters, sort_keys=True)
+        if st.session_state.get("ragas_page_key") != page_key:
+            st.session_state.ragas_page_key = page_key
+            st.session_state.ragas_cursors = [None]
+            st.session_state.ragas_page = 0
+        page = st.session_state.ragas_page
+
+        if filters is None:
+            filtered_df, filtered_total, next_cursor = pd.DataFrame(), 0, None
+        else:
+            result = query_table(
+                job_id, "ragas_bi", filters,
+                limit=RAGAS_PAGE_SIZE, cursor=st.session_state.ragas_cursors[page]
+            )
+            filtered_df = pd.DataFrame(result["rows"])
+            filtered_total, next_cursor = result["total"], result["next_cursor"]
+        unfiltered = filtered_total == summary["ticket_count"]
 
         # ---------- KPI Cards ----------
-        render_ragas_kpis(filtered_df)
+        # Unfiltered KPIs come straight from the summary
+        if unfiltered:
+            render_ragas_kpis(summary["kpis"])
+        else:
+            render_ragas_kpis(filtered_kpis(job_id, filters))
 
         # ---------- Total Contexts ----------
-        render_total_context_card(len(context_df))
+        render_total_context_card(summary["context_count"])
 
         st.markdown("<div style='margin-bottom:24px;'></div>", unsafe_allow_html=True)
 
+        # ---------- Full-text Search ----------
+        render_search(job_id)
+
+        # ---------- Page navigation ----------
+        first_row = page * RAGAS_PAGE_SIZE
+        st.caption(
+            f"{filtered_total:,} tickets match · showing {first_row + 1 if len(filtered_df) else 0:,}"
+            f"–{first_row + len(filtered_df):,}"
+        )
+        prev_col, next_col, _ = st.columns([1, 1, 6])
+        with prev_col:
+            if st.button("◀ Prev", disabled=page == 0, key="ragas_prev"):
+                st.session_state.ragas_page = page - 1
+                st.rerun()
+        with next_col:
+            if st.button("Next ▶", disabled=next_cursor is None, key="ragas_next"):
+                del st.session_state.ragas_cursors[page + 1:]
+                st.session_state.ragas_cursors.append(next_cursor)
+                st.session_state.ragas_page = page + 1
+                st.rerun()
+
         # ---------- Ticket → Context Drilldown ----------
         with st.expander("🔍 View Raw ragas_bi Data (Select a Ticket)"):
             st.caption("Tick **one** ticket to view its related contexts")
@@ -408,12 +471,8 @@ elif page == "RAGAS Dashboard":
 
                     st.subheader(f"📄 Contexts for Ticket: {ticket_id}")
 
-                    related_contexts = context_df[
-                        context_df["ticket_id"] == ticket_id
-                    ]
-
                     st.dataframe(
-                        related_contexts,
+                        ticket_contexts(job_id, ticket_id),
                         use_container_width=True,
                         height=400
                     )
@@ -422,7 +481,7 @@ elif page == "RAGAS Dashboard":
         # Ragas Results Table
         # =========================================================
         try:
-            evaluate_df = filtered_df
+            evaluate_df = filtered_df.copy()
         except Exception as e:
             st.error(f"Failed to load CSV: {e}")
             st.stop()
@@ -473,6 +532,10 @@ elif page == "RAGAS Dashboard":
             "context_entity_recall",
         ]
 
+        if evaluate_df.empty:
+            # No matches: an empty table rather than a missing-column error
+            evaluate_df = evaluate_df.reindex(columns=columns_to_show)
+
         missing_cols = set(columns_to_show) - set(evaluate_df.columns)
         if missing_cols:
             st.error(f"Missing columns in CSV: {missing_cols}")
@@ -521,14 +584,21 @@ elif page == "RAGAS Dashboard":
         # =========================================================
         st.subheader("2. Context Analysis Dashboard")
 
-        render_keyword_coverage_chart(context_df, filtered_df)
-        render_context_answer_scatter(context_df)
+        # Filtered views are limited to the matching tickets
+        if unfiltered:
+            ticket_ids = None
+        elif filters is None:
+            ticket_ids = set()
+        else:
+            ticket_ids = set(query_rows(job_id, "ragas_bi", filters, columns=["ticket_id"])[0]["ticket_id"])
+        render_keyword_coverage_chart(summary, ticket_ids)
+        render_context_answer_scatter(job_id)
 
         col1, col2 = st.columns(2)
 
         with col1:
-            render_ground_truth_quality(context_df)
+            render_ground_truth_quality(summary)
 
         with col2:
-            render_question_coverage(context_df)
+            render_question_coverage(summary)
 
@@ -3,30 +3,42 @@
 import altair as alt
 import streamlit as st
 import pandas as pd
+from services.job_service import query_rows
 
 
-def render_keyword_coverage_chart(context_df, filtered_df):
-    coverage_df = (
-        context_df
-        .groupby("ticket_id", as_index=False)
-        .agg({
-            "question_keyword_coverage_pct": "mean",
-            "ground_truth_keyword_coverage_pct": "mean",
-            "rag_answer_keyword_coverage_pct": "mean"
-        })
-    )
+COVERAGE_KINDS = {
+    "question": "question_keyword_coverage_pct",
+    "ground_truth": "ground_truth_keyword_coverage_pct",
+    "rag_answer": "rag_answer_keyword_coverage_pct",
+}
 
-    coverage_cols = [
-        "question_keyword_coverage_pct",
-        "ground_truth_keyword_coverage_pct",
-        "rag_answer_keyword_coverage_pct"
-    ]
+USEFUL_LABELS = {"useful": "True", "not_useful": "False"}
 
-    coverage_df[coverage_cols] = (coverage_df[coverage_cols] * 100).round(2)
+# Contexts plotted in the scatter, fetched page by page from the backend
+SCATTER_MAX_POINTS = 5000
+
+SCATTER_COLUMNS = [
+    "ticket_id",
+    "context_id",
+    "context_token_count",
+    "rag_answer_keyword_coverage_pct",
+    "is_context_useful",
+]
 
-    coverage_df = coverage_df[
-        coverage_df["ticket_id"].isin(filtered_df["ticket_id"])
-    ]
+
+def render_keyword_coverage_chart(summary, ticket_ids=None):
+    """
+    Keyword coverage per ticket, for ``ticket_ids`` (the filtered
+    tickets) or every ticket when None.
+    """
+    coverage_cols = list(COVERAGE_KINDS.values())
+
+    # Per-ticket means come precomputed in the job summary
+    coverage_df = pd.DataFrame(summary["ticket_coverage"]).rename(columns=COVERAGE_KINDS)
+    if ticket_ids is not None:
+        coverage_df = coverage_df[coverage_df["ticket_id"].isin(ticket_ids)].copy()
+
+    coverage_df[coverage_cols] = (coverage_df[coverage_cols].astype(float) * 100).round(2)
 
     bar_df = coverage_df[coverage_cols].mean().reset_index()
     bar_df.columns = ["Metric", "Average Coverage (%)"]
@@ -71,8 +83,9 @@ def render_keyword_coverage_chart(context_df, filtered_df):
     - Answer Coverage → Did the final answer use what was retrieved?
     """)
 
-def render_context_answer_scatter(context_df):
-    scatter_df = context_df.copy()
+def render_context_answer_scatter(job_id):
+    # Only the plotted columns, and at most SCATTER_MAX_POINTS contexts
+    scatter_df, total = query_rows(job_id, "context_bi", columns=SCATTER_COLUMNS, max_rows=SCATTER_MAX_POINTS)
     scatter_df["rag_answer_keyword_coverage_pct"] *= 100
     scatter_df["is_context_useful"] = scatter_df["is_context_useful"].astype(str)
 
@@ -106,6 +119,9 @@ def render_context_answer_scatter(context_df):
 
     st.altair_chart(chart, use_container_width=True)
 
+    if total > len(scatter_df):
+        st.caption(f"Showing the first {len(scatter_df):,} of {total:,} contexts.")
+
     st.caption("""
     - X-axis → Context length (tokens)
     - Y-axis → How much the answer used this context
@@ -113,53 +129,53 @@ def render_context_answer_scatter(context_df):
     """)
 
 
-def render_ground_truth_quality(context_df):
-    gt_df = context_df.copy()
-    gt_df["is_context_useful"] = gt_df["is_context_useful"].astype(str)
+def render_ground_truth_quality(summary):
+    quantiles = summary["coverage"]["ground_truth"]["quantiles"]
 
-    if gt_df["ground_truth_keyword_coverage_pct"].max() <= 1:
-        gt_df["ground_truth_keyword_coverage_pct"] *= 100
+    # One box per usefulness group, drawn from the precomputed quantiles
+    gt_df = pd.DataFrame([
+        {"is_context_useful": label, **{k: v * 100 for k, v in quantiles[group].items()}}
+        for group, label in USEFUL_LABELS.items()
+        if quantiles[group]["median"] is not None
+    ], columns=["is_context_useful", "min", "p25", "median", "p75", "max"])
 
-    # Box plot
-    box = (
+    color = alt.Color(
+        "is_context_useful:N",
+        scale=alt.Scale(
+            domain=["True", "False"],
+            range=["#74C69D", "#F28482"]
+        ),
+        legend=None
+    )
+    tooltip = [
+        "is_context_useful:N",
+        *[alt.Tooltip(f"{k}:Q", format=".2f") for k in ["min", "p25", "median", "p75", "max"]]
+    ]
+
+    # Box plot: min-max whiskers, p25-p75 box, median tick
+    whiskers = (
         alt.Chart(gt_df)
-        .mark_boxplot(extent="min-max", size=60, opacity=0.6)
+        .mark_rule()
         .encode(
             x="is_context_useful:N",
             y=alt.Y(
-                "ground_truth_keyword_coverage_pct:Q",
+                "min:Q",
                 scale=alt.Scale(domain=[0, 100]),
                 title="Ground Truth Coverage (%)"
             ),
-            color=alt.Color(
-                "is_context_useful:N",
-                scale=alt.Scale(
-                    domain=["True", "False"],
-                    range=["#74C69D", "#F28482"]
-                ),
-                legend=None
-            )
+            y2="max:Q",
+            color=color
         )
     )
-
-    # Jittered points
-    points = (
+    box = (
         alt.Chart(gt_df)
-        .mark_circle(size=120, opacity=0.7)
-        .encode(
-            x="is_context_useful:N",
-            y="ground_truth_keyword_coverage_pct:Q",
-            tooltip=[
-                "ticket_id:N",
-                "context_id:N",
-                alt.Tooltip(
-                    "ground_truth_keyword_coverage_pct:Q",
-                    format=".2f",
-                    title="GT Coverage (%)"
-                )
-            ],
-            color="is_context_useful:N"
-        )
+        .mark_bar(size=60, opacity=0.6)
+        .encode(x="is_context_useful:N", y="p25:Q", y2="p75:Q", color=color, tooltip=tooltip)
+    )
+    median = (
+        alt.Chart(gt_df)
+        .mark_tick(size=60, thickness=2, color="#2f2f2f")
+        .encode(x="is_context_useful:N", y="median:Q", tooltip=tooltip)
     )
 
     # Threshold lines
@@ -169,13 +185,13 @@ def render_ground_truth_quality(context_df):
         .encode(y="y:Q")
     )
 
-    final_chart = (box + points + thresholds).properties(height=360)
+    final_chart = (whiskers + box + median + thresholds).properties(height=360)
 
     st.subheader("🔬 Context Quality vs Ground Truth Coverage")
     st.altair_chart(final_chart, use_container_width=True)
 
     # Interpretation
-    median_gt = gt_df["ground_truth_keyword_coverage_pct"].median()
+    median_gt = (quantiles["all"]["median"] or 0) * 100
 
     if median_gt < 40:
         st.caption(
@@ -194,24 +210,33 @@ def render_ground_truth_quality(context_df):
         )
 
 
-def render_question_coverage(context_df):
-    qc_df = context_df.copy()
-    qc_df["is_context_useful"] = qc_df["is_context_useful"].astype(str)
+def render_question_coverage(summary):
+    coverage = summary["coverage"]["question"]
+    edges = [e * 100 for e in summary["histogram_edges"]]
 
-    if qc_df["question_keyword_coverage_pct"].max() <= 1:
-        qc_df["question_keyword_coverage_pct"] *= 100
+    # 10% bins counted by the backend, stacked by usefulness
+    qc_df = pd.DataFrame([
+        {
+            "bin_start": edges[i],
+            "bin_end": edges[i + 1],
+            "count": count,
+            "is_context_useful": label,
+        }
+        for group, label in USEFUL_LABELS.items()
+        for i, count in enumerate(coverage["histogram"][group])
+    ])
 
     hist = (
         alt.Chart(qc_df)
         .mark_bar(opacity=0.65)
         .encode(
             x=alt.X(
-                "question_keyword_coverage_pct:Q",
-                bin=alt.Bin(step=10),
+                "bin_start:Q",
                 scale=alt.Scale(domain=[0, 100]),
                 title="Question Keyword Coverage (%)"
             ),
-            y=alt.Y("count():Q", title="Number of Contexts"),
+            x2="bin_end:Q",
+            y=alt.Y("count:Q", title="Number of Contexts", stack="zero"),
             color=alt.Color(
                 "is_context_useful:N",
                 scale=alt.Scale(
@@ -220,7 +245,7 @@ def render_question_coverage(context_df):
                 ),
                 title="Context Useful"
             ),
-            tooltip=["count():Q", "is_context_useful:N"]
+            tooltip=["count:Q", "is_context_useful:N"]
         )
         .properties(height=320)
     )
@@ -228,11 +253,8 @@ def render_question_coverage(context_df):
     st.subheader("🔍 Context Quality vs Question Coverage")
     st.altair_chart(hist, use_container_width=True)
 
-    useful = qc_df[qc_df["is_context_useful"] == "True"]
-    not_useful = qc_df[qc_df["is_context_useful"] == "False"]
-
-    useful_median = useful["question_keyword_coverage_pct"].median() if not useful.empty else 0
-    not_useful_median = not_useful["question_keyword_coverage_pct"].median() if not not_useful.empty else 0
+    useful_median = (coverage["quantiles"]["useful"]["median"] or 0) * 100
+    not_useful_median = (coverage["quantiles"]["not_useful"]["median"] or 0) * 100
 
     if useful_median < 40:
         st.caption(
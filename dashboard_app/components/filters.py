@@ -1,8 +1,61 @@
+import pandas as pd
 import streamlit as st
+from services.job_service import histogram_table
 from utils.constants import METRIC_MAP
 
+STATUSES = ["🔴 Critical", "🟠 Warning", "🟢 Good"]
+
+# Score ranges (fractions, half-open) of each status
+STATUS_RANGES = {
+    "🔴 Critical": (0.0, 0.4),
+    "🟠 Warning": (0.4, 0.7),
+    "🟢 Good": (0.7, None),
+}
+
+
+def _status_filters(metric, statuses):
+    """
+    Server-side filters for a set of score statuses; None when nothing
+    can match. The statuses partition the scale, so only Critical + Good
+    leaves a gap.
+    """
+    selected = [s for s in STATUSES if s in statuses]
+    if not selected:
+        return None
+    if selected == ["🔴 Critical", "🟢 Good"]:
+        return [{"column": metric, "op": "not_in_range", "value": [0.4, 0.7]}]
+
+    filters = []
+    low, high = STATUS_RANGES[selected[0]][0], STATUS_RANGES[selected[-1]][1]
+    if selected[0] != STATUSES[0]:
+        filters.append({"column": metric, "op": "ge", "value": low})
+    if high is not None:
+        filters.append({"column": metric, "op": "lt", "value": high})
+    return filters
+
+
+def _render_distribution(job_id, metric, label):
+    # Ticket counts per 10% bucket, counted by the backend
+    histogram = histogram_table(job_id, "ragas_bi", metric, bins=10, low=0.0, high=1.0)
+    if not histogram["edges"]:
+        return
+    edges = histogram["edges"]
+    st.sidebar.caption(f"{label} distribution ({histogram['total']} tickets)")
+    st.sidebar.bar_chart(
+        pd.DataFrame(
+            {"Tickets": histogram["counts"]},
+            index=[f"{edges[i] * 100:.0f}%" for i in range(len(edges) - 1)]
+        ),
+        height=140
+    )
+
 
-def ragas_metric_filters(df):
+def ragas_metric_filters(job_id):
+    """
+    Sidebar metric filters. Returns (filters, selected metric): filters
+    are query/aggregate filters for ragas_bi, or None when the selection
+    matches no ticket.
+    """
     st.sidebar.header("🎯 Metric Filters")
 
     # ---------------------------
@@ -15,7 +68,7 @@ def ragas_metric_filters(df):
         st.session_state.threshold_slider = (0, 100)
 
     if "status_filter" not in st.session_state:
-        st.session_state.status_filter = ["🔴 Critical", "🟠 Warning", "🟢 Good"]
+        st.session_state.status_filter = list(STATUSES)
 
     # ---------------------------
     # UI controls
@@ -37,32 +90,21 @@ def ragas_metric_filters(df):
 
     status_filter = st.sidebar.multiselect(
         "Score Status",
-        ["🔴 Critical", "🟠 Warning", "🟢 Good"],
+        STATUSES,
         key="status_filter"
     )
 
+    _render_distribution(job_id, selected_metric, selected_metric_label)
+
     # ---------------------------
-    # Filtering logic
+    # Filtering logic (applied by the backend)
     # ---------------------------
-    def status_from_value(v):
-        if v < 40:
-            return "🔴 Critical"
-        elif v < 70:
-            return "🟠 Warning"
-        else:
-            return "🟢 Good"
-
-    filtered_df = df.copy()
-    filtered_df["_metric_pct"] = filtered_df[selected_metric] * 100
-
-    filtered_df = filtered_df[
-        (filtered_df["_metric_pct"] >= threshold_range[0]) &
-        (filtered_df["_metric_pct"] <= threshold_range[1])
-    ]
-
-    filtered_df = filtered_df[
-        filtered_df["_metric_pct"].apply(status_from_value).isin(status_filter)
-    ]
+    filters = _status_filters(selected_metric, status_filter)
+    if filters is not None:
+        filters = [
+            {"column": selected_metric, "op": "ge", "value": threshold_range[0] / 100},
+            {"column": selected_metric, "op": "le", "value": threshold_range[1] / 100},
+        ] + filters
 
     # ---------------------------
     # Reset
@@ -70,10 +112,10 @@ def ragas_metric_filters(df):
     def reset_filters():
         st.session_state.metric_select = "Answer Correctness"
         st.session_state.threshold_slider = (0, 100)
-        st.session_state.status_filter = ["🔴 Critical", "🟠 Warning", "🟢 Good"]
+        st.session_state.status_filter = list(STATUSES)
         st.rerun()
 
     st.sidebar.divider()
     st.sidebar.button("🔄 Reset to Default", on_click=reset_filters)
 
-    return filtered_df, selected_metric
+    return filters, selected_metric
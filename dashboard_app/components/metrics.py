@@ -1,22 +1,53 @@
 import streamlit as st
+from services.job_service import aggregate_table
 from utils.formatting import styled_metric
 
 
-def render_ragas_kpis(df):
-    if df.empty:
+KPI_METRICS = [
+    "answer_relevancy",
+    "faithfulness",
+    "context_recall",
+    "context_precision",
+    "answer_correctness",
+    "answer_similarity",
+    "context_entity_recall",
+]
+
+
+def filtered_kpis(job_id, filters):
+    """
+    KPI means (0-1) of the ragas_bi rows matching ``filters``, averaged by
+    the backend and shaped like summary["kpis"]; empty when none match.
+    """
+    if filters is None:
+        return {}
+    means = aggregate_table(
+        job_id,
+        "ragas_bi",
+        [{"function": "count", "name": "tickets"}]
+        + [{"function": "mean", "column": metric, "name": metric} for metric in KPI_METRICS],
+        filters=filters
+    )
+    if means.empty or not means.loc[0, "tickets"]:
+        return {}
+    return {metric: means.loc[0, metric] for metric in KPI_METRICS}
+
+
+def render_ragas_kpis(kpis):
+    if not kpis or all(v is None for v in kpis.values()):
         st.warning("No data available for KPI calculation.")
         return
 
     # ---------------------------
     # KPI calculations
     # ---------------------------
-    avg_answer_correctness = df["answer_correctness"].mean() * 100
-    avg_answer_relevancy = df["answer_relevancy"].mean() * 100
-    avg_answer_similarity = df["answer_similarity"].mean() * 100
-    avg_context_precision = df["context_precision"].mean() * 100
-    avg_context_recall = df["context_recall"].mean() * 100
-    avg_faithfulness = df["faithfulness"].mean() * 100
-    avg_entity_recall = df["context_entity_recall"].mean() * 100
+    avg_answer_correctness = kpis["answer_correctness"] * 100
+    avg_answer_relevancy = kpis["answer_relevancy"] * 100
+    avg_answer_similarity = kpis["answer_similarity"] * 100
+    avg_context_precision = kpis["context_precision"] * 100
+    avg_context_recall = kpis["context_recall"] * 100
+    avg_faithfulness = kpis["faithfulness"] * 100
+    avg_entity_recall = kpis["context_entity_recall"] * 100
 
     # ---------------------------
     # Layout
@@ -0,0 +1,51 @@
+import streamlit as st
+from services.job_service import (
+    watch_job, get_job_status, get_queue_position, JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED
+)
+
+
+def _fraction(event):
+    # Finished stages plus the finished share of the current one
+    finished = event["stage_index"] - 1
+    if event["kind"] == "stage_completed":
+        finished += 1
+    elif event["kind"] == "progress" and event["total"]:
+        finished += event["done"] / event["total"]
+    return min(finished / event["stage_count"], 1.0)
+
+
+def _label(event):
+    label = f"Stage {event['stage_index']}/{event['stage_count']}: {event['stage']}"
+    if event["kind"] == "progress":
+        item = f" ({event['item']})" if event.get("item") else ""
+        label += f" · {event['done']:,}/{event['total']:,} {event['unit']}{item}"
+        if event.get("eta_seconds") is not None:
+            label += f" · ~{event['eta_seconds']:.0f}s left"
+    return label
+
+
+def render_job_progress(job_id):
+    """
+    Follow a running job's progress events in place, without rerunning
+    the page; returns the final job status.
+    """
+    bar = st.progress(0.0, text="Waiting for the pipeline to start…")
+
+    for event in watch_job(job_id):
+        if event["kind"] == "job_completed":
+            bar.progress(1.0, text="Evaluation completed")
+            return JOB_COMPLETED
+        if event["kind"] == "job_failed":
+            bar.empty()
+            return JOB_FAILED
+        if event["kind"] == "job_cancelled":
+            bar.empty()
+            return JOB_CANCELLED
+        if event["kind"] == "job_queued":
+            position = get_queue_position(job_id)
+            text = f"Queued (position {position})" if position else "Queued"
+            bar.progress(0.0, text=f"{text}, waiting for a free pipeline slot…")
+            continue
+        bar.progress(_fraction(event), text=_label(event))
+
+    return get_job_status(job_id)
@@ -0,0 +1,93 @@
+import pandas as pd
+import streamlit as st
+from services.job_service import search_job, ticket_contexts
+
+SEARCH_PAGE_SIZE = 20
+
+SEARCH_KIND_LABELS = {
+    "Question": "question",
+    "Ground Truth": "ground_truth",
+    "RAG Answer": "rag_answer",
+    "Context": "context",
+}
+
+
+def render_search(job_id):
+    """
+    Full-text search over the job's backend index; selecting a hit shows
+    the contexts of its ticket.
+    """
+    st.markdown("#### 🔎 Search Tickets & Contexts")
+
+    search_col, kind_col = st.columns([3, 2])
+
+    with search_col:
+        query = st.text_input(
+            "Search",
+            key="search_query",
+            placeholder="e.g. payment term",
+            label_visibility="collapsed"
+        )
+
+    with kind_col:
+        kind_labels = st.multiselect(
+            "Search in",
+            list(SEARCH_KIND_LABELS.keys()),
+            default=list(SEARCH_KIND_LABELS.keys()),
+            key="search_kinds",
+            label_visibility="collapsed"
+        )
+
+    if not query.strip():
+        return
+
+    # Reset paging when the query changes
+    if st.session_state.get("search_last_query") != (query, tuple(kind_labels)):
+        st.session_state.search_last_query = (query, tuple(kind_labels))
+        st.session_state.search_page = 0
+
+    page = st.session_state.get("search_page", 0)
+
+    result = search_job(
+        job_id,
+        query,
+        kinds=[SEARCH_KIND_LABELS[k] for k in kind_labels],
+        offset=page * SEARCH_PAGE_SIZE,
+        limit=SEARCH_PAGE_SIZE
+    )
+
+    hits_df = pd.DataFrame(result["hits"])
+    order = "best match first" if result["ranked"] else "document order (broad query)"
+    st.caption(f"{result['total']} matches · page {page + 1} · {order} · {result['took_ms']} ms")
+
+    if hits_df.empty:
+        st.info("No matches.")
+        return
+
+    event = st.dataframe(
+        hits_df[["ticket_id", "context_id", "kind", "score", "snippet"]],
+        use_container_width=True,
+        hide_index=True,
+        height=300,
+        selection_mode="single-row",
+        on_select="rerun"
+    )
+
+    prev_col, next_col, _ = st.columns([1, 1, 6])
+    with prev_col:
+        if st.button("◀ Prev", disabled=page == 0, key="search_prev"):
+            st.session_state.search_page = page - 1
+            st.rerun()
+    with next_col:
+        if st.button("Next ▶", disabled=(page + 1) * SEARCH_PAGE_SIZE >= result["total"], key="search_next"):
+            st.session_state.search_page = page + 1
+            st.rerun()
+
+    if len(event.selection["rows"]) > 0:
+        hit = hits_df.iloc[event.selection["rows"][0]]
+        st.subheader(f"📄 Contexts for Ticket: {hit['ticket_id']}")
+        st.dataframe(
+            ticket_contexts(job_id, hit["ticket_id"]),
+            use_container_width=True,
+            height=400
+        )
@@ -1,8 +1,10 @@
 # services/job_service.py
 
+import json
 import requests
 import pandas as pd
-from io import BytesIO
+import zstandard
+from typing import Iterator
 from utils.constants import BACKEND_URL
 
 # =========================
@@ -12,6 +14,13 @@ JOB_PENDING = "pending"
 JOB_RUNNING = "running"
 JOB_COMPLETED = "completed"
 JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+# Backend statuses that mean the same thing here
+_STATUS_ALIASES = {"queued": JOB_PENDING, "processing": JOB_RUNNING, "cancelling": JOB_RUNNING}
+
+# Job progress events that end the stream
+TERMINAL_EVENTS = {"job_completed", "job_failed", "job_cancelled"}
 
 def normalize_job_status(status: str | None) -> str:
     """
@@ -20,19 +29,43 @@ def normalize_job_status(status: str | None) -> str:
     """
     if not status:
         return JOB_PENDING
-    return str(status).strip().lower()
+    status = str(status).strip().lower()
+    return _STATUS_ALIASES.get(status, status)
+
+class JobRejected(Exception):
+    """The backend refused the upload (busy: 429, too large: 413)."""
+
+    def __init__(self, message: str, retry_after: int | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Uploads that are already compressed are sent as they are
+_COMPRESSED_MAGIC = (b"\x1f\x8b", b"\x28\xb5\x2f\xfd")
+
+
+def _upload_payload(json_file):
+    """
+    (filename, bytes, content type) for an upload, zstd-compressed
+    unless it already is gzip or zstd. RAGAS JSON compresses well, and
+    the backend decompresses it as a stream.
+    """
+    data = json_file.getvalue()
+    if data.startswith(_COMPRESSED_MAGIC):
+        return json_file.name, data, "application/octet-stream"
+    return f"{json_file.name}.zst", zstandard.ZstdCompressor(level=3).compress(data), "application/zstd"
+
 
 def submit_job(json_file) -> str:
-    resp = requests.post(
-        BACKEND_URL,
-        files={
-            "file": (
-                json_file.name,
-                json_file.getvalue(),
-                "application/json"
-            )
-        }
-    )
+    resp = requests.post(BACKEND_URL, files={"file": _upload_payload(json_file)})
+    if resp.status_code == 429:
+        detail = resp.json().get("detail", {})
+        raise JobRejected(
+            detail.get("reason", "Backend is busy"),
+            retry_after=int(resp.headers.get("Retry-After", 0)) or None
+        )
+    if resp.status_code == 413:
+        raise JobRejected(resp.json().get("detail", "Upload is too large"))
     resp.raise_for_status()
     return resp.json()["job_id"]
 
@@ -44,7 +77,214 @@ def get_job_status(job_id: str) -> str:
     return normalize_job_status(job.get("status"))
 
 
-def download_csv(job_id: str, output_type: str) -> pd.DataFrame:
-    resp = requests.get(f"{BACKEND_URL}/{job_id}/download/{output_type}")
+def cancel_job(job_id: str) -> str:
+    """
+    Ask the backend to stop a queued or running job; returns its status
+    ("cancelled" at once for queued jobs, "cancelling" while it stops).
+    """
+    resp = requests.delete(f"{BACKEND_URL}/{job_id}")
+    if resp.status_code == 409:
+        # Finished in the meantime
+        return get_job_status(job_id)
+    resp.raise_for_status()
+    return normalize_job_status(resp.json().get("status"))
+
+
+def get_queue_position(job_id: str) -> int | None:
+    """1-based position among waiting jobs, 0 once running."""
+    resp = requests.get(f"{BACKEND_URL}/{job_id}")
+    resp.raise_for_status()
+    return resp.json().get("queue_position")
+
+
+def _sse_events(job_id: str, after: int) -> Iterator[dict]:
+    resp = requests.get(
+        f"{BACKEND_URL}/{job_id}/events",
+        params={"after": after},
+        headers={"Accept": "text/event-stream"},
+        stream=True,
+        timeout=(5, 60)  # read timeout well above the server keep-alive
+    )
+    resp.raise_for_status()
+    with resp:
+        data = []
+        for line in resp.iter_lines(decode_unicode=True):
+            if line.startswith("data:"):
+                data.append(line[5:].strip())
+            elif not line and data:
+                yield json.loads("\n".join(data))
+                data = []
+
+
+def _polled_events(job_id: str, after: int) -> Iterator[dict]:
+    while True:
+        resp = requests.get(
+            f"{BACKEND_URL}/{job_id}/progress",
+            params={"after": after, "wait": 25},
+            timeout=(5, 60)
+        )
+        resp.raise_for_status()
+        for event in resp.json()["events"]:
+            after = event["id"]
+            yield event
+            if event["kind"] in TERMINAL_EVENTS:
+                return
+
+
+def watch_job(job_id: str, after: int = 0) -> Iterator[dict]:
+    """
+    Progress events of a running job as they happen, ending with
+    job_completed / job_failed. Streams server-sent events and falls
+    back to long polling when the stream breaks (e.g. behind a proxy
+    that buffers responses).
+    """
+    try:
+        for event in _sse_events(job_id, after):
+            after = event["id"]
+            yield event
+            if event["kind"] in TERMINAL_EVENTS:
+                return
+    except requests.RequestException:
+        pass
+    yield from _polled_events(job_id, after)
+
+
+_SUMMARY_CACHE: dict[str, tuple[str, dict]] = {}
+
+
+def get_summary(job_id: str) -> dict:
+    """
+    Precomputed dashboard overview of a job: KPI means, category counts,
+    coverage histograms/quantiles and per-ticket coverage means.
+    """
+    cached = _SUMMARY_CACHE.get(job_id)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+
+    resp = requests.get(f"{BACKEND_URL}/{job_id}/summary", headers=headers)
+    if resp.status_code == 304:
+        return cached[1]
+    resp.raise_for_status()
+
+    summary = resp.json()
+    if resp.headers.get("ETag"):
+        _SUMMARY_CACHE[job_id] = (resp.headers["ETag"], summary)
+    return summary
+
+
+def search_job(
+    job_id: str,
+    query: str,
+    kinds: list[str] | None = None,
+    offset: int = 0,
+    limit: int = 20
+) -> dict:
+    resp = requests.get(
+        f"{BACKEND_URL}/{job_id}/search",
+        params={"q": query, "kind": kinds or [], "offset": offset, "limit": limit}
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def query_table(
+    job_id: str,
+    output_type: str,
+    filters: list[dict] | None = None,
+    columns: list[str] | None = None,
+    sort: list[dict] | None = None,
+    limit: int = 100,
+    cursor: str | None = None
+) -> dict:
+    """
+    One server-side filtered/sorted page of a BI table; pass back
+    ``next_cursor`` for the following page.
+    """
+    resp = requests.post(
+        f"{BACKEND_URL}/{job_id}/query/{output_type}",
+        json={
+            "filters": filters or [],
+            "columns": columns,
+            "sort": sort or [],
+            "limit": limit,
+            "cursor": cursor,
+        }
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+# Largest page the backend serves (its ROWS_PAGE_MAX)
+QUERY_PAGE_MAX = 1000
+
+
+def query_rows(
+    job_id: str,
+    output_type: str,
+    filters: list[dict] | None = None,
+    columns: list[str] | None = None,
+    sort: list[dict] | None = None,
+    max_rows: int | None = None
+) -> tuple[pd.DataFrame, int]:
+    """
+    Filtered rows of a BI table, following the cursor page by page up to
+    ``max_rows`` (all when None). Returns (rows, total matching rows).
+    """
+    frames, total, cursor = [], 0, None
+    fetched = 0
+    while True:
+        limit = QUERY_PAGE_MAX if max_rows is None else min(QUERY_PAGE_MAX, max_rows - fetched)
+        if limit <= 0:
+            break
+        page = query_table(job_id, output_type, filters, columns, sort, limit=limit, cursor=cursor)
+        total = page["total"]
+        frames.append(pd.DataFrame(page["rows"], columns=columns))
+        fetched += len(page["rows"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    return rows, total
+
+
+def ticket_contexts(job_id: str, ticket_id: str) -> pd.DataFrame:
+    """The context_bi rows of one ticket."""
+    rows, _ = query_rows(job_id, "context_bi", filters=[{"column": "ticket_id", "op": "eq", "value": ticket_id}])
+    return rows
+
+
+def aggregate_table(
+    job_id: str,
+    output_type: str,
+    aggregations: list[dict],
+    group_by: list[str] | None = None,
+    filters: list[dict] | None = None,
+    limit: int = 1000
+) -> pd.DataFrame:
+    resp = requests.post(
+        f"{BACKEND_URL}/{job_id}/aggregate/{output_type}",
+        json={
+            "aggregations": aggregations,
+            "group_by": group_by or [],
+            "filters": filters or [],
+            "limit": limit,
+        }
+    )
+    resp.raise_for_status()
+    return pd.DataFrame(resp.json()["rows"])
+
+
+def histogram_table(
+    job_id: str,
+    output_type: str,
+    column: str,
+    bins: int = 10,
+    low: float | None = None,
+    high: float | None = None,
+    filters: list[dict] | None = None
+) -> dict:
+    resp = requests.post(
+        f"{BACKEND_URL}/{job_id}/histogram/{output_type}",
+        json={"column": column, "bins": bins, "low": low, "high": high, "filters": filters or []}
+    )
     resp.raise_for_status()
-    return pd.read_csv(BytesIO(resp.content))
+    return resp.json()
@@ -9,6 +9,7 @@ JOB_PENDING = "pending"
 JOB_RUNNING = "running"
 JOB_COMPLETED = "completed"
 JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
 
 # ---------------------------
 # Metric mapping (UI → column)